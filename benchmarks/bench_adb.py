@@ -0,0 +1,97 @@
+"""
+Lệnh shell nhỏ lặp lại trên nhiều instance: spawn `adb shell <lệnh>` mỗi lần (như mỗi action
+spawn một ldconsole) so với ShellPool giữ một session cho mỗi instance, trên adb giả
+
+Chạy:
+    python -m benchmarks.bench_adb
+    python -m benchmarks.bench_adb --instances 8 --commands 50 --connect-latency 0.1
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+FAKE_ADB = os.path.join(ROOT, 'scripts', 'fake_adb.py')
+
+COMMANDS = ('input tap 100 200', 'am start -n com.example.app/.Main', 'pm list packages com.example')
+
+
+def configure(directory: str, args):
+    os.environ.update({
+        'FAKE_LDCONSOLE_STATE': os.path.join(directory, 'ldconsole.json'),
+        'FAKE_ADB_CONNECT_LATENCY': str(args.connect_latency),
+        'ADB_PATH': FAKE_ADB,
+    })
+    from config.settings import settings
+    settings.config['instances']['max_count'] = args.instances
+    settings.config['admission'] = {'enabled': False}
+    settings.config['logging']['level'] = 'WARNING'
+    settings.config.setdefault('state', {})['path'] = os.path.join(directory, 'instances.json')
+
+
+def run(manager, names, commands: int, call) -> list:
+    """Mỗi instance một thread gửi lần lượt các lệnh; trả về độ trễ từng lệnh (ms)"""
+    def worker(name):
+        latencies = []
+        for i in range(commands):
+            start = time.perf_counter()
+            call(name, COMMANDS[i % len(COMMANDS)])
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        return [value for latencies in pool.map(worker, names) for value in latencies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-command adb spawn vs pooled shell sessions')
+    parser.add_argument('--instances', type=int, default=4)
+    parser.add_argument('--commands', type=int, default=30, help='Commands per instance')
+    parser.add_argument('--connect-latency', type=float, default=0.05,
+                        help='Simulated adb spawn/handshake cost per connection (seconds)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, args)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            from core.ld_manager import LDPlayerManager
+            manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+            names = [f"instance_{i}" for i in range(args.instances)]
+            for name in names:
+                manager.create_instance(name)
+            manager.start_many(names)
+
+            def spawn(name, command):
+                subprocess.run(manager._adb_argv(name) + [command], check=True, capture_output=True)
+
+            results = {}
+            for label, call in (('spawn per command', spawn),
+                                ('pooled session', lambda name, command: manager.shell(name, command))):
+                start = time.perf_counter()
+                latencies = run(manager, names, args.commands, call)
+                elapsed = time.perf_counter() - start
+                results[label] = elapsed
+                print(f"{label:<18} {len(latencies) / elapsed:>9.1f} cmd/s   "
+                      f"p50 {statistics.median(latencies):>7.2f} ms   "
+                      f"p95 {sorted(latencies)[int(len(latencies) * 0.95) - 1]:>7.2f} ms")
+            print(f"speedup: {results['spawn per command'] / results['pooled session']:.1f}x")
+
+            manager.adb.close()
+            manager.stop_many(names)
+            manager.store.close()
+            manager.installer.store.close()
+        finally:
+            os.chdir(cwd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
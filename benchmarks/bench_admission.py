@@ -0,0 +1,115 @@
+"""
+Start cả loạt instance cùng lúc trên ldconsole giả có boot tốn CPU thật và RAM thật:
+không có admission (mọi instance boot cùng lúc, tranh CPU tới mức quá hạn boot và treo)
+so với AdmissionController chia thành từng đợt theo tải máy và footprint đã học
+
+Chạy:
+    python -m benchmarks.bench_admission
+    python -m benchmarks.bench_admission --instances 12 --boot 1.5 --deadline 10 --memory 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+
+
+def configure(directory: str, args, enabled: bool):
+    os.environ.update({
+        'FAKE_LDCONSOLE_STATE': os.path.join(directory, 'ldconsole.json'),
+        'FAKE_LDCONSOLE_PROCESSES': '1',
+        'FAKE_LDCONSOLE_BOOT': str(args.boot),
+        'FAKE_LDCONSOLE_BOOT_CPU': '1',
+        'FAKE_LDCONSOLE_BOOT_DEADLINE': str(args.deadline),
+        'FAKE_LDCONSOLE_MEMORY_MB': str(args.memory),
+    })
+    from config.settings import settings
+    settings.config['logging']['level'] = 'WARNING'
+    settings.config.setdefault('state', {})['path'] = os.path.join(directory, 'instances.json')
+    settings.config.setdefault('executor', {})['max_workers'] = args.instances
+    settings.config['instances']['boot_timeout'] = args.timeout
+    # VM giả không có overhead của hypervisor, RAM cấu hình đúng bằng RAM nó chiếm
+    settings.config['admission'] = {'enabled': enabled, 'max_concurrent_boots': args.max_boots,
+                                    'memory_reserve_mb': 512, 'instance_overhead_mb': 16}
+    settings.config['ldplayer']['default_properties'] = dict(settings.default_properties, memory=args.memory)
+
+
+def run(args, enabled: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, args, enabled)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            from core.ld_manager import LDPlayerManager
+            manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+            names = [f"instance_{i}" for i in range(args.instances)]
+            for name in names:
+                manager.create_instance(name)
+
+            ready_at = {}
+            failed = {}
+
+            def bring_up(name):
+                # Mỗi instance tự start rồi chờ boot, như một bước của workflow
+                try:
+                    manager.start_instance(name)
+                    if asyncio.run(manager.wait_until_ready(name, args.timeout)):
+                        ready_at[name] = time.perf_counter() - start
+                except Exception as e:
+                    failed[name] = str(e)
+
+            manager.sampler.start()
+            threads = [threading.Thread(target=bring_up, args=(name,)) for name in names]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            learned = manager.admission.summary()['learned']
+
+            manager.sampler.stop()
+            manager.stop_many(names)
+            manager.store.close()
+            manager.installer.store.close()
+            manager.executor.shutdown()
+            return ready_at, elapsed, learned
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Start-all burst without vs with admission control')
+    parser.add_argument('--instances', type=int, default=8)
+    parser.add_argument('--boot', type=float, default=1.0, help='CPU seconds each boot needs')
+    parser.add_argument('--deadline', type=float, default=6.0,
+                        help='Boots not finished within this many seconds hang (fake ldconsole)')
+    parser.add_argument('--memory', type=int, default=100, help='RSS of each running instance (MB)')
+    parser.add_argument('--max-boots', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=20.0, help='wait_until_ready timeout')
+    args = parser.parse_args()
+
+    print(f"host: {os.cpu_count()} CPU, {args.instances} instances x {args.boot}s CPU boot, "
+          f"hang after {args.deadline}s")
+    print(f"{'admission':>10}{'booted':>8}{'p50 ready':>11}{'last ready':>12}{'wall':>8}")
+    for enabled in (False, True):
+        ready_at, elapsed, learned = run(args, enabled)
+        times = sorted(ready_at.values())
+        p50 = f"{statistics.median(times):.1f}s" if times else '-'
+        last = f"{times[-1]:.1f}s" if times else '-'
+        print(f"{'on' if enabled else 'off':>10}{len(times):>5}/{args.instances:<2}{p50:>11}{last:>12}"
+              f"{elapsed:>7.1f}s")
+        if enabled and learned:
+            memory = statistics.median(fp['memory'] for fp in learned.values())
+            print(f"{'':>10}learned footprint: ~{memory:.0f} MB per instance ({len(learned)} instances)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Chi phí một tick của AlertEngine: 20 luật trên 500 instance, tách phần gộp dữ liệu
+từ MetricsStore và phần cập nhật trạng thái (hysteresis/cooldown)
+
+Chạy: python -m benchmarks.bench_alerts
+"""
+import time
+import numpy as np
+from core.alerts import AlertEngine, AlertRule
+from core.metrics_store import MetricsStore
+
+INSTANCES = 500
+HISTORY = 120
+TICKS = 200
+
+
+def make_rules():
+    # 20 luật trên 5 tổ hợp (metric, window, aggregation) khác nhau
+    queries = [('cpu', 0, 'last'), ('cpu', 30, 'avg'), ('memory_percent', 60, 'avg'),
+               ('memory', 10, 'max'), ('threads', 0, 'last')]
+    rules = []
+    for i in range(20):
+        metric, window, aggregation = queries[i % len(queries)]
+        rules.append(AlertRule(name=f"rule_{i}", metric=metric, window=window, aggregation=aggregation,
+                               threshold=50 + i, hysteresis=5, cooldown=60, actions=[]))
+    return rules
+
+
+def main():
+    rng = np.random.default_rng(0)
+    names = [f"instance_{i}" for i in range(INSTANCES)]
+    store = MetricsStore()
+    start_time = 1_000_000.0
+    for t in range(HISTORY):
+        cpu = rng.uniform(0, 100, INSTANCES)
+        store.record({name: {'cpu': cpu[i], 'memory': 1024 + cpu[i], 'threads': 80}
+                      for i, name in enumerate(names)}, start_time + t)
+
+    engine = AlertEngine(store, make_rules(), memory_total_mb=2048)
+    now = start_time + HISTORY
+    aggregate = []
+    step = []
+    alerts = 0
+    for tick in range(TICKS):
+        began = time.perf_counter()
+        names_now, values = engine.values(now + tick)
+        aggregate.append(time.perf_counter() - began)
+        # Nhiễu quanh ngưỡng để có cả kích hoạt lẫn kết thúc cảnh báo
+        values += rng.normal(0, 5, values.shape)
+        began = time.perf_counter()
+        raised, _ = engine.step(names_now, values, now + tick)
+        step.append(time.perf_counter() - began)
+        alerts += int(raised.sum())
+
+    print(f"{len(engine.rules)} rules x {INSTANCES} instances, {TICKS} ticks")
+    print(f"aggregate from MetricsStore: median {np.median(aggregate) * 1e6:8.1f} us")
+    print(f"rule evaluation (state):     median {np.median(step) * 1e6:8.1f} us")
+    print(f"alerts raised: {alerts} (at most one per rule/instance excursion)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Đo thời gian khởi động của CLI headless bằng -X importtime và kiểm tra
+không có module GUI/numpy nào bị import
+
+    python benchmarks/bench_cli_startup.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('PySide6', 'pyqtgraph', 'numpy')
+
+
+def measure(args):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'ldmanager'] + args,
+        cwd=ROOT, capture_output=True, text=True
+    )
+    total = 0
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, raw_name = line[len('import time:'):].split('|')
+        modules[raw_name.strip()] = int(cumulative)
+        # Module top-level không thụt lề, cộng dồn của chúng là tổng thời gian import
+        if not raw_name.startswith('  '):
+            total += int(cumulative)
+    return proc.returncode, total, modules
+
+
+def report(args):
+    code, total, modules = measure(args)
+    heavy = sorted(name for name in modules if name.split('.')[0] in HEAVY_MODULES)
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:10]
+
+    print(f"$ python -m ldmanager {' '.join(args)}  (exit code {code})")
+    print(f"cumulative import time: {total / 1000:.1f} ms")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy)}")
+        return 1
+    print("OK: no GUI/numpy imports")
+    return 0
+
+
+def main():
+    # 'list' load cả core (psutil, executor, state store) nhưng vẫn không được chạm tới GUI
+    failed = 0
+    for args in (['--help'], ['list']):
+        failed += report(args)
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
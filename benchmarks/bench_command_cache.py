@@ -0,0 +1,123 @@
+"""
+Số subprocess ldconsole bị spawn khi GUI và script cùng poll dày đặc:
+vài thread hỏi isrunning/list2 liên tục, vài thread bấm Start/Stop lên instance đã ở đúng trạng thái.
+So sánh khi tắt và bật CommandCache (gộp lệnh trùng + cache TTL + bỏ qua chuyển trạng thái thừa)
+
+Chạy:
+    python -m benchmarks.bench_command_cache
+    python -m benchmarks.bench_command_cache --instances 20 --rounds 50 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+
+
+def configure(directory: str, args, enabled: bool):
+    os.environ.update({
+        'FAKE_LDCONSOLE_STATE': os.path.join(directory, 'ldconsole.json'),
+        'FAKE_LDCONSOLE_CALLS': os.path.join(directory, 'calls.log'),
+        'FAKE_LDCONSOLE_LATENCY': str(args.latency),
+        'FAKE_LDCONSOLE_PROCESSES': '1',
+    })
+    from config.settings import settings
+    settings.config['instances']['max_count'] = args.instances
+    settings.config['admission'] = {'enabled': False}
+    settings.config['logging']['level'] = 'WARNING'
+    settings.config.setdefault('state', {})['path'] = os.path.join(directory, 'instances.json')
+    settings.config['command_cache'] = {'enabled': enabled, 'ttl': args.ttl}
+
+
+def spawned(directory: str) -> int:
+    path = os.path.join(directory, 'calls.log')
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def run(args, enabled: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, args, enabled)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            from core.ld_manager import LDPlayerManager
+            manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+            names = [f"instance_{i}" for i in range(args.instances)]
+            for name in names:
+                manager.create_instance(name)
+            running, stopped = names[::2], names[1::2]
+            manager.start_many(running)
+            manager.status.refresh()
+
+            requests = [0]
+            lock = threading.Lock()
+
+            def gui():
+                for _ in range(args.rounds):
+                    manager.status.all()
+                    for name in names:
+                        manager.execute_command([FAKE_LDCONSOLE, 'isrunning', '--name', name])
+                    with lock:
+                        requests[0] += 1 + len(names)
+                    time.sleep(0.02)
+
+            def script():
+                for _ in range(args.rounds):
+                    for name in running:
+                        manager.start_instance(name)
+                    for name in stopped:
+                        manager.stop_instance(name)
+                    manager.execute_command([FAKE_LDCONSOLE, 'list2'])
+                    with lock:
+                        requests[0] += len(names) + 1
+                    time.sleep(0.02)
+
+            before = spawned(directory)
+            threads = [threading.Thread(target=gui) for _ in range(args.pollers)]
+            threads += [threading.Thread(target=script) for _ in range(args.pollers)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            spawns = spawned(directory) - before
+
+            manager.stop_many(names)
+            manager.store.close()
+            manager.installer.store.close()
+            manager.executor.shutdown()
+            return requests[0], spawns, elapsed, dict(manager.commands.stats)
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ldconsole spawns under heavy polling, cache off vs on')
+    parser.add_argument('--instances', type=int, default=10)
+    parser.add_argument('--pollers', type=int, default=4, help='GUI threads and script threads (each)')
+    parser.add_argument('--rounds', type=int, default=20, help='Polling rounds per thread')
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--ttl', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'cache':>6}{'requests':>10}{'spawns':>8}{'seconds':>9}  stats")
+    results = {}
+    for enabled in (False, True):
+        requests, spawns, elapsed, stats = run(args, enabled)
+        results[enabled] = spawns
+        print(f"{'on' if enabled else 'off':>6}{requests:>10}{spawns:>8}{elapsed:>9.2f}  "
+              f"{stats if enabled else '-'}")
+    print(f"spawn reduction: {results[False] / max(results[True], 1):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Benchmark end-to-end trên ldconsole giả lập (scripts/fake_ldconsole.py): thông lượng
+create/start/install/run/stop và độ trễ một lượt monitor với 10, 100 và 500 instance.
+Mỗi instance đang chạy là một cây process thật (dnplayer + LdVBoxHeadless) để psutil đo được.
+
+Chạy:
+    python -m benchmarks.bench_fleet
+    python -m benchmarks.bench_fleet --sizes 10 100 --latency 0.05 --fail-rate 0.01
+    python -m benchmarks.bench_fleet --save baseline.json
+    python -m benchmarks.bench_fleet --baseline baseline.json --tolerance 0.25
+
+Với --baseline, kết quả kém hơn baseline quá tolerance sẽ làm script trả về exit code 1 (dùng cho CI).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+MONITOR_TICKS = 10
+
+# Metric kết thúc bằng _per_s: càng cao càng tốt; _ms: càng thấp càng tốt
+PHASES = ('create', 'start', 'install', 'run', 'stop')
+
+
+def configure(directory: str, size: int, args):
+    """Trỏ manager và ldconsole giả vào thư mục tạm, trước khi tạo LDPlayerManager"""
+    os.environ.update({
+        'FAKE_LDCONSOLE_STATE': os.path.join(directory, 'ldconsole.json'),
+        'FAKE_LDCONSOLE_LATENCY': str(args.latency),
+        'FAKE_LDCONSOLE_FAIL_RATE': str(args.fail_rate),
+        'FAKE_LDCONSOLE_PROCESSES': str(args.children),
+        'FAKE_LDCONSOLE_BOOT': '0',
+    })
+    from config.settings import settings
+    settings.config['instances']['max_count'] = size
+    settings.config['admission'] = {'enabled': False}
+    settings.config['logging']['level'] = 'WARNING'
+    settings.config.setdefault('state', {})['path'] = os.path.join(directory, 'instances.json')
+    settings.config.setdefault('executor', {})['max_workers'] = args.workers
+
+
+def throughput(count: int, elapsed: float) -> float:
+    return count / elapsed if elapsed > 0 else float('inf')
+
+
+def run_size(size: int, args) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, size, args)
+        cwd = os.getcwd()
+        # Chạy trong thư mục tạm để không file tương đối nào rơi vào repo
+        os.chdir(directory)
+        try:
+            return _run(size, directory)
+        finally:
+            os.chdir(cwd)
+
+
+def _run(size: int, directory: str) -> Dict[str, float]:
+    from core.ld_manager import LDPlayerManager
+    manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+    names = [f"instance_{i}" for i in range(size)]
+    apk_path = os.path.join(directory, 'app.apk')
+    with open(apk_path, 'wb') as f:
+        f.write(b'\0' * 1024)
+
+    results = {}
+    failures = {}
+    try:
+        start = time.perf_counter()
+        created = []
+        for name in names:
+            try:
+                manager.create_instance(name)
+                created.append(name)
+            except Exception:
+                continue
+        results['create_per_s'] = throughput(len(names), time.perf_counter() - start)
+        failures['create'] = len(names) - len(created)
+
+        for phase, action in (
+            ('start', lambda: manager.start_many(created)),
+            ('install', lambda: manager.install_many(created, apk_path)),
+            ('run', lambda: manager.run_app_many(created, 'com.example.app')),
+        ):
+            start = time.perf_counter()
+            outcome = action()
+            results[f'{phase}_per_s'] = throughput(len(created), time.perf_counter() - start)
+            failures[phase] = sum(1 for result in outcome.values() if not result.ok)
+
+        # Một lượt monitor: list2 (bỏ qua cache) + quét bảng process + tổng hợp tài nguyên
+        ticks = []
+        found = 0
+        for _ in range(MONITOR_TICKS):
+            start = time.perf_counter()
+            manager.status.refresh()
+            manager.sampler.sample()
+            resources = manager.get_all_instances_resources()
+            ticks.append((time.perf_counter() - start) * 1000)
+            found = sum(1 for values in resources.values() if values['status'] == 'running')
+        results['monitor_tick_ms'] = statistics.median(ticks)
+        results['monitor_tick_p95_ms'] = sorted(ticks)[int(len(ticks) * 0.95) - 1]
+        failures['monitored'] = len(created) - found
+    finally:
+        start = time.perf_counter()
+        outcome = manager.stop_many(list(manager.devices))
+        results['stop_per_s'] = throughput(len(manager.devices), time.perf_counter() - start)
+        failures['stop'] = sum(1 for result in outcome.values() if not result.ok)
+        manager.store.close()
+        manager.installer.store.close()
+        manager.executor.shutdown()
+
+    results['failures'] = failures
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float):
+    """Liệt kê các metric kém hơn baseline quá tolerance (tỉ lệ)"""
+    regressions = []
+    for size, metrics in current.items():
+        for key, value in metrics.items():
+            base = baseline.get(size, {}).get(key)
+            if not isinstance(base, (int, float)) or not base:
+                continue
+            if key.endswith('_per_s') and value < base * (1 - tolerance):
+                regressions.append(f"{size} instances {key}: {value:.1f} < {base:.1f}")
+            elif key.endswith('_ms') and value > base * (1 + tolerance):
+                regressions.append(f"{size} instances {key}: {value:.1f} > {base:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end fleet benchmark on the fake ldconsole')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--latency', default='0', help='FAKE_LDCONSOLE_LATENCY (seconds or verb=seconds,...)')
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--children', type=int, default=1, help='Child processes per running instance')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a JSON file written by --save')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    current = {}
+    header = ''.join(f"{phase + '/s':>12}" for phase in PHASES)
+    print(f"{'instances':>9}{header}{'tick ms':>10}{'p95 ms':>10}  failures")
+    for size in args.sizes:
+        results = run_size(size, args)
+        current[str(size)] = {key: value for key, value in results.items() if key != 'failures'}
+        rates = ''.join(f"{results[phase + '_per_s']:>12.1f}" for phase in PHASES)
+        failed = {phase: count for phase, count in results['failures'].items() if count}
+        print(f"{size:>9}{rates}{results['monitor_tick_ms']:>10.1f}"
+              f"{results['monitor_tick_p95_ms']:>10.1f}  {failed or '-'}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+So sánh chi phí lưu state với 1000 device: ghi lại toàn bộ instances.json
+sau mỗi thay đổi (cách cũ) với StateStore (journal + write-behind).
+
+Chạy: python -m benchmarks.bench_persistence
+"""
+import json
+import os
+import tempfile
+import time
+from core.device import Device
+from core.state_store import StateStore
+
+DEVICES = 1000
+CHANGES = 200
+
+
+def make_devices():
+    return {
+        f"instance_{i}": Device(name=f"instance_{i}", status="stopped",
+                                properties={"cpu": 1, "memory": 1024}, index=i)
+        for i in range(DEVICES)
+    }
+
+
+def legacy(directory, devices):
+    path = os.path.join(directory, 'instances.json')
+    start = time.perf_counter()
+    for i in range(CHANGES):
+        devices[f"instance_{i}"].status = "running"
+        state = {name: device.to_dict() for name, device in devices.items()}
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+    return time.perf_counter() - start
+
+
+def store(directory, devices, flush_interval):
+    path = os.path.join(directory, 'instances.json')
+    state_store = StateStore(path, flush_interval=flush_interval, compact_every=10 * CHANGES)
+    state_store.load()
+    start = time.perf_counter()
+    for i in range(CHANGES):
+        device = devices[f"instance_{i}"]
+        device.status = "running"
+        state_store.put(device.name, device.to_dict())
+    state_store.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{DEVICES} devices, {CHANGES} status changes")
+    for label, run in (
+        ("full rewrite (legacy)", lambda d: legacy(d, make_devices())),
+        ("journal, write-through", lambda d: store(d, make_devices(), 0)),
+        ("journal, write-behind", lambda d: store(d, make_devices(), 1.0)),
+    ):
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"{label:<24} {run(directory) * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
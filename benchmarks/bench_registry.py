@@ -0,0 +1,49 @@
+"""
+Tra cứu instance theo index/pid/status: quét tuyến tính dict name -> Device (cách cũ)
+so với index phụ của DeviceRegistry, với 5000 instance
+
+Chạy: python -m benchmarks.bench_registry
+"""
+import time
+from core.device import Device
+from core.registry import DeviceRegistry
+
+DEVICES = 5000
+LOOKUPS = 1000
+
+
+def make_devices():
+    return [Device(name=f"instance_{i}", status="running" if i % 3 == 0 else "stopped",
+                   properties={"cpu": 1, "memory": 1024}, index=i, pid=20000 + i)
+            for i in range(DEVICES)]
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        func(i * 7 % DEVICES)
+    return (time.perf_counter() - start) / LOOKUPS
+
+
+def main():
+    plain = {device.name: device for device in make_devices()}
+    registry = DeviceRegistry(make_devices())
+
+    cases = (
+        ("by index", lambda i: next(d for d in plain.values() if d.index == i),
+         lambda i: registry.with_index(i)),
+        ("by pid", lambda i: next(d for d in plain.values() if d.pid == 20000 + i),
+         lambda i: registry.with_pid(20000 + i)),
+        ("running", lambda i: [d for d in plain.values() if d.status == "running"],
+         lambda i: registry.names_with_status("running")),
+        ("status change", lambda i: setattr(plain[f"instance_{i}"], 'status', 'running'),
+         lambda i: setattr(registry[f"instance_{i}"], 'status', 'running')),
+    )
+    print(f"{DEVICES} devices")
+    print(f"{'lookup':<14} {'dict scan (us)':>15} {'registry (us)':>14}")
+    for label, scan, indexed in cases:
+        print(f"{label:<14} {measure(scan) * 1e6:>15.2f} {measure(indexed) * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+So sánh chi phí một lượt monitor: quét bảng process theo từng instance (cách cũ)
+với ProcessSnapshot quét một lần cho cả fleet.
+
+Chạy: python -m benchmarks.bench_snapshot
+"""
+import time
+import psutil
+from core.process_snapshot import ProcessSnapshot
+from benchmarks.fake_processes import FakeProcessTable
+
+
+def legacy_tick(table: FakeProcessTable):
+    """Thuật toán cũ của get_instance_resources, bỏ phần sleep của cpu_percent"""
+    resources = {}
+    for name in table.names:
+        ldplayer_processes = []
+        for proc in table.process_iter(['pid', 'name', 'cmdline']):
+            lowered = proc.info['name'].lower()
+            if 'ldplayer' in lowered or 'dnplayer' in lowered:
+                ldplayer_processes.append(proc)
+        main_process = None
+        for proc in ldplayer_processes:
+            if name in str(proc.cmdline()):
+                main_process = proc
+                break
+        if main_process is None:
+            continue
+        mem = main_process.memory_info().rss
+        threads = main_process.num_threads()
+        for child in main_process.children(recursive=True):
+            try:
+                mem += child.memory_info().rss
+                threads += child.num_threads()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        resources[name] = (mem, threads)
+    return resources
+
+
+def snapshot_tick(table: FakeProcessTable):
+    snapshot = ProcessSnapshot.capture(table.names, process_iter=table.process_iter)
+    return {name: snapshot.resources(name) for name in table.names}
+
+
+def measure(func, table, repeat=5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(table)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'instances':>10} {'legacy (ms)':>12} {'snapshot (ms)':>14} {'speedup':>8}")
+    for count in (10, 60, 200, 500):
+        table = FakeProcessTable(count)
+        legacy = measure(legacy_tick, table)
+        snap = measure(snapshot_tick, table)
+        print(f"{count:>10} {legacy * 1000:>12.2f} {snap * 1000:>14.2f} {legacy / snap:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
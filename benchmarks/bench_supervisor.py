@@ -0,0 +1,161 @@
+"""
+ProcessSupervisor trên ldconsole giả có cây process thật:
+- reconcile lúc khởi động: state ghi "running" nhưng mọi player đã chết (như sau crash/khởi động lại máy)
+- khôi phục: kill -9 một số player, đo thời gian tới lúc phát hiện và tới lúc instance chạy lại
+- chi phí khi rảnh: CPU của process và số lệnh ldconsole khi không có gì xảy ra
+- crash loop: instance chết ngay sau mỗi lần start thì bị dừng hẳn sau max_restarts lần
+
+Chạy:
+    python -m benchmarks.bench_supervisor
+    python -m benchmarks.bench_supervisor --instances 20 --kill 5 --idle 10
+"""
+import argparse
+import os
+import random
+import signal
+import statistics
+import sys
+import tempfile
+import time
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+
+
+def configure(directory: str, args):
+    os.environ.update({
+        'FAKE_LDCONSOLE_STATE': os.path.join(directory, 'ldconsole.json'),
+        'FAKE_LDCONSOLE_CALLS': os.path.join(directory, 'calls.log'),
+        'FAKE_LDCONSOLE_PROCESSES': '1',
+    })
+    from config.settings import settings
+    settings.config['logging']['level'] = 'WARNING'
+    settings.config.setdefault('state', {})['path'] = os.path.join(directory, 'instances.json')
+    settings.config['admission'] = {'enabled': False}
+    settings.config['supervisor'] = {'max_restarts': args.max_restarts, 'window': 60,
+                                     'backoff_base': args.backoff, 'backoff_max': 5.0}
+
+
+def spawned(directory: str) -> int:
+    with open(os.path.join(directory, 'calls.log')) as f:
+        return sum(1 for _ in f)
+
+
+def close(manager):
+    manager.supervisor.stop()
+    manager.store.close()
+    manager.installer.store.close()
+    manager.executor.shutdown()
+
+
+def wait_for(predicate, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def kill(pid: int):
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process supervisor: reconcile, crash recovery, idle cost')
+    parser.add_argument('--instances', type=int, default=10)
+    parser.add_argument('--kill', type=int, default=3, help='Players to kill in the recovery phase')
+    parser.add_argument('--idle', type=float, default=5.0, help='Seconds to measure idle cost')
+    parser.add_argument('--backoff', type=float, default=0.5, help='First restart delay (seconds)')
+    parser.add_argument('--max-restarts', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, args)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            from core.ld_manager import LDPlayerManager
+            names = [f"instance_{i}" for i in range(args.instances)]
+            manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+            for name in names:
+                manager.create_instance(name)
+            manager.start_many(names)
+            manager.status.refresh()
+            pids = [manager.devices.get(name).pid for name in names]
+            close(manager)
+
+            # Máy "khởi động lại": mọi player chết, state vẫn ghi running
+            for pid in pids:
+                kill(pid)
+            time.sleep(0.2)
+            started = time.perf_counter()
+            manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+            loaded = time.perf_counter() - started
+            stale = sum(1 for name in names if manager.devices.get(name).status == 'running')
+            print(f"startup: {args.instances} saved as running, all dead -> {stale} still running after "
+                  f"load_state ({loaded * 1000:.0f} ms, 0 ldconsole calls)")
+
+            manager.start_many(names)
+            before = spawned(directory)
+            started = time.perf_counter()
+            manager.supervisor.start()
+            print(f"reconcile: {(time.perf_counter() - started) * 1000:.0f} ms, "
+                  f"{spawned(directory) - before} ldconsole call(s), "
+                  f"{len(manager.supervisor.summary()['tracked'])} players tracked")
+
+            # Khôi phục sau crash
+            victims = random.sample(names, min(args.kill, len(names)))
+            old = {name: manager.devices.get(name).pid for name in victims}
+            detected, recovered = [], []
+            for name in victims:
+                start = time.perf_counter()
+                kill(old[name])
+                if wait_for(lambda: manager.devices.get(name).status != 'running', 10):
+                    detected.append(time.perf_counter() - start)
+                if wait_for(lambda: manager.supervisor.summary()['tracked'].get(name) not in (None, old[name]), 30):
+                    recovered.append(time.perf_counter() - start)
+            print(f"recovery: {len(recovered)}/{len(victims)} restarted, detect p50 "
+                  f"{statistics.median(detected) * 1000:.0f} ms, running again p50 "
+                  f"{statistics.median(recovered):.2f}s (first backoff {args.backoff}s)")
+
+            # Chi phí khi không có gì xảy ra
+            process = psutil.Process()
+            before, cpu_before = spawned(directory), process.cpu_times()
+            time.sleep(args.idle)
+            cpu_after = process.cpu_times()
+            cpu = (cpu_after.user + cpu_after.system - cpu_before.user - cpu_before.system) / args.idle * 100
+            print(f"idle: {cpu:.2f}% CPU, {spawned(directory) - before} ldconsole calls in {args.idle:.0f}s "
+                  f"watching {args.instances} players (isrunning polling = {args.instances} spawns per sweep)")
+
+            # Crash loop
+            name = names[0]
+            kills = 0
+            while kills <= args.max_restarts + 1:
+                pid = manager.supervisor.summary()['tracked'].get(name)
+                if pid is None:
+                    if manager.devices.get(name).status == 'crashed':
+                        break
+                    time.sleep(0.05)
+                    continue
+                kill(pid)
+                kills += 1
+                wait_for(lambda: manager.supervisor.summary()['tracked'].get(name) != pid, 30)
+            status = manager.devices.get(name).status
+            print(f"crash loop: killed {kills} times -> status {status!r} "
+                  f"(max_restarts {args.max_restarts})")
+
+            manager.stop_many(names)
+            close(manager)
+        finally:
+            os.chdir(cwd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
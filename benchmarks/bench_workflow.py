@@ -0,0 +1,119 @@
+"""
+Bring-up cả fleet (create -> start -> wait_ready -> install -> run) trên ldconsole giả có độ trễ lệch nhau:
+chạy theo pha có barrier (cách cũ của Automation) so với WorkflowEngine chạy pipeline từng instance.
+Pipeline tốt thì tổng thời gian gần bằng instance chậm nhất chạy một mình.
+
+Chạy:
+    python -m benchmarks.bench_workflow
+    python -m benchmarks.bench_workflow --size 40 --boot 2 --jitter 1.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+PACKAGE = 'com.example.app'
+
+
+def configure(directory: str, args):
+    os.environ.update({
+        'FAKE_LDCONSOLE_STATE': os.path.join(directory, 'ldconsole.json'),
+        'FAKE_LDCONSOLE_LATENCY': f"create={args.latency},launch={args.latency},"
+                                  f"install={args.latency * 2},default=0.01",
+        'FAKE_LDCONSOLE_BOOT': str(args.boot),
+        'FAKE_LDCONSOLE_JITTER': str(args.jitter),
+        'FAKE_LDCONSOLE_PROCESSES': '0',
+    })
+    from config.settings import settings
+    settings.config['instances']['max_count'] = args.size
+    settings.config['admission'] = {'enabled': False}
+    settings.config['logging']['level'] = 'WARNING'
+    settings.config.setdefault('state', {})['path'] = os.path.join(directory, 'instances.json')
+    settings.config.setdefault('executor', {})['max_workers'] = args.workers
+
+
+def phased(manager, names, apk_path) -> float:
+    """Mỗi pha phải xong trên mọi instance rồi pha sau mới bắt đầu"""
+    start = time.perf_counter()
+    created = [name for name, result in manager.executor.map(manager.create_instance, names).items()
+               if result.ok]
+    started = [name for name, result in manager.start_many(created).items() if result.ok]
+    ready = asyncio.run(manager.wait_until_ready_many(started))
+    ready = [name for name, ok in ready.items() if ok]
+    installed = [name for name, result in manager.installer.deploy(apk_path, ready).items() if result.ok]
+    ran = [name for name, result in manager.run_app_many(installed, PACKAGE).items() if result.ok]
+    elapsed = time.perf_counter() - start
+    if len(ran) != len(names):
+        print(f"  phased: {len(names) - len(ran)} instances failed")
+    return elapsed
+
+
+def pipelined(manager, names, apk_path, workers: int):
+    from core.workflow import Stage, Workflow
+    workflow = Workflow('bench', [
+        Stage('create', 'create', concurrency=workers),
+        Stage('start', 'start', concurrency=workers),
+        Stage('wait_ready', 'wait_ready', concurrency=len(names)),
+        Stage('install', 'install', concurrency=workers),
+        Stage('run_app', 'run_app', concurrency=workers),
+    ])
+    report = manager.workflows.run(workflow, names, {'apk_path': apk_path, 'package': PACKAGE})
+    if report.failed:
+        print(f"  pipelined: {len(report.failed)} instances failed: {report.failed}")
+    return report
+
+
+def run(mode: str, args):
+    from local_fleet import build_apk
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory, args)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            from core.ld_manager import LDPlayerManager
+            manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+            apk_path = os.path.join(directory, 'app.apk')
+            build_apk(apk_path, PACKAGE)
+            names = [f"{mode}_{i}" for i in range(args.size)]
+            try:
+                if mode == 'phased':
+                    return phased(manager, names, apk_path), None
+                report = pipelined(manager, names, apk_path, args.workers)
+                return report.elapsed, report
+            finally:
+                manager.stop_many(list(manager.devices))
+                manager.store.close()
+                manager.installer.store.close()
+                manager.executor.shutdown()
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Phased vs pipelined fleet bring-up on the fake ldconsole')
+    parser.add_argument('--size', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.2, help='Base latency of create/launch (install x2)')
+    parser.add_argument('--boot', type=float, default=1.0, help='Base boot time in seconds')
+    parser.add_argument('--jitter', type=float, default=2.0, help='Per-command slowdown up to (1 + jitter)x')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    phased_s, _ = run('phased', args)
+    pipelined_s, report = run('pipelined', args)
+    print(f"{'instances':>9}{'phased s':>12}{'pipelined s':>14}{'slowest s':>12}{'speedup':>10}")
+    print(f"{args.size:>9}{phased_s:>12.2f}{pipelined_s:>14.2f}{report.slowest_instance:>12.2f}"
+          f"{phased_s / pipelined_s:>9.2f}x")
+    for step, timing in report.step_timings().items():
+        print(f"  {step:<11} avg {timing['avg']:.2f}s  max {timing['max']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
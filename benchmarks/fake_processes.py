@@ -0,0 +1,72 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import List
+
+_MemInfo = namedtuple('pmem', ['rss', 'vms'])
+_CpuTimes = namedtuple('pcputimes', ['user', 'system'])
+
+
+class FakeProcess:
+    """Process giả lập đủ API psutil mà ProcessSnapshot sử dụng"""
+
+    def __init__(self, pid: int, ppid: int, name: str, cmdline: List[str],
+                 rss: int = 64 * 1024 * 1024, threads: int = 8, cpu_time: float = 1.0):
+        self.pid = pid
+        self.info = {'pid': pid, 'ppid': ppid, 'name': name}
+        self._cmdline = cmdline
+        self._rss = rss
+        self._threads = threads
+        self._cpu_time = cpu_time
+        self._children: List['FakeProcess'] = []
+        self.cmdline_calls = 0
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def cmdline(self):
+        self.cmdline_calls += 1
+        return self._cmdline
+
+    def memory_info(self):
+        return _MemInfo(self._rss, self._rss * 2)
+
+    def num_threads(self):
+        return self._threads
+
+    def cpu_times(self):
+        # Mỗi lần đọc coi như process đã chạy thêm 10ms CPU
+        self._cpu_time += 0.01
+        return _CpuTimes(self._cpu_time * 0.7, self._cpu_time * 0.3)
+
+    def children(self, recursive=False):
+        result = list(self._children)
+        if recursive:
+            for child in self._children:
+                result.extend(child.children(recursive=True))
+        return result
+
+
+class FakeProcessTable:
+    """Bảng process giả: mỗi instance có một dnplayer và vài process con"""
+
+    def __init__(self, instances: int, children_per_instance: int = 4, noise: int = 300):
+        self.processes: List[FakeProcess] = []
+        self.names = [f"instance_{i}" for i in range(instances)]
+        pid = 1000
+        for i in range(noise):
+            self.processes.append(FakeProcess(pid, 1, f"svc{i}.exe", [f"svc{i}.exe"]))
+            pid += 1
+        for name in self.names:
+            root = FakeProcess(pid, 1, "dnplayer.exe", ["dnplayer.exe", f"--name={name}"])
+            self.processes.append(root)
+            pid += 1
+            for _ in range(children_per_instance):
+                child = FakeProcess(pid, root.pid, "LdVBoxHeadless.exe",
+                                    ["LdVBoxHeadless.exe", "--comment", "leidian"])
+                root._children.append(child)
+                self.processes.append(child)
+                pid += 1
+
+    def process_iter(self, attrs=None):
+        return iter(self.processes)
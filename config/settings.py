@@ -4,15 +4,23 @@ import os
 class Settings:
     def __init__(self):
         self.config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-        self.load_config()
+        self._config = None
 
     def load_config(self):
         with open(self.config_path, 'r') as f:
-            self.config = json.load(f)
+            self._config = json.load(f)
+
+    @property
+    def config(self):
+        # Chỉ đọc file khi cần tới, import module không tốn I/O
+        if self._config is None:
+            self.load_config()
+        return self._config
 
     @property
     def ldplayer_path(self):
-        return self.config['ldplayer']['path']
+        # LDCONSOLE_PATH cho phép trỏ tới ldconsole khác (vd. scripts/fake_ldconsole.py trên CI)
+        return os.environ.get('LDCONSOLE_PATH') or self.config['ldplayer']['path']
 
     @property
     def default_properties(self):
@@ -20,6 +28,177 @@ class Settings:
 
     @property
     def max_instances(self):
-        return self.config['instances']['max_count']
+        # Giới hạn cứng tùy chọn; null = để AdmissionController quyết định theo tài nguyên máy
+        return self.config['instances'].get('max_count')
+
+    @property
+    def monitor_interval(self):
+        return self.config.get('monitor', {}).get('interval', 1.0)
+
+    @property
+    def status_ttl(self):
+        return self.config.get('monitor', {}).get('status_ttl', 1.0)
+
+    @property
+    def command_cache_enabled(self):
+        return self.config.get('command_cache', {}).get('enabled', True)
+
+    @property
+    def command_cache_ttl(self):
+        return self.config.get('command_cache', {}).get('ttl', 1.0)
+
+    @property
+    def boot_timeout(self):
+        return self.config['instances'].get('boot_timeout', 120)
+
+    @property
+    def executor_max_workers(self):
+        return self.config.get('executor', {}).get('max_workers', 8)
+
+    @property
+    def command_timeout(self):
+        return self.config.get('executor', {}).get('command_timeout', 120)
+
+    @property
+    def state_path(self):
+        return self.config.get('state', {}).get('path', 'data/instances.json')
+
+    def state_file(self, file_name: str) -> str:
+        """File state khác (app đã cài, template) nằm cùng thư mục với state instance"""
+        return os.path.join(os.path.dirname(self.state_path), file_name)
+
+    @property
+    def state_flush_interval(self):
+        return self.config.get('state', {}).get('flush_interval', 1.0)
+
+    @property
+    def state_compact_every(self):
+        return self.config.get('state', {}).get('compact_every', 1000)
+
+    @property
+    def install_retries(self):
+        return self.config.get('install', {}).get('retries', 2)
+
+    @property
+    def install_retry_delay(self):
+        return self.config.get('install', {}).get('retry_delay', 2.0)
+
+    @property
+    def template_copy_concurrency(self):
+        return self.config.get('templates', {}).get('copy_concurrency', 2)
+
+    @property
+    def alert_rules(self):
+        return self.config.get('alerts', {}).get('rules', [])
+
+    @property
+    def metrics_enabled(self):
+        return self.config.get('telemetry', {}).get('enabled', True)
+
+    @property
+    def metrics_host(self):
+        return self.config.get('telemetry', {}).get('host', '127.0.0.1')
+
+    @property
+    def metrics_port(self):
+        return self.config.get('telemetry', {}).get('port', 9464)
+
+    @property
+    def adb_path(self):
+        # Mặc định dùng adb.exe đi kèm LDPlayer, cùng thư mục với ldconsole
+        return os.environ.get('ADB_PATH') or self.config.get('adb', {}).get('path')
+
+    @property
+    def adb_idle_timeout(self):
+        return self.config.get('adb', {}).get('idle_timeout', 120)
+
+    @property
+    def adb_command_timeout(self):
+        return self.config.get('adb', {}).get('command_timeout', 30)
+
+    @property
+    def workflows(self):
+        return self.config.get('workflows', {})
+
+    @property
+    def agent_host(self):
+        return self.config.get('fleet', {}).get('agent_host', '127.0.0.1')
+
+    @property
+    def agent_port(self):
+        return self.config.get('fleet', {}).get('agent_port', 9470)
+
+    @property
+    def agent_max_upload_mb(self):
+        return self.config.get('fleet', {}).get('max_upload_mb', 512)
+
+    @property
+    def fleet_token(self):
+        # FLEET_TOKEN để không phải ghi token vào config.json
+        return os.environ.get('FLEET_TOKEN') or self.config.get('fleet', {}).get('token')
+
+    @property
+    def fleet_agents(self):
+        return self.config.get('fleet', {}).get('agents', [])
+
+    @property
+    def admission_enabled(self):
+        return self.config.get('admission', {}).get('enabled', True)
+
+    @property
+    def admission_memory_reserve_mb(self):
+        return self.config.get('admission', {}).get('memory_reserve_mb', 1024)
+
+    @property
+    def admission_max_cpu_percent(self):
+        return self.config.get('admission', {}).get('max_cpu_percent', 85)
+
+    @property
+    def admission_max_concurrent_boots(self):
+        return self.config.get('admission', {}).get('max_concurrent_boots', 4)
+
+    @property
+    def admission_queue_timeout(self):
+        return self.config.get('admission', {}).get('queue_timeout', 600)
+
+    @property
+    def admission_instance_overhead_mb(self):
+        return self.config.get('admission', {}).get('instance_overhead_mb', 512)
+
+    @property
+    def admission_default_cpu_percent(self):
+        return self.config.get('admission', {}).get('default_cpu_percent', 50)
+
+    @property
+    def admission_create_overcommit(self):
+        return self.config.get('admission', {}).get('create_overcommit', 2.0)
+
+    @property
+    def admission_smoothing(self):
+        return self.config.get('admission', {}).get('smoothing', 0.2)
+
+    @property
+    def supervisor_enabled(self):
+        return self.config.get('supervisor', {}).get('enabled', True)
+
+    @property
+    def supervisor_restart(self):
+        return self.config.get('supervisor', {}).get('restart', True)
+
+    @property
+    def supervisor_max_restarts(self):
+        return self.config.get('supervisor', {}).get('max_restarts', 5)
+
+    @property
+    def supervisor_window(self):
+        return self.config.get('supervisor', {}).get('window', 600)
+
+    @property
+    def supervisor_backoff_base(self):
+        return self.config.get('supervisor', {}).get('backoff_base', 1.0)
+
+    @property
+    def supervisor_backoff_max(self):
+        return self.config.get('supervisor', {}).get('backoff_max', 60.0)
 
 settings = Settings()
\ No newline at end of file
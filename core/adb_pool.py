@@ -0,0 +1,268 @@
+import itertools
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from .exceptions import CommandTimeout, ShellError, ShellUnavailable
+from .telemetry import Telemetry
+from utils.logger import logger
+
+
+@dataclass
+class ShellResult:
+    output: str
+    exit_code: int
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+
+class ShellSession:
+    """
+    Một process `adb -s <serial> shell` sống lâu. Lệnh được ghi vào stdin kèm một dòng đánh dấu
+    chứa id của request và exit code; thread đọc ghép output theo đúng thứ tự nên nhiều
+    thread có thể gửi lệnh cùng lúc (pipeline) trên cùng một session
+    """
+
+    def __init__(self, name: str, argv: List[str], connect_timeout: float = 10.0):
+        self.name = name
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.commands = 0
+        self._token = os.urandom(4).hex()
+        self._marker = re.compile(rf'^__LDM_{self._token}_(\d+)__ (-?\d+)$')
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending: Deque[Tuple[int, Future]] = deque()
+        self._closed = False
+        try:
+            self.process = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT)
+        except OSError as e:
+            raise ShellError(f"Cannot start adb shell for {name}: {e}")
+        self._reader = threading.Thread(target=self._read, name=f'adb-{name}', daemon=True)
+        self._reader.start()
+        # adb báo lỗi (device not found, offline) rồi thoát ngay, lệnh rỗng này sẽ thất bại theo
+        try:
+            self.execute('true', connect_timeout)
+        except ShellError:
+            self.close()
+            raise
+
+    @property
+    def alive(self) -> bool:
+        return not self._closed and self.process.poll() is None
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, command: str) -> Future:
+        """
+        Gửi lệnh mà không chờ kết quả
+        Returns:
+            Future trả về (exit_code, output), lỗi ShellError nếu session đóng trước khi lệnh xong
+        Raises:
+            ShellUnavailable: Session đã đóng, lệnh chưa được gửi
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise ShellUnavailable(f"Shell session for {self.name} is closed")
+            request_id = next(self._ids)
+            # stdin của lệnh là /dev/null để lệnh không đọc mất các lệnh phía sau trong session
+            frame = (f"{{ {command}\n}} </dev/null 2>&1\n"
+                     f"printf '\\n__LDM_{self._token}_{request_id}__ %d\\n' $?\n")
+            self._pending.append((request_id, future))
+            try:
+                self.process.stdin.write(frame.encode())
+                self.process.stdin.flush()
+            except (OSError, ValueError) as e:
+                self._pending.pop()
+                self._closed = True
+                raise ShellUnavailable(f"Shell session for {self.name} is broken: {e}")
+            self.commands += 1
+            self.last_used = time.monotonic()
+        return future
+
+    def execute(self, command: str, timeout: float) -> ShellResult:
+        started = time.perf_counter()
+        future = self.submit(command)
+        try:
+            exit_code, output = future.result(timeout)
+        except FutureTimeout:
+            # Không biết lệnh còn chạy tới đâu nên bỏ cả session, lần sau mở session mới
+            self.close()
+            raise CommandTimeout(f"Shell command timed out after {timeout}s on {self.name}: {command}")
+        self.last_used = time.monotonic()
+        return ShellResult(output, exit_code, time.perf_counter() - started)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        try:
+            self.process.stdin.close()
+        except (OSError, ValueError):
+            pass
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def _read(self):
+        lines: List[str] = []
+        for raw in iter(self.process.stdout.readline, b''):
+            line = raw.decode('utf-8', 'replace')
+            match = self._marker.match(line.rstrip('\r\n'))
+            if match is None:
+                lines.append(line)
+                continue
+            # printf thêm một '\n' trước dòng đánh dấu; bỏ newline cuối như executor.run strip stdout
+            output = ''.join(lines).rstrip('\r\n')
+            lines = []
+            self._complete(int(match.group(1)), int(match.group(2)), output)
+
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending)
+            self._pending.clear()
+        output = ''.join(lines).strip()
+        for _, future in pending:
+            future.set_exception(ShellError(
+                f"Shell session for {self.name} closed" + (f": {output}" if output else '')))
+        self.process.stdout.close()
+
+    def _complete(self, request_id: int, exit_code: int, output: str):
+        with self._lock:
+            while self._pending:
+                pending_id, future = self._pending.popleft()
+                if pending_id == request_id:
+                    future.set_result((exit_code, output))
+                    return
+                future.set_exception(ShellError(f"Lost response for request {pending_id} on {self.name}"))
+
+
+class ShellPool:
+    """
+    Giữ một shell session cho mỗi instance đang chạy để các lệnh nhỏ (am start, input, pm)
+    không phải spawn process và bắt tay adb mỗi lần. Session lỗi được mở lại,
+    session không dùng quá idle_timeout bị đóng bởi thread dọn dẹp
+    """
+
+    def __init__(self, argv_for: Callable[[str], List[str]], idle_timeout: float = 120.0,
+                 command_timeout: float = 30.0, connect_timeout: float = 10.0,
+                 telemetry: Optional[Telemetry] = None):
+        self.argv_for = argv_for
+        self.idle_timeout = idle_timeout
+        self.command_timeout = command_timeout
+        self.connect_timeout = connect_timeout
+        self.telemetry = telemetry or Telemetry()
+        self._sessions: Dict[str, ShellSession] = {}
+        self._connecting: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.telemetry.describe('adb_shell_seconds', 'adb shell command latency over pooled sessions')
+        self.telemetry.describe('adb_sessions_total', 'adb shell sessions by event')
+        self.telemetry.describe('adb_sessions_open', 'Open adb shell sessions')
+        self.telemetry.gauge('adb_sessions_open', lambda: len(self._sessions))
+
+    def session(self, name: str) -> ShellSession:
+        """Session đang mở của instance, hoặc mở mới (mỗi instance chỉ một lần kết nối cùng lúc)"""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is not None and session.alive:
+                return session
+            connecting = self._connecting.setdefault(name, threading.Lock())
+
+        with connecting:
+            with self._lock:
+                current = self._sessions.get(name)
+                if current is not None and current.alive:
+                    return current
+            reconnect = current is not None
+            if reconnect:
+                current.close()
+            session = ShellSession(name, self.argv_for(name), self.connect_timeout)
+            with self._lock:
+                self._sessions[name] = session
+            self.telemetry.inc('adb_sessions_total', {'event': 'reconnect' if reconnect else 'connect'})
+            self._ensure_janitor()
+            return session
+
+    def execute(self, name: str, command: str, timeout: Optional[float] = None) -> ShellResult:
+        """
+        Chạy một lệnh shell trên instance qua session dùng chung
+        Session đã đứt trước khi gửi được lệnh thì được mở lại và lệnh được gửi lại một lần;
+        lệnh đã gửi mà session đứt giữa chừng thì không gửi lại vì có thể đã chạy một phần
+        """
+        timeout = timeout if timeout is not None else self.command_timeout
+        for attempt in range(2):
+            session = self.session(name)
+            try:
+                result = session.execute(command, timeout)
+                self.telemetry.observe('adb_shell_seconds', result.duration)
+                return result
+            except ShellUnavailable as e:
+                if attempt:
+                    raise
+                logger.warning(f"adb shell session for {name} lost, reconnecting: {e}", extra={'instance': name})
+
+    def submit(self, name: str, command: str) -> Future:
+        """Gửi lệnh không chờ; nhiều lệnh gửi liên tiếp chạy nối đuôi trên cùng session"""
+        return self.session(name).submit(command)
+
+    def close(self, name: Optional[str] = None):
+        """Đóng session của một instance (vd. khi instance dừng), hoặc tất cả"""
+        with self._lock:
+            names = list(self._sessions) if name is None else [name]
+            sessions = [self._sessions.pop(n) for n in names if n in self._sessions]
+            if name is None:
+                self._stop.set()
+        for session in sessions:
+            session.close()
+            self.telemetry.inc('adb_sessions_total', {'event': 'close'})
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """Đóng các session không dùng quá idle_timeout hoặc đã chết"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            evicted = [name for name, session in self._sessions.items()
+                       if not session.alive or
+                       (session.in_flight == 0 and now - session.last_used > self.idle_timeout)]
+            sessions = [self._sessions.pop(name) for name in evicted]
+        for session in sessions:
+            session.close()
+            self.telemetry.inc('adb_sessions_total', {'event': 'evict'})
+        if evicted:
+            logger.debug(f"Evicted idle adb sessions: {', '.join(evicted)}")
+        return evicted
+
+    def _ensure_janitor(self):
+        with self._lock:
+            if self._janitor is not None and self._janitor.is_alive():
+                return
+            self._stop.clear()
+            self._janitor = threading.Thread(target=self._run_janitor, name='adb-janitor', daemon=True)
+            self._janitor.start()
+
+    def _run_janitor(self):
+        interval = max(1.0, min(self.idle_timeout / 4, 30.0))
+        while not self._stop.wait(interval):
+            self.evict_idle()
+            with self._lock:
+                if not self._sessions:
+                    self._janitor = None
+                    return
@@ -0,0 +1,353 @@
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+import psutil
+from .exceptions import InstanceError
+from .process_snapshot import ProcessSnapshot
+from .status_provider import InstanceStatus
+from .telemetry import Telemetry
+from utils.logger import logger
+
+ADMIT = 'admit'
+QUEUE = 'queue'
+REJECT = 'reject'
+
+MB = 1024 * 1024
+
+
+@dataclass
+class Footprint:
+    cpu: float     # % của một core, cộng trên cả cây process (như ProcessSnapshot.resources)
+    memory: float  # MB
+
+
+@dataclass
+class HostStats:
+    memory_total: float      # MB
+    memory_available: float  # MB
+    cpu_percent: float       # % toàn máy, 0..100
+    cpu_count: int
+
+
+@dataclass
+class Decision:
+    action: str
+    reason: str
+    detail: str = ''
+
+
+class HostProbe:
+    """
+    RAM và CPU của máy qua psutil. CPU% tính từ chênh lệch cpu_times giữa hai lần đọc
+    (không dùng psutil.cpu_percent() vì lời gọi ở chỗ khác, vd. agent, làm lệch cửa sổ đo)
+    """
+
+    def __init__(self, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._previous = psutil.cpu_times()
+        self._previous_at = time.monotonic()
+        self._cpu_percent = 0.0
+
+    def __call__(self) -> HostStats:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._previous_at >= self.min_interval:
+                times = psutil.cpu_times()
+                total = sum(times) - sum(self._previous)
+                idle = (times.idle + getattr(times, 'iowait', 0)) - \
+                       (self._previous.idle + getattr(self._previous, 'iowait', 0))
+                if total > 0:
+                    self._cpu_percent = max(0.0, min(100.0, (total - idle) / total * 100))
+                self._previous, self._previous_at = times, now
+            cpu_percent = self._cpu_percent
+        mem = psutil.virtual_memory()
+        return HostStats(mem.total / MB, mem.available / MB, cpu_percent, psutil.cpu_count() or 1)
+
+
+class AdmissionController:
+    """
+    Quyết định cho tạo/start instance theo tài nguyên thật của máy thay cho một con số cố định:
+    - footprint (CPU, RSS) của từng instance được học từ các mẫu của CpuSampler sau khi boot xong;
+      instance chưa từng chạy dùng trung vị của các instance đã học, hoặc RAM cấu hình + overhead
+    - start chỉ được cho qua khi RAM trống (trừ phần dự trữ và phần các instance đang boot còn thiếu)
+      và CPU còn đủ; không thì xếp hàng FIFO tới khi đủ, instance không bao giờ vừa máy thì bị từ chối
+    - số instance boot cùng lúc (một đợt) co lại theo tải CPU hiện tại, tối đa max_concurrent_boots
+    """
+
+    def __init__(self, properties_for: Callable[[str], Dict], host: Optional[Callable[[], HostStats]] = None,
+                 enabled: bool = True, max_instances: Optional[int] = None, memory_reserve_mb: float = 1024,
+                 max_cpu_percent: float = 85, max_concurrent_boots: int = 4, boot_timeout: float = 120,
+                 queue_timeout: float = 600, instance_overhead_mb: float = 512, default_cpu_percent: float = 50,
+                 create_overcommit: Optional[float] = 2.0, smoothing: float = 0.2, margin: float = 1.1,
+                 telemetry: Optional[Telemetry] = None):
+        self.properties_for = properties_for
+        self.host = host or HostProbe()
+        self.enabled = enabled
+        self.max_instances = max_instances
+        self.memory_reserve_mb = memory_reserve_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.max_concurrent_boots = max_concurrent_boots
+        self.boot_timeout = boot_timeout
+        self.queue_timeout = queue_timeout
+        self.instance_overhead_mb = instance_overhead_mb
+        self.default_cpu_percent = default_cpu_percent
+        self.create_overcommit = create_overcommit
+        self.smoothing = smoothing
+        self.margin = margin
+        self.telemetry = telemetry or Telemetry()
+        self._cond = threading.Condition()
+        # Footprint đã học (EWMA) của instance chạy ổn định
+        self._learned: Dict[str, Footprint] = {}
+        # Tài nguyên đo được ở mẫu gần nhất, kể cả instance đang boot
+        self._observed: Dict[str, Footprint] = {}
+        # Instance đã được cho start và chưa boot xong -> thời điểm được cho qua
+        self._booting: Dict[str, float] = {}
+        self._queue: List[str] = []
+
+        self.telemetry.describe('admission_decisions_total', 'Start/create admission decisions by action and reason')
+        self.telemetry.describe('admission_wait_seconds', 'Time a start request waited in the admission queue')
+        self.telemetry.describe('admission_booting', 'Instances admitted and still booting')
+        self.telemetry.describe('admission_queued', 'Start requests waiting for host resources')
+        self.telemetry.gauge('admission_booting', lambda: len(self._booting))
+        self.telemetry.gauge('admission_queued', lambda: len(self._queue))
+
+    def observe(self, snapshot: ProcessSnapshot):
+        """Listener của CpuSampler: cập nhật footprint của các instance đã boot xong"""
+        observed = {}
+        for name in snapshot.trees:
+            resources = snapshot.resources(name)
+            if resources:
+                observed[name] = Footprint(resources['cpu'], resources['memory'])
+        alpha = self.smoothing
+        with self._cond:
+            self._observed = observed
+            for name, sample in observed.items():
+                if name in self._booting:
+                    continue
+                previous = self._learned.get(name)
+                if previous is None:
+                    self._learned[name] = sample
+                else:
+                    self._learned[name] = Footprint(
+                        previous.cpu + alpha * (sample.cpu - previous.cpu),
+                        previous.memory + alpha * (sample.memory - previous.memory))
+            # Tài nguyên được giải phóng có thể đủ cho request đang chờ
+            self._cond.notify_all()
+
+    def on_status(self, statuses: Dict[str, InstanceStatus]):
+        """Listener của StatusProvider: instance boot xong (hoặc đã dừng) thì trả slot boot"""
+        now = time.monotonic()
+        with self._cond:
+            done = []
+            for name, admitted_at in self._booting.items():
+                status = statuses.get(name)
+                if status is not None and status.android_started:
+                    done.append(name)
+                elif (status is None or not status.running) and now - admitted_at > 5:
+                    # Launch đã lâu mà process không còn: boot hỏng, không giữ slot
+                    done.append(name)
+            for name in done:
+                del self._booting[name]
+            if done:
+                self._cond.notify_all()
+
+    def forget(self, name: str):
+        """Bỏ footprint đã học khi instance bị xóa"""
+        with self._cond:
+            self._learned.pop(name, None)
+            self._observed.pop(name, None)
+
+    def estimate(self, name: Optional[str] = None, properties: Optional[Dict] = None) -> Footprint:
+        """
+        Footprint dự kiến của instance
+        Args:
+            name: Instance đã có (dùng footprint đã học nếu có)
+            properties: Thuộc tính của instance chưa tạo
+        """
+        with self._cond:
+            return self._estimate(name, properties)
+
+    def _estimate(self, name: Optional[str], properties: Optional[Dict]) -> Footprint:
+        learned = self._learned.get(name) if name else None
+        if learned is None and self._learned:
+            values = list(self._learned.values())
+            learned = Footprint(statistics.median(v.cpu for v in values),
+                                statistics.median(v.memory for v in values))
+        if learned is not None:
+            return Footprint(learned.cpu * self.margin, learned.memory * self.margin)
+        if properties is None and name:
+            properties = self.properties_for(name)
+        memory = float((properties or {}).get('memory', 0) or 0)
+        return Footprint(self.default_cpu_percent, memory + self.instance_overhead_mb)
+
+    def evaluate(self, name: str) -> Decision:
+        """Quyết định cho một lần start, không thay đổi trạng thái"""
+        with self._cond:
+            return self._evaluate(name, self.host())
+
+    def _evaluate(self, name: str, host: HostStats) -> Decision:
+        need = self._estimate(name, None)
+        usable = host.memory_total - self.memory_reserve_mb
+        if need.memory > usable:
+            return Decision(REJECT, 'too_large',
+                            f"needs ~{need.memory:.0f} MB, host has {usable:.0f} MB usable")
+
+        now = time.monotonic()
+        for booting, admitted_at in list(self._booting.items()):
+            if now - admitted_at > self.boot_timeout:
+                logger.warning(f"{booting} still booting after {self.boot_timeout}s, releasing its boot slot",
+                               extra={'instance': booting})
+                del self._booting[booting]
+
+        cpu_headroom = max(0.0, self.max_cpu_percent - host.cpu_percent)
+        wave = max(1, round(self.max_concurrent_boots * cpu_headroom / self.max_cpu_percent))
+        if len(self._booting) >= wave:
+            return Decision(QUEUE, 'wave', f"{len(self._booting)} booting, wave size {wave} "
+                                           f"at {host.cpu_percent:.0f}% CPU")
+
+        # Instance đang boot chưa dùng hết RAM dự kiến, phần còn thiếu được giữ chỗ
+        pending = 0.0
+        for booting in self._booting:
+            observed = self._observed.get(booting)
+            pending += max(0.0, self._estimate(booting, None).memory - (observed.memory if observed else 0.0))
+        free = host.memory_available - self.memory_reserve_mb - pending
+        if need.memory > free:
+            return Decision(QUEUE, 'memory', f"needs ~{need.memory:.0f} MB, {max(free, 0):.0f} MB free")
+
+        # cpu_percent của instance tính theo một core, headroom của máy quy về cùng đơn vị
+        if need.cpu > cpu_headroom * host.cpu_count:
+            return Decision(QUEUE, 'cpu', f"needs ~{need.cpu:.0f}% of a core, host at {host.cpu_percent:.0f}%")
+        return Decision(ADMIT, 'fits')
+
+    def acquire(self, name: str, poll: Optional[Callable[[], None]] = None, timeout: Optional[float] = None,
+                interval: float = 1.0) -> Decision:
+        """
+        Chờ tới lượt start instance; trả về khi được cho qua, slot boot được giữ tới khi boot xong
+        Args:
+            poll: Làm mới trạng thái/mẫu tài nguyên trong lúc chờ (gọi ngoài lock)
+            timeout: Thời gian chờ tối đa, mặc định queue_timeout
+        Raises:
+            InstanceError: Bị từ chối hoặc chờ quá lâu
+        """
+        if not self.enabled:
+            return Decision(ADMIT, 'disabled')
+        deadline = time.monotonic() + (timeout if timeout is not None else self.queue_timeout)
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                with self._cond:
+                    if name in self._booting:
+                        return Decision(ADMIT, 'booting')
+                    decision = self._evaluate(name, self.host())
+                    # Xếp hàng FIFO: request tới sau không được vượt request đang chờ
+                    if decision.action == ADMIT and self._queue and self._queue[0] != name:
+                        decision = Decision(QUEUE, 'fifo', f"behind {self._queue[0]}")
+                    if decision.action == ADMIT:
+                        self._booting[name] = time.monotonic()
+                        self._record(decision)
+                        if queued:
+                            self._queue.remove(name)
+                            self._cond.notify_all()
+                            self.telemetry.observe('admission_wait_seconds', time.monotonic() - started)
+                            logger.info(f"Admitted {name} after {time.monotonic() - started:.1f}s",
+                                        extra={'instance': name})
+                        return decision
+                    if decision.action == REJECT:
+                        self._record(decision)
+                        raise InstanceError(f"Cannot start {name}: {decision.detail}")
+                    if not queued:
+                        queued = True
+                        self._queue.append(name)
+                        self._record(decision)
+                        logger.info(f"Queued start of {name}: {decision.detail}", extra={'instance': name})
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._record(Decision(REJECT, 'timeout'))
+                        raise InstanceError(f"Timed out waiting for resources to start {name}: {decision.detail}")
+                    self._cond.wait(min(remaining, interval))
+                if poll is not None:
+                    try:
+                        poll()
+                    except Exception as e:
+                        logger.warning(f"Admission poll failed: {e}")
+        finally:
+            if queued:
+                with self._cond:
+                    if name in self._queue:
+                        self._queue.remove(name)
+                        self._cond.notify_all()
+
+    def release(self, name: str):
+        """Trả slot boot (launch lỗi hoặc instance bị dừng trước khi boot xong)"""
+        with self._cond:
+            if self._booting.pop(name, None) is not None:
+                self._cond.notify_all()
+
+    def check_create(self, existing: Iterable[str], properties: Optional[Dict] = None):
+        """
+        Kiểm tra trước khi tạo instance mới
+        Raises:
+            InstanceError: Vượt max_instances (nếu có cấu hình), instance không bao giờ vừa máy,
+                hoặc tổng RAM dự kiến của mọi instance vượt RAM máy * create_overcommit
+        """
+        existing = list(existing)
+        if self.max_instances is not None and len(existing) >= self.max_instances:
+            self._record(Decision(REJECT, 'limit'))
+            raise InstanceError(f"Maximum number of instances ({self.max_instances}) reached")
+        if not self.enabled:
+            return
+        host = self.host()
+        with self._cond:
+            need = self._estimate(None, properties)
+            usable = host.memory_total - self.memory_reserve_mb
+            if need.memory > usable:
+                self._record(Decision(REJECT, 'too_large'))
+                raise InstanceError(f"Instance needs ~{need.memory:.0f} MB, host has {usable:.0f} MB usable")
+            if self.create_overcommit:
+                projected = need.memory + sum(self._estimate(name, None).memory for name in existing)
+                limit = usable * self.create_overcommit
+                if projected > limit:
+                    self._record(Decision(REJECT, 'overcommit'))
+                    raise InstanceError(f"Host cannot hold another instance: ~{projected:.0f} MB projected, "
+                                        f"limit {limit:.0f} MB")
+        self._record(Decision(ADMIT, 'create'))
+
+    def capacity(self, existing: Iterable[str], running: Iterable[str]) -> int:
+        """
+        Số instance máy này chứa được lúc này: các instance đã có cộng số instance mới
+        còn start được với RAM trống (instance đang dừng được tính là sẽ chạy lại).
+        Admission tắt mà có max_instances thì trả về max_instances
+        """
+        existing, running = list(existing), set(running)
+        if not self.enabled and self.max_instances is not None:
+            return self.max_instances
+        host = self.host()
+        with self._cond:
+            free = host.memory_available - self.memory_reserve_mb
+            for name in existing:
+                if name not in running:
+                    free -= self._estimate(name, None).memory
+            for name in self._booting:
+                observed = self._observed.get(name)
+                free -= max(0.0, self._estimate(name, None).memory - (observed.memory if observed else 0.0))
+            per_instance = self._estimate(None, self.properties_for(None)).memory
+        capacity = len(existing) + max(0, int(free // per_instance)) if per_instance > 0 else len(existing)
+        if self.max_instances is not None:
+            capacity = min(capacity, self.max_instances)
+        return capacity
+
+    def summary(self) -> Dict:
+        with self._cond:
+            return {
+                'booting': sorted(self._booting),
+                'queued': list(self._queue),
+                'learned': {name: {'cpu': round(fp.cpu, 1), 'memory': round(fp.memory, 1)}
+                            for name, fp in self._learned.items()}
+            }
+
+    def _record(self, decision: Decision):
+        self.telemetry.inc('admission_decisions_total', {'action': decision.action, 'reason': decision.reason})
@@ -0,0 +1,263 @@
+import hashlib
+import hmac
+import json
+import os
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import psutil
+from .device import Device
+from .exceptions import LDPlayerError
+from .executor import CommandResult
+from utils.logger import logger
+
+API_VERSION = 1
+# Không có tick mới trong khoảng này thì stream gửi một dòng heartbeat để giữ kết nối
+STREAM_HEARTBEAT = 15.0
+
+
+def result_to_dict(result: CommandResult) -> Dict:
+    value = result.value
+    if isinstance(value, Device):
+        value = value.to_dict()
+    elif value is not None and not isinstance(value, (str, int, float, bool, list, dict)):
+        value = str(value)
+    return {
+        'name': result.name,
+        'ok': result.ok,
+        'value': value,
+        'error': result.error,
+        'duration': result.duration,
+        'cancelled': result.cancelled
+    }
+
+
+class AgentServer:
+    """
+    Agent chạy trên mỗi máy: bọc LDPlayerManager sau API HTTP/JSON để controller điều khiển từ xa
+
+        GET  /v1/info                  tải của máy và số instance
+        GET  /v1/instances             danh sách instance
+        GET  /v1/resources             tài nguyên từng instance
+        GET  /v1/stream                NDJSON, một dòng cho mỗi lượt lấy mẫu
+        POST /v1/batch                 {"action", "names", "args"} -> kết quả theo instance
+        POST /v1/apks                  upload APK (body nhị phân) -> đường dẫn trên máy agent
+        GET  /metrics                  Prometheus
+    """
+
+    def __init__(self, manager, host: str = '127.0.0.1', port: int = 9470,
+                 token: Optional[str] = None, apk_dir: str = 'data/apks', max_upload_mb: float = 512):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.token = token
+        self.apk_dir = apk_dir
+        # Body của POST /v1/apks được đọc cả vào RAM nên phải có giới hạn
+        self.max_upload = int(max_upload_mb * 1024 * 1024)
+        self.hostname = socket.gethostname()
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._tick = threading.Condition()
+        self._tick_seq = 0
+        self._tick_payload: Optional[Dict] = None
+        self._stopping = False
+
+        self._routes: Dict[Tuple[str, str], Callable[[Any], Any]] = {
+            ('GET', '/v1/info'): lambda _: self.info(),
+            ('GET', '/v1/instances'): lambda _: self.instances(),
+            ('GET', '/v1/resources'): lambda _: self.manager.get_all_instances_resources(),
+            ('POST', '/v1/batch'): self.batch,
+            ('POST', '/v1/apks'): self.store_apk,
+        }
+        self._actions: Dict[str, Callable[..., Dict[str, CommandResult]]] = {
+            'create': lambda names, properties=None: self.manager.executor.map(
+                self.manager.create_instance, names, properties),
+            'remove': lambda names: self.manager.executor.map(self.manager.remove_instance, names),
+            'start': self.manager.start_many,
+            'stop': self.manager.stop_many,
+            'install': lambda names, apk_path, force=False: self.manager.installer.deploy(apk_path, names, force),
+            'run_app': self.manager.run_app_many,
+        }
+        manager.sampler.add_listener(self._on_sample)
+
+    def info(self) -> Dict:
+        mem = psutil.virtual_memory()
+        return {
+            'version': API_VERSION,
+            'hostname': self.hostname,
+            'capacity': self._capacity(),
+            'instances': len(self.manager.devices),
+            'running': len(self.manager.running_instances()),
+            # Dùng chung cửa sổ đo của admission: gọi psutil.cpu_percent() ở đây làm lệch số liệu của nó
+            'cpu_percent': self.manager.admission.host().cpu_percent,
+            'memory_percent': mem.percent,
+            'memory_available': mem.available
+        }
+
+    def instances(self) -> List[Dict]:
+        return [device.to_dict() for device in self.manager.devices.values()]
+
+    def batch(self, body: Dict) -> Dict[str, Dict]:
+        action = self._actions.get(body.get('action'))
+        if action is None:
+            raise ValueError(f"Unknown action: {body.get('action')}")
+        names = body.get('names')
+        if names is None:
+            names = list(self.manager.devices)
+        results = action(names, *body.get('args', []))
+        return {name: result_to_dict(result) for name, result in results.items()}
+
+    def store_apk(self, data: bytes) -> Dict:
+        """Lưu APK theo sha256 nên upload lại cùng file chỉ ghi một lần"""
+        sha = hashlib.sha256(data).hexdigest()
+        os.makedirs(self.apk_dir, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.apk_dir, f"{sha}.apk"))
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return {'path': path, 'sha256': sha}
+
+    def _capacity(self) -> int:
+        return self.manager.admission.capacity(self.manager.devices, self.manager.running_instances())
+
+    def _on_sample(self, snapshot):
+        resources = {}
+        for name, device in list(self.manager.devices.items()):
+            values = snapshot.resources(name) or {'cpu': 0, 'memory': 0, 'threads': 0}
+            values['status'] = device.status
+            resources[name] = values
+        with self._tick:
+            self._tick_seq += 1
+            self._tick_payload = {
+                'seq': self._tick_seq,
+                'timestamp': snapshot.timestamp,
+                'hostname': self.hostname,
+                'resources': resources
+            }
+            self._tick.notify_all()
+
+    def next_tick(self, seq: int, timeout: float) -> Optional[Dict]:
+        """Chờ lượt lấy mẫu sau seq; None nếu hết thời gian hoặc agent đang dừng"""
+        with self._tick:
+            self._tick.wait_for(lambda: self._tick_seq > seq or self._stopping, timeout)
+            if self._stopping or self._tick_seq <= seq:
+                return None
+            return self._tick_payload
+
+    def start(self):
+        if self._server is not None:
+            return
+        from http.server import ThreadingHTTPServer
+        self._stopping = False
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.manager.start_monitoring()
+        self._thread = threading.Thread(target=self._server.serve_forever, name='AgentServer', daemon=True)
+        self._thread.start()
+        logger.info(f"Agent listening on http://{self.host}:{self.port}")
+
+    def stop(self):
+        if self._server is None:
+            return
+        with self._tick:
+            self._stopping = True
+            self._tick.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self.manager.stop_monitoring()
+
+
+def _make_handler(agent: AgentServer):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def _dispatch(self, method: str):
+            # So sánh thời gian hằng để không lộ token qua thời gian phản hồi
+            if agent.token and not hmac.compare_digest(self.headers.get('X-Agent-Token', '').encode(),
+                                                       agent.token.encode()):
+                self._send_json(401, {'error': 'invalid token'})
+                return
+            path = self.path.split('?')[0]
+            if method == 'GET' and path == '/v1/stream':
+                self._stream()
+                return
+            if method == 'GET' and path == '/metrics':
+                body = agent.manager.telemetry.render_prometheus().encode()
+                self._send(200, body, 'text/plain; version=0.0.4; charset=utf-8')
+                return
+
+            route = agent._routes.get((method, path))
+            if route is None:
+                self._send_json(404, {'error': f'{method} {path} not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                if length < 0:
+                    raise ValueError(f"Invalid Content-Length: {length}")
+                if path == '/v1/apks' and length > agent.max_upload:
+                    # Không đọc body, đóng kết nối luôn
+                    self.close_connection = True
+                    self._send_json(413, {'error': f'upload of {length} bytes exceeds limit of '
+                                                   f'{agent.max_upload} bytes'})
+                    return
+                raw = self.rfile.read(length) if length else b''
+                if path == '/v1/apks':
+                    payload = raw
+                else:
+                    payload = json.loads(raw) if raw else {}
+                self._send_json(200, route(payload))
+            except (LDPlayerError, ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                logger.error(f"Agent request {method} {path} failed: {e}")
+                self._send_json(500, {'error': str(e)})
+
+        def _stream(self):
+            # Kết nối giữ mở, mỗi dòng là một JSON; đóng khi client ngắt hoặc agent dừng
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            seq = 0
+            try:
+                while True:
+                    payload = agent.next_tick(seq, STREAM_HEARTBEAT)
+                    if payload is None:
+                        if agent._stopping:
+                            return
+                        line = {'heartbeat': True}
+                    else:
+                        seq = payload['seq']
+                        line = payload
+                    self.wfile.write(json.dumps(line).encode() + b'\n')
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+        def _send_json(self, status: int, data):
+            self._send(status, json.dumps(data).encode(), 'application/json')
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,214 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import psutil
+from .metrics_store import METRICS, MetricsStore
+from utils.logger import logger
+
+AGGREGATIONS = ('avg', 'min', 'max', 'last')
+# memory_percent là memory (MB) quy ra % RAM của máy, để ngưỡng % không bị so với MB
+RULE_METRICS = METRICS + ('memory_percent',)
+
+
+@dataclass
+class AlertRule:
+    """
+    Luật cảnh báo khai báo trong config
+    Args:
+        metric: cpu, memory (MB), memory_percent hoặc threads
+        window: Cửa sổ gộp (giây), 0 = mẫu mới nhất
+        aggregation: avg, min, max hoặc last
+        threshold: Ngưỡng kích hoạt
+        hysteresis: Cảnh báo chỉ kết thúc khi giá trị lùi khỏi ngưỡng ít nhất chừng này
+        cooldown: Số giây tối thiểu giữa hai lần kích hoạt cho cùng instance
+        above: True = cảnh báo khi vượt lên trên ngưỡng, False = khi tụt xuống dưới
+        actions: Tên các action được gọi khi kích hoạt/kết thúc
+    """
+    name: str
+    metric: str
+    threshold: float
+    window: float = 0
+    aggregation: str = 'avg'
+    hysteresis: float = 0
+    cooldown: float = 0
+    above: bool = True
+    actions: List[str] = field(default_factory=lambda: ['log'])
+
+    def __post_init__(self):
+        if self.metric not in RULE_METRICS:
+            raise ValueError(f"Unknown metric in rule {self.name}: {self.metric}")
+        if self.aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation in rule {self.name}: {self.aggregation}")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AlertRule':
+        return cls(**data)
+
+
+@dataclass
+class Alert:
+    rule: AlertRule
+    instance: str
+    value: float
+    timestamp: float
+    # 'raised' hoặc 'cleared'
+    state: str = 'raised'
+
+
+class AlertEngine:
+    """
+    Đánh giá mọi luật trên mọi instance trong một lượt NumPy mỗi tick.
+    Trạng thái active/last_raised là ma trận [luật, instance] nên một lần vượt ngưỡng
+    chỉ sinh đúng một cảnh báo cho tới khi giá trị quay về dưới ngưỡng - hysteresis
+    """
+
+    def __init__(self, metrics: MetricsStore, rules: Iterable[AlertRule] = (),
+                 memory_total_mb: Optional[float] = None):
+        self.metrics = metrics
+        self.memory_total_mb = memory_total_mb or psutil.virtual_memory().total / 1024 / 1024
+        self._actions: Dict[str, Callable[[Alert], None]] = {'log': self._log_action}
+        self.set_rules(rules)
+
+    def set_rules(self, rules: Iterable[AlertRule]):
+        self.rules: List[AlertRule] = list(rules)
+        for rule in self.rules:
+            for action in rule.actions:
+                if action not in self._actions:
+                    logger.warning(f"Rule {rule.name} uses unregistered action: {action}")
+        sign = np.array([1.0 if rule.above else -1.0 for rule in self.rules])
+        # So sánh theo hướng "vượt lên": nhân với -1 cho luật "tụt xuống"
+        self._sign = sign[:, None]
+        self._raise_at = (sign * [rule.threshold for rule in self.rules])[:, None]
+        self._clear_at = (sign * [rule.threshold for rule in self.rules]
+                          - [rule.hysteresis for rule in self.rules])[:, None]
+        self._cooldown = np.array([rule.cooldown for rule in self.rules], dtype=float)[:, None]
+        # Các luật dùng chung (metric, window, aggregation) chỉ gộp dữ liệu một lần
+        self._queries: Dict[Tuple[str, float, str], List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            metric = 'memory' if rule.metric == 'memory_percent' else rule.metric
+            self._queries.setdefault((metric, rule.window, rule.aggregation), []).append(i)
+        self._names: List[str] = []
+        self._active = np.zeros((len(self.rules), 0), dtype=bool)
+        self._last_raised = np.full((len(self.rules), 0), -np.inf)
+
+    def register_action(self, name: str, action: Callable[[Alert], None]):
+        """Đăng ký action (vd. callback của GUI, gửi webhook); action chạy trên thread sampler"""
+        self._actions[name] = action
+
+    @property
+    def active(self) -> List[Tuple[str, str]]:
+        """Các cặp (rule, instance) đang trong trạng thái cảnh báo"""
+        rules, slots = np.nonzero(self._active)
+        return [(self.rules[r].name, self._names[s]) for r, s in zip(rules, slots)]
+
+    def values(self, now: float) -> Tuple[List[str], np.ndarray]:
+        """
+        Gộp dữ liệu cho mọi luật
+        Returns:
+            (tên instance, ma trận giá trị [luật, instance])
+        """
+        names = self.metrics.names
+        values = np.full((len(self.rules), len(names)), np.nan)
+        resolution = self.metrics.min_resolution
+        for (metric, window, aggregation), rows in self._queries.items():
+            # Cửa sổ 0 = giá trị của bucket mới nhất
+            seconds = window if window > 0 else resolution
+            agg = aggregation if window > 0 else 'last'
+            result_names, result = self.metrics.aggregate(metric, seconds, agg, now)
+            if result_names == names:
+                values[rows] = result
+            else:
+                # Instance bị thêm/xóa giữa hai lần đọc: ghép theo tên
+                position = {name: i for i, name in enumerate(result_names)}
+                for column, name in enumerate(names):
+                    if name in position:
+                        values[rows, column] = result[position[name]]
+        for i, rule in enumerate(self.rules):
+            if rule.metric == 'memory_percent':
+                values[i] = values[i] / self.memory_total_mb * 100
+        return names, values
+
+    def evaluate(self, now: Optional[float] = None) -> List[Alert]:
+        """
+        Đánh giá một tick và gọi action cho các cảnh báo mới kích hoạt/kết thúc
+        Returns:
+            Danh sách Alert phát sinh trong tick này
+        """
+        now = now if now is not None else time.time()
+        names, values = self.values(now)
+        raised, cleared = self.step(names, values, now)
+
+        alerts = [Alert(self.rules[r], names[s], float(values[r, s]), now)
+                  for r, s in zip(*np.nonzero(raised))]
+        alerts += [Alert(self.rules[r], names[s], float(values[r, s]), now, state='cleared')
+                   for r, s in zip(*np.nonzero(cleared))]
+        for alert in alerts:
+            self._dispatch(alert)
+        return alerts
+
+    def step(self, names: List[str], values: np.ndarray, now: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cập nhật ma trận trạng thái theo giá trị mới
+        Returns:
+            (mask vừa kích hoạt, mask vừa kết thúc), cùng kích thước [luật, instance]
+        """
+        self._grow(names)
+        directed = values * self._sign
+        # Không có dữ liệu (instance đã dừng) coi như đã hết vượt ngưỡng
+        missing = np.isnan(directed)
+        over = ~missing & (directed > self._raise_at)
+        clear = missing | (directed < self._clear_at)
+
+        raised = over & ~self._active & (now - self._last_raised >= self._cooldown)
+        cleared = self._active & clear
+        self._active = (self._active | raised) & ~cleared
+        self._last_raised[raised] = now
+        return raised, cleared & ~missing
+
+    def _grow(self, names: List[str]):
+        """
+        Đưa ma trận trạng thái theo danh sách instance mới: thường chỉ thêm cột ở cuối,
+        khi có instance bị xóa (MetricsStore.release) thì ghép lại theo tên để instance
+        còn lại giữ đúng trạng thái của mình và instance đã xóa bị bỏ
+        """
+        if names == self._names:
+            return
+        count = len(self._names)
+        if names[:count] == self._names:
+            extra = len(names) - count
+            self._active = np.pad(self._active, ((0, 0), (0, extra)))
+            self._last_raised = np.pad(self._last_raised, ((0, 0), (0, extra)), constant_values=-np.inf)
+        else:
+            old = {name: i for i, name in enumerate(self._names)}
+            index = np.array([old.get(name, -1) for name in names], dtype=int)
+            kept = index >= 0
+            active = np.zeros((len(self.rules), len(names)), dtype=bool)
+            last_raised = np.full((len(self.rules), len(names)), -np.inf)
+            active[:, kept] = self._active[:, index[kept]]
+            last_raised[:, kept] = self._last_raised[:, index[kept]]
+            self._active, self._last_raised = active, last_raised
+        self._names = list(names)
+
+    def _dispatch(self, alert: Alert):
+        for name in alert.rule.actions:
+            action = self._actions.get(name)
+            if action is None:
+                continue
+            try:
+                action(alert)
+            except Exception as e:
+                logger.error(f"Alert action {name} failed for {alert.instance}: {e}",
+                             extra={'instance': alert.instance})
+
+    @staticmethod
+    def _log_action(alert: Alert):
+        rule = alert.rule
+        if alert.state == 'raised':
+            window = f"{rule.aggregation}({rule.window:g}s)" if rule.window > 0 else 'last'
+            logger.warning(f"Alert {rule.name} on {alert.instance}: {rule.metric} {window} = "
+                           f"{alert.value:.1f}, threshold {rule.threshold:g}",
+                           extra={'instance': alert.instance})
+        else:
+            logger.info(f"Alert {rule.name} cleared on {alert.instance}: {rule.metric} = {alert.value:.1f}",
+                        extra={'instance': alert.instance})
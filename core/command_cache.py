@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Tuple
+from .exceptions import CommandCancelled, CommandTimeout
+from .executor import command_fields
+from .telemetry import Telemetry
+
+# Lệnh chỉ đọc: kết quả được cache trong ttl giây
+READ_ONLY_VERBS = ('list', 'list2', 'runninglist', 'isrunning', 'getprop')
+# Lệnh đổi trạng thái nhưng gọi hai lần cũng như một: lệnh trùng đang chạy thì dùng chung kết quả
+# launch không thuộc nhóm này: run_app/launch gộp vào lệnh đang chạy thì lần thứ hai không bao giờ được thực hiện
+IDEMPOTENT_VERBS = ('quit', 'quitall')
+
+
+class CommandCache:
+    """
+    Lớp đứng trước việc spawn ldconsole:
+    - lệnh giống hệt nhau (chỉ đọc hoặc idempotent) đang chạy thì gộp vào một subprocess
+    - kết quả lệnh chỉ đọc được cache ngắn hạn
+    - lệnh thay đổi trạng thái xóa cache của instance đó và các lệnh liệt kê toàn bộ
+    """
+
+    def __init__(self, run: Callable[[List[str], Optional[float]], str], ttl: float = 1.0,
+                 enabled: bool = True, telemetry: Optional[Telemetry] = None):
+        self.run = run
+        self.ttl = ttl
+        self.enabled = enabled
+        self.telemetry = telemetry or Telemetry()
+        self._lock = threading.Lock()
+        # key -> (instance, thời điểm lấy, stdout)
+        self._cache: Dict[Tuple[str, ...], Tuple[Optional[str], float, str]] = {}
+        # key -> (future, generation lúc lệnh bắt đầu)
+        self._in_flight: Dict[Tuple[str, ...], Tuple[Future, int]] = {}
+        # Tăng mỗi khi cache bị xóa: kết quả đọc bắt đầu trước lần xóa không được ghi vào cache
+        # và lệnh đọc mới không gộp vào nó
+        self._generation = 0
+        self.stats = {'hit': 0, 'miss': 0, 'coalesced': 0}
+
+        self.telemetry.describe('ldconsole_cache_total',
+                                'ldconsole calls answered from cache (hit), merged into an in-flight call '
+                                '(coalesced) or spawned (miss)')
+
+    def execute(self, command: List[str], timeout: Optional[float] = None, fresh: bool = False) -> str:
+        """
+        Chạy lệnh qua cache
+        Args:
+            fresh: Bỏ qua kết quả đã cache (vẫn gộp với lệnh giống hệt bắt đầu sau lần xóa cache gần nhất)
+        """
+        if not self.enabled:
+            return self.run(command, timeout)
+        fields = command_fields(command)
+        verb, instance = fields['command'], fields.get('instance')
+        key = tuple(command)
+        read_only = verb in READ_ONLY_VERBS
+
+        with self._lock:
+            if read_only and not fresh:
+                entry = self._cache.get(key)
+                if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                    self._count('hit', verb)
+                    return entry[2]
+            if read_only or verb in IDEMPOTENT_VERBS:
+                generation = self._generation
+                leader = None
+                in_flight = self._in_flight.get(key)
+                # Lệnh đọc bắt đầu trước một lệnh thay đổi trạng thái có thể trả về trạng thái cũ
+                if in_flight is not None and (not read_only or in_flight[1] == generation):
+                    leader = in_flight[0]
+                    self._count('coalesced', verb)
+                else:
+                    future: Future = Future()
+                    self._in_flight[key] = (future, generation)
+            else:
+                leader = None
+                future = None
+            if read_only and leader is None:
+                self._count('miss', verb)
+
+        if leader is not None:
+            try:
+                return leader.result(timeout)
+            except FutureTimeout:
+                raise CommandTimeout(f"Command timed out after {timeout}s waiting for identical command: "
+                                     f"{command}")
+            except CommandCancelled:
+                # Lệnh dẫn đầu thuộc thao tác khác và bị hủy theo scope của nó, lệnh này thì không: chạy lại
+                return self.execute(command, timeout, fresh)
+        if future is None:
+            # Lệnh thay đổi trạng thái: xóa cache trước (đọc song song không ghi đè kết quả cũ) và sau khi chạy
+            self.invalidate(instance)
+            try:
+                return self.run(command, timeout)
+            finally:
+                self.invalidate(instance)
+
+        try:
+            output = self.run(command, timeout)
+        except BaseException as e:
+            with self._lock:
+                self._finish(key, future)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._finish(key, future)
+            if read_only and generation == self._generation:
+                self._cache[key] = (instance, time.monotonic(), output)
+        if not read_only:
+            # quit gộp lại vẫn là lệnh thay đổi trạng thái
+            self.invalidate(instance)
+        future.set_result(output)
+        return output
+
+    def invalidate(self, instance: Optional[str] = None):
+        """Xóa cache của một instance cùng các lệnh không gắn instance (list, list2, ...); None = xóa hết"""
+        with self._lock:
+            self._generation += 1
+            if instance is None:
+                self._cache.clear()
+                return
+            for key in [key for key, entry in self._cache.items() if entry[0] in (None, instance)]:
+                del self._cache[key]
+
+    def _finish(self, key: Tuple[str, ...], future: Future):
+        # Lệnh đọc mới hơn có thể đã thay chỗ trong _in_flight sau một lần xóa cache
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None and in_flight[0] is future:
+            del self._in_flight[key]
+
+    def _count(self, result: str, verb: str):
+        self.stats[result] += 1
+        self.telemetry.inc('ldconsole_cache_total', {'verb': verb, 'result': result})
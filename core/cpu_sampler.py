@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .process_snapshot import ProcessSnapshot
+from .telemetry import Telemetry
+from utils.logger import logger
+
+
+class CpuSampler:
+    """
+    Lấy mẫu tài nguyên ở thread nền, tính CPU% từ chênh lệch cpu_times giữa hai lượt
+    nên không có lời gọi nào phải sleep
+    """
+
+    def __init__(self, names_provider: Callable[[], Iterable[str]],
+                 indexes_provider: Optional[Callable[[], Dict[int, str]]] = None,
+                 interval: float = 1.0, process_iter: Optional[Callable] = None,
+                 telemetry: Optional[Telemetry] = None):
+        self.names_provider = names_provider
+        self.indexes_provider = indexes_provider or dict
+        self.interval = interval
+        self.process_iter = process_iter
+        self.telemetry = telemetry or Telemetry()
+        self.telemetry.describe('monitor_scan_seconds', 'Process table scan per monitor tick')
+        self.telemetry.describe('monitor_tick_seconds', 'Whole monitor tick including listeners')
+        self.latest: Optional[ProcessSnapshot] = None
+        self._listeners: List[Callable[[ProcessSnapshot], None]] = []
+        # pid -> (cpu_time, timestamp) của lượt lấy mẫu trước
+        self._previous: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def sample(self) -> ProcessSnapshot:
+        """
+        Quét một lượt và cập nhật CPU% theo delta so với lượt trước
+        Returns:
+            ProcessSnapshot mới nhất
+        """
+        started = time.perf_counter()
+        snapshot = ProcessSnapshot.capture(
+            list(self.names_provider()),
+            self.indexes_provider(),
+            process_iter=self.process_iter
+        )
+        self.telemetry.observe('monitor_scan_seconds', time.perf_counter() - started)
+        with self._lock:
+            current = {}
+            for tree in snapshot.trees.values():
+                for pid in tree:
+                    info = snapshot.processes[pid]
+                    current[pid] = (info.cpu_time, snapshot.timestamp)
+                    previous = self._previous.get(pid)
+                    if previous is None:
+                        continue
+                    elapsed = snapshot.timestamp - previous[1]
+                    if elapsed > 0:
+                        info.cpu_percent = max(0.0, (info.cpu_time - previous[0]) / elapsed * 100)
+            # Chỉ giữ pid còn sống, pid đã thoát sẽ bị loại
+            self._previous = current
+            self.latest = snapshot
+
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Sample listener failed: {e}")
+        self.telemetry.observe('monitor_tick_seconds', time.perf_counter() - started)
+        return snapshot
+
+    def add_listener(self, listener: Callable[[ProcessSnapshot], None]):
+        """Đăng ký callback nhận mỗi snapshot mới (chạy trên thread của sampler)"""
+        self._listeners.append(listener)
+
+    def current(self) -> ProcessSnapshot:
+        """Trả về mẫu mới nhất; nếu sampler chưa chạy thì lấy mẫu ngay (không sleep)"""
+        if self.running and self.latest is not None:
+            return self.latest
+        return self.sample()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='CpuSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Resource sampling failed: {e}")
+            self._stop_event.wait(self.interval)
@@ -1,14 +1,42 @@
-from dataclasses import dataclass
 from typing import Dict, Optional
 
-@dataclass
 class Device:
-    name: str
-    status: str
-    properties: Dict
-    index: int
-    pid: Optional[int] = None
-    
+    """
+    Bản ghi một instance. Dùng __slots__ cho gọn khi có hàng nghìn instance;
+    khi thuộc về DeviceRegistry, mọi lần gán status/index/pid đều cập nhật index phụ của registry
+    """
+    __slots__ = ('name', 'status', 'properties', 'index', 'pid', '_registry')
+
+    INDEXED_FIELDS = ('status', 'index', 'pid')
+
+    def __init__(self, name: str, status: str, properties: Dict, index: int, pid: Optional[int] = None):
+        object.__setattr__(self, '_registry', None)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'status', status)
+        object.__setattr__(self, 'properties', properties)
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'pid', pid)
+
+    def __setattr__(self, key, value):
+        registry = self._registry
+        if registry is None:
+            object.__setattr__(self, key, value)
+        elif key == 'name':
+            raise AttributeError("Cannot rename a registered device")
+        elif key in self.INDEXED_FIELDS:
+            registry._reindex(self, key, value)
+        else:
+            object.__setattr__(self, key, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, Device):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return (f"Device(name={self.name!r}, status={self.status!r}, index={self.index}, "
+                f"pid={self.pid}, properties={self.properties!r})")
+
     def to_dict(self):
         return {
             "name": self.name,
@@ -26,4 +54,4 @@ class Device:
             properties=data["properties"],
             index=data["index"],
             pid=data.get("pid")
-        )
\ No newline at end of file
+        )
@@ -8,4 +8,20 @@ class InstanceError(LDPlayerError):
 
 class AppError(LDPlayerError):
     """Error related to app operations"""
-    pass
\ No newline at end of file
+    pass
+
+class CommandTimeout(InstanceError):
+    """ldconsole command exceeded its timeout"""
+    pass
+
+class CommandCancelled(InstanceError):
+    """ldconsole command was cancelled before completion"""
+    pass
+
+class ShellError(InstanceError):
+    """adb shell session could not be opened or was closed mid-command"""
+    pass
+
+class ShellUnavailable(ShellError):
+    """adb shell session was already closed, the command was never sent"""
+    pass
@@ -0,0 +1,233 @@
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, CancelledError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from .exceptions import InstanceError, CommandTimeout, CommandCancelled
+from .telemetry import Telemetry
+from utils.logger import logger
+
+
+def command_fields(command: List[str], **fields) -> Dict[str, Any]:
+    """
+    Field có cấu trúc cho log của một lệnh ldconsole
+    Returns:
+        Dict dùng làm extra= gồm command (verb), instance (--name/--index) và các field thêm
+    """
+    fields['command'] = command[1] if len(command) > 1 else (command[0] if command else None)
+    for flag in ('--name', '--index'):
+        if flag in command[:-1]:
+            fields['instance'] = command[command.index(flag) + 1]
+            break
+    return fields
+
+
+@dataclass
+class CommandResult:
+    name: str
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+    cancelled: bool = False
+
+
+class CommandExecutor:
+    """
+    Chạy lệnh ldconsole song song với số worker giới hạn,
+    có timeout cho từng lệnh và hủy được các lệnh đang chờ/đang chạy
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: Optional[float] = None,
+                 telemetry: Optional[Telemetry] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.telemetry = telemetry or Telemetry()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ldconsole')
+        self._lock = threading.Lock()
+        # Process/future -> scope của thao tác đã tạo ra nó (xem scope())
+        self._processes: Dict[subprocess.Popen, Any] = {}
+        self._pending: Dict[Future, Any] = {}
+        self._local = threading.local()
+        self._cancelled: Set[int] = set()
+
+        self.telemetry.describe('ldconsole_command_seconds', 'ldconsole command latency by verb')
+        self.telemetry.describe('ldconsole_commands_total', 'ldconsole commands by verb and outcome')
+        self.telemetry.describe('executor_queue_depth', 'Tasks waiting for a free executor worker')
+        self.telemetry.describe('executor_running_commands', 'ldconsole processes currently running')
+        self.telemetry.gauge('executor_queue_depth', lambda: self.queue_depth)
+        self.telemetry.gauge('executor_running_commands', lambda: self.running_commands)
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return max(0, len(self._pending) - self.max_workers)
+
+    @property
+    def running_commands(self) -> int:
+        with self._lock:
+            return len(self._processes)
+
+    def run(self, command: List[str], timeout: Optional[float] = None) -> str:
+        """
+        Chạy một lệnh và trả về stdout
+        Args:
+            command: Lệnh cần chạy
+            timeout: Số giây tối đa, mặc định dùng timeout của executor
+        Returns:
+            stdout đã strip
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        started = time.perf_counter()
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except OSError:
+            self._record(command, 'error', started)
+            raise
+        scope = self._current_scope()
+        with self._lock:
+            self._processes[process] = scope
+            # Thao tác đã bị hủy trước khi lệnh này kịp đăng ký: cancel() không thấy nó nên kill ở đây
+            if getattr(scope, 'is_cancelled', False):
+                self._cancelled.add(process.pid)
+                process.kill()
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            self._record(command, 'timeout', started)
+            raise CommandTimeout(f"Command timed out after {timeout}s: {command}")
+        finally:
+            with self._lock:
+                self._processes.pop(process, None)
+                cancelled = process.pid in self._cancelled
+                self._cancelled.discard(process.pid)
+            logger.debug("Command finished", extra=command_fields(
+                command, duration=round(time.perf_counter() - started, 4), exit_code=process.returncode
+            ))
+
+        if cancelled:
+            self._record(command, 'cancelled', started)
+            raise CommandCancelled(f"Command cancelled: {command}")
+        if process.returncode != 0:
+            self._record(command, 'failed', started)
+            error = subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+            raise InstanceError(f"Command failed: {error}")
+        self._record(command, 'ok', started)
+        return stdout.strip()
+
+    def _record(self, command: List[str], outcome: str, started: float):
+        verb = command_fields(command)['command']
+        self.telemetry.observe('ldconsole_command_seconds', time.perf_counter() - started, {'verb': verb})
+        self.telemetry.inc('ldconsole_commands_total', {'verb': verb, 'outcome': outcome})
+
+    @contextmanager
+    def scope(self, token: Any):
+        """
+        Gắn các lệnh chạy trong khối này (kể cả qua submit/map ở worker khác) với token,
+        để cancel(token) chỉ hủy lệnh của thao tác đó. Token có thuộc tính is_cancelled = True
+        (vd. Job) thì lệnh bắt đầu sau khi đã hủy cũng bị kill ngay
+        """
+        previous = self._current_scope()
+        self._local.scope = token
+        try:
+            yield
+        finally:
+            self._local.scope = previous
+
+    def _current_scope(self) -> Any:
+        return getattr(self._local, 'scope', None)
+
+    def submit(self, func: Callable, *args) -> Future:
+        scope = self._current_scope()
+        future = self._pool.submit(self._in_scope, scope, func, args)
+        with self._lock:
+            self._pending[future] = scope
+        future.add_done_callback(self._forget)
+        return future
+
+    def _in_scope(self, scope: Any, func: Callable, args: tuple):
+        if scope is None:
+            return func(*args)
+        with self.scope(scope):
+            return func(*args)
+
+    def map(self, func: Callable, names: Iterable[str], *args,
+            slots: Optional[threading.Semaphore] = None) -> Dict[str, CommandResult]:
+        """
+        Gọi func(name, *args) cho từng instance, tối đa max_workers lệnh cùng lúc
+        Args:
+            slots: Giới hạn riêng (vd. số bản copy cùng lúc); chờ slot ở thread gọi
+                   để worker của executor không bị chiếm bởi task đang xếp hàng
+        Returns:
+            Dict[instance_name, CommandResult]
+        """
+        started = {}
+        futures = {}
+        for name in names:
+            if slots is not None:
+                slots.acquire()
+            started[name] = time.perf_counter()
+            try:
+                futures[name] = self.submit(self._timed, func, name, args)
+            except BaseException:
+                if slots is not None:
+                    slots.release()
+                raise
+            if slots is not None:
+                futures[name].add_done_callback(lambda _: slots.release())
+
+        results = {}
+        for name, future in futures.items():
+            try:
+                value, duration = future.result()
+                results[name] = CommandResult(name=name, ok=True, value=value, duration=duration)
+            except (CancelledError, CommandCancelled):
+                results[name] = CommandResult(name=name, ok=False, error='cancelled', cancelled=True)
+            except Exception as e:
+                results[name] = CommandResult(
+                    name=name,
+                    ok=False,
+                    error=str(e),
+                    duration=time.perf_counter() - started[name]
+                )
+        return results
+
+    def cancel(self, scope: Any = None):
+        """
+        Hủy các lệnh đang chờ và kill các process đang chạy
+        Args:
+            scope: Chỉ hủy lệnh được tạo trong scope(token) này; None = hủy tất cả
+        """
+        with self._lock:
+            pending = [future for future, owner in self._pending.items() if scope is None or owner is scope]
+            processes = [process for process, owner in self._processes.items() if scope is None or owner is scope]
+            self._cancelled.update(process.pid for process in processes)
+        cancelled = sum(1 for future in pending if future.cancel())
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                continue
+        logger.info(f"Cancelled {cancelled} queued and {len(processes)} running commands")
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    @staticmethod
+    def _timed(func: Callable, name: str, args: tuple):
+        start = time.perf_counter()
+        value = func(name, *args)
+        return value, time.perf_counter() - start
+
+    def _forget(self, future: Future):
+        with self._lock:
+            self._pending.pop(future, None)
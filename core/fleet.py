@@ -0,0 +1,281 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+from .executor import CommandResult
+from .exceptions import InstanceError
+from utils.logger import logger
+
+
+class AgentClient:
+    """Client HTTP/JSON cho một AgentServer"""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 300.0):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body=None, timeout: Optional[float] = None,
+                 content_type: str = 'application/json'):
+        data = None
+        if body is not None:
+            data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        request = urllib.request.Request(f"{self.url}{path}", data=data, method=method)
+        if data is not None:
+            request.add_header('Content-Type', content_type)
+        if self.token:
+            request.add_header('X-Agent-Token', self.token)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise InstanceError(f"Agent {self.url}: {message}")
+        except (urllib.error.URLError, OSError) as e:
+            raise InstanceError(f"Agent {self.url} unreachable: {e}")
+
+    def info(self, timeout: Optional[float] = None) -> Dict:
+        return self._request('GET', '/v1/info', timeout=timeout)
+
+    def instances(self) -> List[Dict]:
+        return self._request('GET', '/v1/instances')
+
+    def resources(self) -> Dict[str, Dict]:
+        return self._request('GET', '/v1/resources')
+
+    def batch(self, action: str, names: Optional[List[str]], *args) -> Dict[str, CommandResult]:
+        results = self._request('POST', '/v1/batch', {'action': action, 'names': names, 'args': list(args)})
+        return {name: CommandResult(**result) for name, result in results.items()}
+
+    def upload_apk(self, apk_path: str) -> str:
+        with open(apk_path, 'rb') as f:
+            data = f.read()
+        return self._request('POST', '/v1/apks', data, content_type='application/vnd.android.package-archive')['path']
+
+    def stream(self, on_tick: Callable[[Dict], None], stop: threading.Event):
+        """Đọc /v1/stream tới khi stop được set hoặc kết nối đứt (ném InstanceError)"""
+        request = urllib.request.Request(f"{self.url}/v1/stream")
+        if self.token:
+            request.add_header('X-Agent-Token', self.token)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                for line in response:
+                    if stop.is_set():
+                        return
+                    payload = json.loads(line)
+                    if not payload.get('heartbeat'):
+                        on_tick(payload)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise InstanceError(f"Stream from {self.url} failed: {e}")
+
+
+@dataclass
+class HostState:
+    url: str
+    client: AgentClient
+    online: bool = False
+    info: Dict = field(default_factory=dict)
+    # Instance mới đã được xếp lên máy này nhưng info chưa phản ánh
+    reserved: int = 0
+    error: Optional[str] = None
+
+    @property
+    def free(self) -> int:
+        return self.info.get('capacity', 0) - self.info.get('instances', 0) - self.reserved
+
+    @property
+    def load(self) -> float:
+        """Tài nguyên căng nhất của máy (0..1): tỉ lệ slot instance, RAM hoặc CPU"""
+        capacity = self.info.get('capacity') or 1
+        instances = (self.info.get('instances', 0) + self.reserved) / capacity
+        return max(instances, self.info.get('memory_percent', 0) / 100, self.info.get('cpu_percent', 0) / 100)
+
+
+class FleetController:
+    """
+    Điều khiển nhiều agent: gửi lệnh hàng loạt song song tới từng máy theo vị trí của instance,
+    đặt instance mới lên máy đang nhàn nhất và nhận luồng trạng thái từ mọi agent
+    """
+
+    def __init__(self, urls: Iterable[str], token: Optional[str] = None, timeout: float = 300.0):
+        self.hosts: Dict[str, HostState] = {
+            url: HostState(url=url, client=AgentClient(url, token, timeout)) for url in urls
+        }
+        self.locations: Dict[str, str] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.hosts)), thread_name_prefix='fleet')
+        self._lock = threading.Lock()
+        self._watchers: List[threading.Thread] = []
+        self._stop_watch = threading.Event()
+
+    def refresh(self) -> Dict[str, HostState]:
+        """Cập nhật tải và danh sách instance của mọi agent (song song)"""
+        def fetch(host: HostState):
+            try:
+                info = host.client.info(timeout=10)
+                instances = host.client.instances()
+                return host, info, instances, None
+            except InstanceError as e:
+                return host, None, None, str(e)
+
+        locations = {}
+        for host, info, instances, error in self._pool.map(fetch, list(self.hosts.values())):
+            host.online = error is None
+            host.error = error
+            host.reserved = 0
+            if info is not None:
+                host.info = info
+                for device in instances:
+                    locations[device['name']] = host.url
+            else:
+                logger.warning(f"Agent {host.url} offline: {error}")
+        with self._lock:
+            self.locations = locations
+        return self.hosts
+
+    def place(self, count: int) -> List[str]:
+        """
+        Chọn máy cho count instance mới, mỗi lần chọn máy có load thấp nhất còn slot trống
+        Returns:
+            Danh sách url agent tương ứng từng instance
+        """
+        placement = []
+        with self._lock:
+            for _ in range(count):
+                candidates = [host for host in self.hosts.values() if host.online and host.free > 0]
+                if not candidates:
+                    raise InstanceError(f"No agent has free capacity ({len(placement)}/{count} placed)")
+                host = min(candidates, key=lambda h: (h.load, h.info.get('instances', 0) + h.reserved))
+                host.reserved += 1
+                placement.append(host.url)
+        return placement
+
+    def create_instances(self, names: List[str], properties: Optional[Dict] = None) -> Dict[str, CommandResult]:
+        """Tạo instance trên các máy nhàn nhất, mỗi máy nhận một lệnh batch"""
+        self.refresh()
+        groups: Dict[str, List[str]] = {}
+        for name, url in zip(names, self.place(len(names))):
+            groups.setdefault(url, []).append(name)
+        results = self._fan_out('create', groups, properties)
+        with self._lock:
+            for url, group in groups.items():
+                for name in group:
+                    if results[name].ok:
+                        self.locations[name] = url
+        return results
+
+    def start(self, names: Optional[List[str]] = None) -> Dict[str, CommandResult]:
+        return self.batch('start', names)
+
+    def stop(self, names: Optional[List[str]] = None) -> Dict[str, CommandResult]:
+        return self.batch('stop', names)
+
+    def remove(self, names: List[str]) -> Dict[str, CommandResult]:
+        results = self.batch('remove', names)
+        with self._lock:
+            for name, result in results.items():
+                if result.ok:
+                    self.locations.pop(name, None)
+        return results
+
+    def run_app(self, package_name: str, names: Optional[List[str]] = None) -> Dict[str, CommandResult]:
+        return self.batch('run_app', names, package_name)
+
+    def install(self, apk_path: str, names: Optional[List[str]] = None,
+                force: bool = False) -> Dict[str, CommandResult]:
+        """Upload APK lên từng máy liên quan một lần, rồi cài song song trên các máy"""
+        groups = self._group(names)
+        remote_paths = dict(zip(groups, self._pool.map(
+            lambda url: self.hosts[url].client.upload_apk(apk_path), list(groups))))
+        return self._fan_out('install', groups, per_host_args={
+            url: (remote_paths[url], force) for url in groups})
+
+    def batch(self, action: str, names: Optional[List[str]] = None, *args) -> Dict[str, CommandResult]:
+        """
+        Gửi một thao tác tới các máy đang giữ instance, mỗi máy một request chạy song song
+        Args:
+            action: create, remove, start, stop, install, run_app
+            names: Instance cần thao tác, None = mọi instance trên mọi máy
+        Returns:
+            Dict[instance_name, CommandResult]
+        """
+        if not self.locations:
+            self.refresh()
+        return self._fan_out(action, self._group(names), *args)
+
+    def _group(self, names: Optional[List[str]]) -> Dict[str, Optional[List[str]]]:
+        if names is None:
+            return {url: None for url, host in self.hosts.items() if host.online}
+        groups: Dict[str, List[str]] = {}
+        with self._lock:
+            for name in names:
+                groups.setdefault(self.locations.get(name, ''), []).append(name)
+        return groups
+
+    def _fan_out(self, action: str, groups: Dict[str, Optional[List[str]]], *args,
+                 per_host_args: Optional[Dict[str, tuple]] = None) -> Dict[str, CommandResult]:
+        results: Dict[str, CommandResult] = {}
+        for name in groups.pop('', []):
+            results[name] = CommandResult(name=name, ok=False, error='Instance not found on any agent')
+
+        def send(url: str):
+            host_args = per_host_args[url] if per_host_args else args
+            try:
+                return url, self.hosts[url].client.batch(action, groups[url], *host_args), None
+            except InstanceError as e:
+                return url, None, str(e)
+
+        for url, host_results, error in self._pool.map(send, list(groups)):
+            if host_results is not None:
+                results.update(host_results)
+                continue
+            logger.error(f"Batch {action} on {url} failed: {error}")
+            for name in groups[url] or []:
+                results[name] = CommandResult(name=name, ok=False, error=error)
+        return results
+
+    def watch(self, on_tick: Callable[[str, Dict], None], retry_delay: float = 5.0):
+        """
+        Nhận luồng trạng thái/tài nguyên của mọi agent, mỗi agent một thread, tự nối lại khi đứt
+        Args:
+            on_tick: Gọi với (url agent, payload) ở thread của agent đó
+        """
+        self._stop_watch.clear()
+        for url, host in self.hosts.items():
+            def run(url=url, host=host):
+                while not self._stop_watch.is_set():
+                    try:
+                        host.client.stream(lambda payload: on_tick(url, payload), self._stop_watch)
+                    except InstanceError as e:
+                        logger.warning(str(e))
+                    self._stop_watch.wait(retry_delay)
+
+            thread = threading.Thread(target=run, name=f'fleet-watch-{url}', daemon=True)
+            thread.start()
+            self._watchers.append(thread)
+
+    def stop_watching(self):
+        self._stop_watch.set()
+        self._watchers = []
+
+    def close(self):
+        self.stop_watching()
+        self._pool.shutdown(wait=False)
+
+    def summary(self) -> List[Dict]:
+        """Tình trạng từng máy cho CLI/GUI"""
+        return [{
+            'url': url,
+            'online': host.online,
+            'hostname': host.info.get('hostname'),
+            'instances': host.info.get('instances', 0),
+            'running': host.info.get('running', 0),
+            'capacity': host.info.get('capacity', 0),
+            'load': round(host.load, 2),
+            'error': host.error
+        } for url, host in self.hosts.items()]
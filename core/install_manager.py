@@ -0,0 +1,259 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .executor import CommandResult
+from .exceptions import AppError, CommandCancelled, InstanceError
+from .state_store import StateStore
+from utils.logger import logger
+
+# Chunk type của binary XML (AXML) trong AndroidManifest.xml
+_RES_STRING_POOL = 0x0001
+_RES_XML_RESOURCE_MAP = 0x0180
+_RES_XML_START_ELEMENT = 0x0102
+_UTF8_FLAG = 0x100
+_TYPE_STRING = 0x03
+# Resource id của các attribute android:versionCode / android:versionName
+_ATTR_IDS = {0x0101021b: 'versionCode', 0x0101021c: 'versionName'}
+
+
+@dataclass
+class ApkInfo:
+    path: str
+    sha256: str
+    package: str
+    version_code: int
+    version_name: Optional[str] = None
+
+
+def _read_strings(data: bytes, offset: int) -> List[str]:
+    count, _, flags, strings_start, _ = struct.unpack_from('<5I', data, offset + 8)
+    header_size = struct.unpack_from('<H', data, offset + 2)[0]
+    offsets = struct.unpack_from(f'<{count}I', data, offset + header_size)
+    base = offset + strings_start
+    strings = []
+    for start in offsets:
+        pos = base + start
+        if flags & _UTF8_FLAG:
+            # Độ dài UTF-16 rồi độ dài UTF-8, mỗi cái 1 hoặc 2 byte
+            for _ in range(2):
+                length = data[pos]
+                pos += 1
+                if length & 0x80:
+                    length = ((length & 0x7f) << 8) | data[pos]
+                    pos += 1
+            strings.append(data[pos:pos + length].decode('utf-8', 'replace'))
+        else:
+            length = struct.unpack_from('<H', data, pos)[0]
+            pos += 2
+            if length & 0x8000:
+                length = ((length & 0x7fff) << 16) | struct.unpack_from('<H', data, pos)[0]
+                pos += 2
+            strings.append(data[pos:pos + length * 2].decode('utf-16-le', 'replace'))
+    return strings
+
+
+def parse_manifest(data: bytes) -> Dict[str, object]:
+    """
+    Đọc các attribute của thẻ <manifest> từ AndroidManifest.xml dạng binary
+    Returns:
+        Dict gồm package, versionCode, versionName (nếu có)
+    """
+    strings: List[str] = []
+    resource_ids: Tuple[int, ...] = ()
+    offset = struct.unpack_from('<H', data, 2)[0]
+    while offset + 8 <= len(data):
+        chunk_type, _, chunk_size = struct.unpack_from('<HHI', data, offset)
+        if chunk_type == _RES_STRING_POOL:
+            strings = _read_strings(data, offset)
+        elif chunk_type == _RES_XML_RESOURCE_MAP:
+            resource_ids = struct.unpack_from(f'<{(chunk_size - 8) // 4}I', data, offset + 8)
+        elif chunk_type == _RES_XML_START_ELEMENT:
+            # Thẻ đầu tiên luôn là <manifest>
+            attr_start, attr_size, attr_count = struct.unpack_from('<HHH', data, offset + 24)
+            attributes = {}
+            for i in range(attr_count):
+                pos = offset + 16 + attr_start + i * attr_size
+                _, name, raw, _, _, data_type, value = struct.unpack_from('<IIIHBBI', data, pos)
+                key = strings[name] if name < len(strings) else ''
+                if not key and name < len(resource_ids):
+                    key = _ATTR_IDS.get(resource_ids[name], '')
+                if data_type == _TYPE_STRING or raw != 0xFFFFFFFF:
+                    attributes[key] = strings[raw] if raw < len(strings) else None
+                else:
+                    attributes[key] = value
+            return attributes
+        if chunk_size <= 0:
+            break
+        offset += chunk_size
+    raise AppError("AndroidManifest.xml has no manifest element")
+
+
+def read_apk_info(path: str) -> ApkInfo:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    try:
+        with zipfile.ZipFile(path) as apk:
+            manifest = parse_manifest(apk.read('AndroidManifest.xml'))
+    except (zipfile.BadZipFile, KeyError, struct.error) as e:
+        raise AppError(f"Cannot read manifest of {path}: {e}")
+    return ApkInfo(
+        path=path,
+        sha256=sha.hexdigest(),
+        package=str(manifest.get('package')),
+        version_code=int(manifest.get('versionCode') or 0),
+        version_name=manifest.get('versionName')
+    )
+
+
+class InstallManager:
+    """
+    Cài APK cho nhiều instance: hash/parse APK một lần, bỏ qua instance đã có đúng bản,
+    phần còn lại cài song song qua executor của manager và retry theo từng instance
+    """
+
+    def __init__(self, manager, path: str = 'data/installed_apps.json',
+                 retries: int = 2, retry_delay: float = 2.0):
+        self.manager = manager
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.store = StateStore(path, flush_interval=1.0)
+        self._installed: Dict[str, Dict[str, Dict]] = {}
+        self._apk_cache: Dict[Tuple[str, int, float], ApkInfo] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(os.path.dirname(self.store.path) or '.', exist_ok=True)
+            self._installed = self.store.load()
+            self.store.start()
+            self._loaded = True
+
+    def apk_info(self, apk_path: str) -> ApkInfo:
+        """Thông tin APK, cache theo (path, size, mtime) để chỉ hash một lần"""
+        stat = os.stat(apk_path)
+        key = (os.path.abspath(apk_path), stat.st_size, stat.st_mtime)
+        info = self._apk_cache.get(key)
+        if info is None:
+            info = read_apk_info(apk_path)
+            self._apk_cache[key] = info
+        return info
+
+    def installed(self, name: str) -> Dict[str, Dict]:
+        self._load()
+        return dict(self._installed.get(name, {}))
+
+    def copy_records(self, source: str, name: str):
+        """Instance copy từ template có sẵn các app của template"""
+        record = self.installed(source)
+        if not record:
+            return
+        with self._lock:
+            self._installed[name] = record
+        self.store.put(name, record)
+
+    def forget(self, name: str):
+        """Bỏ bản ghi app của instance đã bị xóa, instance tạo lại cùng tên phải cài lại từ đầu"""
+        self._load()
+        with self._lock:
+            if self._installed.pop(name, None) is None:
+                return
+        self.store.delete(name)
+
+    def is_up_to_date(self, name: str, info: ApkInfo) -> bool:
+        """Chỉ đúng khi instance có đúng file APK này (cùng sha256); build lại cùng versionCode vẫn phải cài"""
+        record = self.installed(name).get(info.package)
+        return record is not None and record['sha256'] == info.sha256
+
+    def is_downgrade(self, name: str, info: ApkInfo) -> bool:
+        """Instance đang có versionCode cao hơn: Android từ chối cài đè nếu không ép"""
+        record = self.installed(name).get(info.package)
+        return record is not None and record['version_code'] > info.version_code
+
+    def deploy(self, apk_path: str, names: Optional[List[str]] = None,
+               force: bool = False) -> Dict[str, CommandResult]:
+        """
+        Cài APK lên các instance chưa có bản mới nhất
+        Args:
+            apk_path: Đường dẫn APK
+            names: Danh sách instance, mặc định là tất cả
+            force: Cài lại kể cả khi đã cập nhật hoặc là bản cũ hơn
+        Returns:
+            Dict[instance_name, CommandResult]; instance được bỏ qua có value='up-to-date',
+            instance đang có bản mới hơn bị đánh lỗi downgrade
+        """
+        self._load()
+        info = self.apk_info(apk_path)
+        names = list(self.manager.devices) if names is None else names
+
+        results = {}
+        pending = []
+        for name in names:
+            if not force and self.is_up_to_date(name, info):
+                results[name] = CommandResult(name=name, ok=True, value='up-to-date')
+            elif not force and self.is_downgrade(name, info):
+                results[name] = CommandResult(name=name, ok=False, error=self._downgrade_message(name, info))
+            else:
+                pending.append(name)
+
+        logger.info(f"Deploying {info.package} v{info.version_code} to {len(pending)} instances "
+                    f"({len(results)} already up to date)")
+        results.update(self.manager.executor.map(self._install_one, pending, info))
+        return results
+
+    def install(self, name: str, apk_path: str, force: bool = False) -> str:
+        """
+        Cài APK cho một instance (blocking), bỏ qua nếu đã có bản mới nhất
+        Returns:
+            'installed' hoặc 'up-to-date'
+        """
+        self._load()
+        info = self.apk_info(apk_path)
+        if not force and self.is_up_to_date(name, info):
+            return 'up-to-date'
+        if not force and self.is_downgrade(name, info):
+            raise AppError(self._downgrade_message(name, info))
+        return self._install_one(name, info)
+
+    def _downgrade_message(self, name: str, info: ApkInfo) -> str:
+        installed = self.installed(name)[info.package]['version_code']
+        return (f"{name} has {info.package} v{installed}, refusing to downgrade to v{info.version_code} "
+                f"(use force)")
+
+    def _install_one(self, name: str, info: ApkInfo):
+        if name not in self.manager.devices:
+            raise InstanceError(f"Instance {name} does not exist")
+        for attempt in range(self.retries + 1):
+            try:
+                self.manager.install_app(name, info.path)
+                break
+            except CommandCancelled:
+                # Người dùng đã hủy (job bị cancel): không cài lại sau lưng họ.
+                # CommandTimeout vẫn được retry vì thường do adb/instance chậm nhất thời
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Install on {name} failed (attempt {attempt + 1}), retrying: {e}",
+                               extra={'instance': name})
+                time.sleep(self.retry_delay * (attempt + 1))
+
+        with self._lock:
+            record = dict(self._installed.get(name, {}))
+            record[info.package] = {
+                'version_code': info.version_code,
+                'version_name': info.version_name,
+                'sha256': info.sha256
+            }
+            self._installed[name] = record
+        self.store.put(name, record)
+        return 'installed'
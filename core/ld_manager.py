@@ -1,76 +1,245 @@
-import json
-import subprocess
 import os
+import shlex
 import time
-import psutil
 from typing import List, Dict, Optional
 from .device import Device
+from .registry import DeviceRegistry
+from .process_snapshot import ProcessSnapshot
+from .cpu_sampler import CpuSampler
+from .status_provider import StatusProvider, InstanceStatus
+from .executor import CommandExecutor, CommandResult, command_fields
+from .command_cache import CommandCache
+from .admission import AdmissionController
+from .supervisor import ProcessSupervisor, player_process
+from .readiness import ReadinessWaiter
+from .state_store import StateStore
+from .install_manager import InstallManager
+from .templates import TemplateManager
+from .telemetry import Telemetry, MetricsServer
 from .exceptions import InstanceError, AppError
+from .adb_pool import ShellResult
 from utils.logger import logger
 from config.settings import settings
 
 class LDPlayerManager:
-    def __init__(self):
-        self.devices: Dict[str, Device] = {}
-        self.ld_path = "D:\\LDPlayer\\LDPlayer9\\ldconsole.exe"
+    def __init__(self, ld_path: Optional[str] = None):
+        self.devices = DeviceRegistry()
+        self.ld_path = ld_path or settings.ldplayer_path
+        self.telemetry = Telemetry()
+        self._metrics_server: Optional[MetricsServer] = None
+        self.store = StateStore(
+            settings.state_path,
+            flush_interval=settings.state_flush_interval,
+            compact_every=settings.state_compact_every
+        )
+        self.executor = CommandExecutor(
+            max_workers=settings.executor_max_workers,
+            timeout=settings.command_timeout,
+            telemetry=self.telemetry
+        )
+        self.commands = CommandCache(
+            self.executor.run,
+            ttl=settings.command_cache_ttl,
+            enabled=settings.command_cache_enabled,
+            telemetry=self.telemetry
+        )
+        self.telemetry.describe('ldconsole_transitions_skipped_total',
+                                'start/stop requests skipped because the instance was already in that state')
         self.load_state()
+        # StatusProvider tự cache list2 theo status_ttl, khi cần gọi lại thì luôn lấy kết quả mới
+        self.status = StatusProvider(lambda command: self.execute_command(command, fresh=True),
+                                     self.ld_path, ttl=settings.status_ttl)
+        # Mỗi lần list2 chạy lại, index/pid/trạng thái trong registry được đồng bộ theo ldconsole
+        self.status.add_listener(self._reconcile)
+        self.readiness = ReadinessWaiter(self.status, timeout=settings.boot_timeout)
+        self.sampler = CpuSampler(
+            lambda: list(self.devices),
+            self._index_map,
+            interval=settings.monitor_interval,
+            telemetry=self.telemetry
+        )
+        # Cho phép tạo/start theo tài nguyên thật của máy, học footprint từ sampler và boot theo đợt
+        self.admission = AdmissionController(
+            self._admission_properties,
+            enabled=settings.admission_enabled,
+            max_instances=settings.max_instances,
+            memory_reserve_mb=settings.admission_memory_reserve_mb,
+            max_cpu_percent=settings.admission_max_cpu_percent,
+            max_concurrent_boots=settings.admission_max_concurrent_boots,
+            boot_timeout=settings.boot_timeout,
+            queue_timeout=settings.admission_queue_timeout,
+            instance_overhead_mb=settings.admission_instance_overhead_mb,
+            default_cpu_percent=settings.admission_default_cpu_percent,
+            create_overcommit=settings.admission_create_overcommit,
+            smoothing=settings.admission_smoothing,
+            telemetry=self.telemetry
+        )
+        self.sampler.add_listener(self.admission.observe)
+        self.status.add_listener(self.admission.on_status)
+        # Chờ process player thoát để phát hiện crash và tự start lại, chỉ chạy khi start_monitoring
+        self.supervisor = ProcessSupervisor(
+            self,
+            restart=settings.supervisor_restart,
+            max_restarts=settings.supervisor_max_restarts,
+            window=settings.supervisor_window,
+            backoff_base=settings.supervisor_backoff_base,
+            backoff_max=settings.supervisor_backoff_max,
+            expect_timeout=settings.boot_timeout,
+            telemetry=self.telemetry
+        )
+        self.status.add_listener(self.supervisor.on_status)
+        self._metrics = None
+        self._alerts = None
+        self._workflows = None
+        self._adb = None
+        self.installer = InstallManager(
+            self,
+            path=settings.state_file('installed_apps.json'),
+            retries=settings.install_retries,
+            retry_delay=settings.install_retry_delay
+        )
+        self.templates = TemplateManager(self, path=settings.state_file('templates.json'),
+                                         copy_concurrency=settings.template_copy_concurrency)
 
-    def execute_command(self, command: List[str]) -> str:
+    def execute_command(self, command: List[str], timeout: Optional[float] = None, fresh: bool = False) -> str:
+        """
+        Chạy lệnh ldconsole; lệnh chỉ đọc được cache ngắn hạn và lệnh trùng đang chạy được gộp lại
+        Args:
+            fresh: Không dùng kết quả đã cache của lệnh chỉ đọc
+        """
         try:
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Command failed: {e}")
+            return self.commands.execute(command, timeout, fresh)
+        except InstanceError as e:
+            logger.error(str(e), extra=command_fields(command))
+            raise
+        except OSError as e:
+            logger.error(f"Command failed: {e}", extra=command_fields(command))
             raise InstanceError(f"Command failed: {e}")
 
     def create_instance(self, name: str, properties: Optional[Dict] = None) -> Device:
-        if len(self.devices) >= settings.max_instances:
-            raise InstanceError(f"Maximum number of instances ({settings.max_instances}) reached")
-
-        props = properties or settings.default_properties
-        command = [settings.ldplayer_path, "create", "--name", name]
+        props = dict(properties or settings.default_properties)
+        self.admission.check_create(self.devices, props)
+        command = [self.ld_path, "create", "--name", name]
         
         for key, value in props.items():
             command.extend([f"--{key}", str(value)])
 
         self.execute_command(command)
+        self.status.invalidate()
         
-        device = Device(
+        device = self.devices.add(Device(
             name=name,
             status="created",
             properties=props,
-            index=len(self.devices)
-        )
-        self.devices[name] = device
+            index=self.devices.next_index()
+        ))
 
         # Lưu state sau khi tạo instance
-        self.save_state()
+        self.save_state(name)
         
-        logger.info(f"Created instance: {name}")
+        logger.info(f"Created instance: {name}", extra={'instance': name})
         return device
 
+    def clone_instance(self, name: str, source: str, properties: Optional[Dict] = None) -> Device:
+        """
+        Tạo instance mới bằng cách copy một instance có sẵn (ldconsole copy)
+        Args:
+            name: Tên instance mới
+            source: Instance/template nguồn, phải đang dừng
+            properties: Thuộc tính ghi đè sau khi copy
+        """
+        template = self.devices.get(source)
+        if not template:
+            raise InstanceError(f"Instance {source} does not exist")
+        self.admission.check_create(self.devices, dict(template.properties, **(properties or {})))
+
+        self.execute_command([self.ld_path, "copy", "--name", name, "--from", source])
+        self.status.invalidate()
+
+        props = dict(template.properties)
+        device = self.devices.add(Device(
+            name=name,
+            status="created",
+            properties=props,
+            index=self.devices.next_index()
+        ))
+        if properties:
+            self.modify_instance(name, properties)
+
+        self.save_state(name)
+        logger.info(f"Cloned instance {name} from {source}", extra={'instance': name})
+        return device
+
+    def modify_instance(self, name: str, properties: Dict):
+        """Đổi thuộc tính (cpu, memory, resolution, ...) của instance đang dừng"""
+        device = self.devices.get(name)
+        if not device:
+            raise InstanceError(f"Instance {name} does not exist")
+
+        command = [self.ld_path, "modify", "--name", name]
+        for key, value in properties.items():
+            command.extend([f"--{key}", str(value)])
+        self.execute_command(command)
+
+        device.properties.update(properties)
+        self.save_state(name)
+
+    def remove_instance(self, name: str):
+        """Xóa instance khỏi ldconsole và registry; index của nó có thể được ldconsole dùng lại"""
+        if name not in self.devices:
+            raise InstanceError(f"Instance {name} does not exist")
+        if self.status.is_running(name):
+            self.stop_instance(name)
+
+        self.execute_command([self.ld_path, "remove", "--name", name])
+        self.status.invalidate()
+        self.devices.remove(name)
+        self._close_shell(name)
+        self.admission.forget(name)
+        self.supervisor.forget(name)
+        self.installer.forget(name)
+        if self._metrics is not None:
+            self._metrics.release(name)
+        self.save_state(name)
+        logger.info(f"Removed instance: {name}", extra={'instance': name})
+
     def start_instance(self, name: str) -> bool:
         try:
             device = self.devices.get(name)
             if not device:
                 raise InstanceError(f"Instance {name} does not exist")
 
+            # Trạng thái đã biết: process player vẫn còn (không tính zombie, pid bị dùng lại) thì khỏi hỏi ldconsole
+            if device.status == "running" and player_process(device.pid) is not None:
+                self._skip_transition("launch", name)
+                return True
+            status = self._cached_status(name)
+            if status and status.running:
+                device.status = "running"
+                device.pid = status.player_pid
+                self.save_state(name)
+                self._skip_transition("launch", name)
+                return True
+
+            # Chờ tới khi máy đủ RAM/CPU và còn chỗ trong đợt boot hiện tại
+            self.admission.acquire(name, poll=self._admission_poll)
             command = [self.ld_path, "launch", "--name", name]
-            self.execute_command(command)
+            try:
+                self.execute_command(command)
+            except Exception:
+                self.admission.release(name)
+                raise
+            self.status.invalidate()
+            self.supervisor.expect(name)
             device.status = "running"
             
             # Lưu state sau khi start
-            self.save_state()
+            self.save_state(name)
             
-            logger.info(f"Started instance: {name}")
+            logger.info(f"Started instance: {name}", extra={'instance': name})
             return True
         except Exception as e:
-            logger.error(f"Failed to start instance {name}: {e}")
+            logger.error(f"Failed to start instance {name}: {e}", extra={'instance': name})
             raise
 
     def stop_instance(self, name: str):
@@ -79,134 +248,192 @@ class LDPlayerManager:
             if not device:
                 raise InstanceError(f"Instance {name} does not exist")
 
-            command = [self.ld_path, "quit", "--name", name]
-            self.execute_command(command)
-            device.status = "stopped"
+            # Dừng chủ động không phải crash, supervisor không theo dõi lại và không start lại
+            with self.supervisor.stopping(name):
+                status = self._cached_status(name)
+                if status and not status.running:
+                    device.status = "stopped"
+                    device.pid = None
+                    self.save_state(name)
+                    self._skip_transition("quit", name)
+                    return
+
+                command = [self.ld_path, "quit", "--name", name]
+                self.execute_command(command)
+                self.status.invalidate()
+                self._close_shell(name)
+                self.admission.release(name)
+                device.status = "stopped"
+                device.pid = None
             
-            # Lưu state sau khi stop
-            self.save_state()
+                # Lưu state sau khi stop
+                self.save_state(name)
             
-            logger.info(f"Stopped instance: {name}")
+            logger.info(f"Stopped instance: {name}", extra={'instance': name})
         except Exception as e:
-            logger.error(f"Failed to stop instance {name}: {e}")
+            logger.error(f"Failed to stop instance {name}: {e}", extra={'instance': name})
             raise
 
     def install_app(self, name: str, apk_path: str):
         if name not in self.devices:
             raise InstanceError(f"Instance {name} does not exist")
 
-        command = [settings.ldplayer_path, "install", "--name", name, "--apk", apk_path]
+        command = [self.ld_path, "install", "--name", name, "--apk", apk_path]
         self.execute_command(command)
-        logger.info(f"Installed app on {name}: {apk_path}")
+        logger.info(f"Installed app on {name}: {apk_path}", extra={'instance': name})
 
     def run_app(self, name: str, package_name: str):
         if name not in self.devices:
             raise InstanceError(f"Instance {name} does not exist")
 
-        command = [settings.ldplayer_path, "launch", "--name", name, "--packagename", package_name]
+        command = [self.ld_path, "launch", "--name", name, "--packagename", package_name]
         self.execute_command(command)
-        logger.info(f"Running app on {name}: {package_name}")
+        logger.info(f"Running app on {name}: {package_name}", extra={'instance': name})
+
+    @property
+    def adb(self):
+        """Pool shell session adb theo instance, cho các lệnh nhỏ lặp lại nhiều lần"""
+        if self._adb is None:
+            from .adb_pool import ShellPool
+            self._adb = ShellPool(
+                self._adb_argv,
+                idle_timeout=settings.adb_idle_timeout,
+                command_timeout=settings.adb_command_timeout,
+                telemetry=self.telemetry
+            )
+        return self._adb
+
+    def _adb_argv(self, name: str) -> List[str]:
+        device = self.devices.get(name)
+        if not device:
+            raise InstanceError(f"Instance {name} does not exist")
+        adb_path = settings.adb_path or os.path.join(os.path.dirname(self.ld_path), "adb.exe")
+        # LDPlayer mở cổng adb 5555 + 2 * index, serial tương ứng là emulator-<cổng console>
+        return [adb_path, "-s", f"emulator-{5554 + 2 * device.index}", "shell"]
+
+    def _close_shell(self, name: str):
+        if self._adb is not None:
+            self._adb.close(name)
+
+    def shell(self, name: str, command: str, timeout: Optional[float] = None) -> ShellResult:
+        """
+        Chạy lệnh shell Android qua session adb dùng chung, không spawn ldconsole
+        Returns:
+            ShellResult (output, exit_code); exit_code khác 0 không ném exception
+        """
+        return self.adb.execute(name, command, timeout)
+
+    def _shell_checked(self, name: str, command: str) -> str:
+        result = self.shell(name, command)
+        if not result.ok:
+            raise AppError(f"Shell command failed on {name} (exit {result.exit_code}): {result.output}")
+        return result.output
 
-    def save_state(self):
-        state = {name: device.to_dict() for name, device in self.devices.items()}
-        with open('data/instances.json', 'w') as f:
-            json.dump(state, f, indent=2)
+    def launch_app(self, name: str, package_name: str):
+        """Bản nhanh của run_app qua adb shell"""
+        self._shell_checked(name, f"monkey -p {shlex.quote(package_name)} -c android.intent.category.LAUNCHER 1")
+
+    def start_activity(self, name: str, component: str):
+        self._shell_checked(name, f"am start -n {shlex.quote(component)}")
+
+    def tap(self, name: str, x: int, y: int):
+        self._shell_checked(name, f"input tap {int(x)} {int(y)}")
+
+    def input_text(self, name: str, text: str):
+        # input text không nhận khoảng trắng, dùng %s thay thế
+        escaped = text.replace(' ', '%s').replace("'", "'\\''")
+        self._shell_checked(name, f"input text '{escaped}'")
+
+    def installed_packages(self, name: str) -> List[str]:
+        output = self._shell_checked(name, "pm list packages")
+        return [line.split(':', 1)[1].strip() for line in output.splitlines() if line.startswith('package:')]
+
+    def start_many(self, names: List[str]) -> Dict[str, CommandResult]:
+        """Start nhiều instance song song, trả về kết quả theo từng instance"""
+        return self.executor.map(self.start_instance, names)
+
+    def stop_many(self, names: List[str]) -> Dict[str, CommandResult]:
+        return self.executor.map(self.stop_instance, names)
+
+    def install_many(self, names: List[str], apk_path: str) -> Dict[str, CommandResult]:
+        return self.executor.map(self.install_app, names, apk_path)
+
+    def run_app_many(self, names: List[str], package_name: str) -> Dict[str, CommandResult]:
+        return self.executor.map(self.run_app, names, package_name)
+
+    async def wait_until_ready(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Chờ instance boot xong thay cho sleep cố định"""
+        return await self.readiness.wait_until_ready(name, timeout)
+
+    async def wait_until_ready_many(self, names: List[str], timeout: Optional[float] = None,
+                                    on_ready=None) -> Dict[str, bool]:
+        return await self.readiness.wait_until_ready_many(names, timeout, on_ready)
+
+    def cancel_commands(self):
+        """Hủy các lệnh đang chờ hoặc đang chạy trong executor"""
+        self.executor.cancel()
+
+    def save_state(self, name: Optional[str] = None):
+        """
+        Ghi nhận thay đổi state, việc ghi file do StateStore gộp lại ở thread nền
+        Args:
+            name: Instance vừa thay đổi; None để ghi lại toàn bộ
+        """
+        names = [name] if name else list(self.devices)
+        for device_name in names:
+            device = self.devices.get(device_name)
+            if device is None:
+                self.store.delete(device_name)
+            else:
+                self.store.put(device_name, device.to_dict())
 
     def load_state(self):
         try:
             # Tạo thư mục data nếu chưa tồn tại
-            os.makedirs('data', exist_ok=True)
-            
-            # Kiểm tra file tồn tại
-            if not os.path.exists('data/instances.json'):
-                # Tạo file json trống nếu chưa có
-                with open('data/instances.json', 'w') as f:
-                    json.dump({}, f)
-                self.devices = {}
-                return
-
-            # Đọc file json
-            with open('data/instances.json', 'r') as f:
-                state = json.load(f)
-                self.devices = {
-                    name: Device.from_dict(data) 
-                    for name, data in state.items()
-                }
+            os.makedirs(os.path.dirname(self.store.path) or '.', exist_ok=True)
+
+            state = self.store.load()
+            devices = [Device.from_dict(data) for data in state.values()]
+            # State có thể cũ (crash, khởi động lại máy): "running" mà process không còn thì là stopped
+            for device in devices:
+                if device.status == "running" and player_process(device.pid) is None:
+                    device.status = "stopped"
+                    device.pid = None
+            self.devices.load(devices)
         except Exception as e:
             logger.error(f"Failed to load state: {e}")
-            self.devices = {}
+            self.devices.load(())
+        self.store.start()
 
-    def get_instance_resources(self, name: str) -> Dict:
+    def get_instance_resources(self, name: str, snapshot: Optional[ProcessSnapshot] = None) -> Dict:
         """
         Lấy thông tin tài nguyên của một instance LDPlayer
         Args:
             name: Tên instance cần kiểm tra
+            snapshot: Ảnh chụp process dùng chung cho cả lượt quét (nếu có)
         Returns:
             Dict chứa thông tin CPU, Memory, Threads và Status
         """
         try:
-            # Kiểm tra instance có tồn tại
-            cmd = [self.ld_path, "isrunning", "--name", name]
-            result = self.execute_command(cmd)
+            # Trạng thái lấy từ cache list2 dùng chung cho mọi instance
+            status = self.status.get(name)
             
             # Nếu instance không chạy, trả về trạng thái stopped
-            if "running" not in result.lower():
+            if not status or not status.running:
                 return {
                     'cpu': 0,
                     'memory': 0,
                     'threads': 0,
                     'status': 'stopped'
                 }
-            
-            # Lấy danh sách processes của LDPlayer
-            ldplayer_processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    if 'ldplayer' in proc.info['name'].lower() or 'dnplayer' in proc.info['name'].lower():
-                        ldplayer_processes.append(proc)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-                
-            # Tìm process chính của instance
-            main_process = None
-            for proc in ldplayer_processes:
-                try:
-                    cmdline = proc.cmdline()
-                    if name in str(cmdline):
-                        main_process = proc
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-                
-            # Nếu tìm thấy process
-            if main_process:
-                try:
-                    # Lấy thông tin tài nguyên
-                    with main_process.oneshot():  # Tối ưu performance
-                        cpu = main_process.cpu_percent(interval=0.5)
-                        mem = main_process.memory_info().rss / 1024 / 1024  # Convert to MB
-                        threads = main_process.num_threads()
-                        
-                        # Tính tổng tài nguyên của cả process con
-                        children = main_process.children(recursive=True)
-                        for child in children:
-                            try:
-                                cpu += child.cpu_percent(interval=0.1)
-                                mem += child.memory_info().rss / 1024 / 1024
-                                threads += child.num_threads()
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                continue
-                            
-                        return {
-                            'cpu': round(cpu, 1),
-                            'memory': round(mem, 1),
-                            'threads': threads,
-                            'status': 'running'
-                        }
-                        
-                except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                    logger.error(f"Error accessing process info for {name}: {e}")
-                
+
+            if snapshot is None:
+                snapshot = self.sampler.current()
+
+            resources = snapshot.resources(name)
+            if resources:
+                return resources
+
             # Nếu không tìm thấy process
             return {
                 'cpu': 0,
@@ -216,7 +443,7 @@ class LDPlayerManager:
             }
             
         except Exception as e:
-            logger.error(f"Failed to get resources for {name}: {e}")
+            logger.error(f"Failed to get resources for {name}: {e}", extra={'instance': name})
             return {
                 'cpu': 0,
                 'memory': 0,
@@ -227,26 +454,142 @@ class LDPlayerManager:
     def get_all_instances_resources(self) -> Dict[str, Dict]:
         """
         Lấy thông tin tài nguyên của tất cả instances
+        Bảng process chỉ được quét một lần cho mỗi lượt
         Returns:
             Dict[instance_name, resource_info]
         """
+        snapshot = self.sampler.current()
         resources = {}
         for name in self.devices:
-            resources[name] = self.get_instance_resources(name)
+            resources[name] = self.get_instance_resources(name, snapshot)
         return resources
 
-    def monitor_resources(self, threshold_cpu: int = 80, threshold_mem: int = 80):
-        """
-        Kiểm tra tài nguyên và cảnh báo nếu vượt ngưỡng
-        Args:
-            threshold_cpu: Ngưỡng CPU (%)
-            threshold_mem: Ngưỡng Memory (%)
-        """
-        for name, resources in self.get_all_instances_resources().items():
-            if resources['status'] == 'running':
-                if resources['cpu'] > threshold_cpu:
-                    logger.warning(f"High CPU usage in {name}: {resources['cpu']}%")
-                if resources['memory'] > threshold_mem:
-                    logger.warning(f"High memory usage in {name}: {resources['memory']}MB")
-
-    
\ No newline at end of file
+    @property
+    def metrics(self):
+        """Lịch sử tài nguyên do sampler ghi vào; numpy chỉ được import khi cần tới"""
+        if self._metrics is None:
+            from .metrics_store import MetricsStore
+            self._metrics = MetricsStore()
+            self.sampler.add_listener(self._metrics.record_snapshot)
+        return self._metrics
+
+    @property
+    def alerts(self):
+        """Engine cảnh báo theo các luật trong config, đánh giá sau mỗi lượt lấy mẫu"""
+        if self._alerts is None:
+            from .alerts import AlertEngine, AlertRule
+            engine = AlertEngine(self.metrics)
+            engine.register_action('restart', self._restart_on_alert)
+            engine.set_rules(AlertRule.from_dict(rule) for rule in settings.alert_rules)
+            self._alerts = engine
+            # Đăng ký sau metrics nên luôn thấy mẫu vừa được ghi
+            self.sampler.add_listener(self._evaluate_alerts)
+        return self._alerts
+
+    @property
+    def workflows(self):
+        """Engine chạy workflow theo từng instance (create -> start -> wait_ready -> install -> run)"""
+        if self._workflows is None:
+            from .workflow import WorkflowEngine
+            self._workflows = WorkflowEngine(self)
+        return self._workflows
+
+    def _evaluate_alerts(self, snapshot: ProcessSnapshot):
+        started = time.perf_counter()
+        self._alerts.evaluate(snapshot.timestamp)
+        self.telemetry.observe('alert_eval_seconds', time.perf_counter() - started)
+
+    def _restart_on_alert(self, alert):
+        """Action 'restart': khởi động lại instance ở executor, không chặn thread sampler"""
+        if alert.state != 'raised':
+            return
+        logger.warning(f"Restarting {alert.instance} after alert {alert.rule.name}",
+                       extra={'instance': alert.instance})
+        self.executor.submit(self._restart_instance, alert.instance)
+
+    def _restart_instance(self, name: str):
+        try:
+            self.stop_instance(name)
+            self.start_instance(name)
+        except InstanceError as e:
+            logger.error(f"Auto-restart of {name} failed: {e}", extra={'instance': name})
+
+    def start_monitoring(self):
+        """Bật lấy mẫu tài nguyên ở thread nền, kèm đánh giá cảnh báo nếu config có luật"""
+        if settings.alert_rules:
+            self.alerts  # tạo engine và đăng ký listener
+        self.sampler.start()
+        if settings.supervisor_enabled:
+            self.supervisor.start()
+
+    def stop_monitoring(self):
+        self.supervisor.stop()
+        self.sampler.stop()
+
+    def start_metrics_server(self) -> Optional[MetricsServer]:
+        """Mở endpoint Prometheus /metrics nếu được bật trong config; lỗi bind chỉ ghi cảnh báo"""
+        if not settings.metrics_enabled:
+            return None
+        if self._metrics_server is None:
+            server = MetricsServer(self.telemetry, settings.metrics_host, settings.metrics_port)
+            try:
+                server.start()
+            except OSError as e:
+                logger.warning(f"Cannot start metrics endpoint on port {settings.metrics_port}: {e}")
+                return None
+            self._metrics_server = server
+        return self._metrics_server
+
+    def stop_metrics_server(self):
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
+
+    def _skip_transition(self, verb: str, name: str):
+        self.telemetry.inc('ldconsole_transitions_skipped_total', {'verb': verb})
+        state = "running" if verb == "launch" else "stopped"
+        logger.info(f"Instance already {state}: {name}", extra={'instance': name})
+
+    def _cached_status(self, name: str) -> Optional[InstanceStatus]:
+        try:
+            return self.status.get(name)
+        except InstanceError as e:
+            logger.warning(f"Status cache unavailable, falling back to direct command: {e}")
+            return None
+
+    def _admission_properties(self, name: Optional[str]) -> Dict:
+        device = self.devices.get(name) if name else None
+        return device.properties if device else settings.default_properties
+
+    def _admission_poll(self):
+        """Trong lúc chờ admission: làm mới list2 (trả slot boot) và mẫu tài nguyên nếu sampler không chạy"""
+        try:
+            self.status.all()
+        except InstanceError:
+            pass
+        if not self.sampler.running:
+            self.sampler.sample()
+
+    def _index_map(self) -> Dict[int, str]:
+        try:
+            # Làm mới list2 nếu cache hết hạn, registry được reconcile theo index thật của ldconsole
+            self.status.all()
+        except InstanceError:
+            pass
+        return self.devices.index_map()
+
+    def _reconcile(self, statuses: Dict[str, InstanceStatus]):
+        for name in self.devices.reconcile(statuses):
+            self.save_state(name)
+
+    def running_instances(self) -> List[str]:
+        """Tên các instance đang chạy theo lần đồng bộ gần nhất, O(1) với registry"""
+        return self.devices.names_with_status("running")
+
+    def instance_for_pid(self, pid: int) -> Optional[str]:
+        """Instance sở hữu pid: pid chính từ list2, hoặc process con theo snapshot gần nhất"""
+        device = self.devices.with_pid(pid)
+        if device is not None:
+            return device.name
+        snapshot = self.sampler.latest
+        return snapshot.owner(pid) if snapshot is not None else None
@@ -0,0 +1,288 @@
+import threading
+import time
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+METRICS = ('cpu', 'memory', 'threads')
+STATS = ('min', 'avg', 'max')
+
+# (độ phân giải tính bằng giây, số điểm giữ lại): 5 phút @1s, 1 giờ @10s, 1 ngày @1 phút
+DEFAULT_RESOLUTIONS = ((1, 300), (10, 360), (60, 1440))
+
+
+class _Ring:
+    """Ring buffer cố định cho một độ phân giải, trục thời gian dùng chung cho mọi instance"""
+
+    def __init__(self, resolution: float, capacity: int, slots: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.times = np.full(capacity, np.nan)
+        # [metric, stat, slot, time]
+        self.values = np.full((len(METRICS), len(STATS), slots, capacity), np.nan)
+        self.head = 0
+        self._bucket: Optional[int] = None
+        self._reset_pending(slots)
+
+    def _reset_pending(self, slots: int):
+        shape = (len(METRICS), slots)
+        self._sum = np.zeros(shape)
+        self._count = np.zeros(shape)
+        self._min = np.full(shape, np.inf)
+        self._max = np.full(shape, -np.inf)
+
+    def grow(self, slots: int):
+        """Mở rộng tới đúng slots, dung lượng do MetricsStore quyết định"""
+        extra = slots - self.values.shape[2]
+        if extra <= 0:
+            return
+        self.values = np.pad(self.values, ((0, 0), (0, 0), (0, extra), (0, 0)),
+                             constant_values=np.nan)
+        self._sum = np.pad(self._sum, ((0, 0), (0, extra)))
+        self._count = np.pad(self._count, ((0, 0), (0, extra)))
+        self._min = np.pad(self._min, ((0, 0), (0, extra)), constant_values=np.inf)
+        self._max = np.pad(self._max, ((0, 0), (0, extra)), constant_values=-np.inf)
+
+    def clear(self, slot: int):
+        """Xóa dữ liệu của slot để instance khác dùng lại"""
+        self.values[:, :, slot, :] = np.nan
+        self._sum[:, slot] = 0
+        self._count[:, slot] = 0
+        self._min[:, slot] = np.inf
+        self._max[:, slot] = -np.inf
+
+    def keep(self, slots: List[int], capacity: int):
+        """Chỉ giữ các slot cho trước (theo thứ tự mới), dung lượng còn lại để trống"""
+        extra = capacity - len(slots)
+        self.values = np.concatenate(
+            [self.values[:, :, slots, :], np.full(self.values.shape[:2] + (extra, self.capacity), np.nan)], axis=2)
+        self._sum = np.concatenate([self._sum[:, slots], np.zeros((len(METRICS), extra))], axis=1)
+        self._count = np.concatenate([self._count[:, slots], np.zeros((len(METRICS), extra))], axis=1)
+        self._min = np.concatenate([self._min[:, slots], np.full((len(METRICS), extra), np.inf)], axis=1)
+        self._max = np.concatenate([self._max[:, slots], np.full((len(METRICS), extra), -np.inf)], axis=1)
+
+    def add(self, timestamp: float, sample: np.ndarray):
+        bucket = int(timestamp // self.resolution)
+        if self._bucket is not None and bucket != self._bucket:
+            self._commit()
+        self._bucket = bucket
+        present = ~np.isnan(sample)
+        self._sum += np.where(present, sample, 0.0)
+        self._count += present
+        self._min = np.fmin(self._min, sample)
+        self._max = np.fmax(self._max, sample)
+
+    def _pending_stats(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = self._sum / self._count
+        empty = self._count == 0
+        stats = np.stack([
+            np.where(empty, np.nan, self._min),
+            np.where(empty, np.nan, avg),
+            np.where(empty, np.nan, self._max)
+        ], axis=1)
+        return stats  # [metric, stat, slot]
+
+    def _pending_stat(self, metric: int, stat: int) -> np.ndarray:
+        """Một cặp (metric, stat) của bucket đang tích lũy, tránh tính cả 9 tổ hợp khi chỉ đọc"""
+        count = self._count[metric]
+        if stat == 0:
+            values = self._min[metric]
+        elif stat == 2:
+            values = self._max[metric]
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = self._sum[metric] / count
+        return np.where(count == 0, np.nan, values)
+
+    def _commit(self):
+        self.values[:, :, :, self.head] = self._pending_stats()
+        self.times[self.head] = self._bucket * self.resolution
+        self.head = (self.head + 1) % self.capacity
+        self._reset_pending(self.values.shape[2])
+
+    def window(self, since: float, metric: int, stat: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Các điểm có timestamp >= since, gồm cả bucket đang tích lũy
+        Returns:
+            (times, values[slot, time]) theo thứ tự thời gian
+        """
+        order = np.roll(np.arange(self.capacity), -self.head)
+        columns = order[self.times[order] >= since]
+        times = self.times[columns]
+        values = self.values[metric, stat][:, columns]
+        if self._bucket is not None:
+            times = np.append(times, self._bucket * self.resolution)
+            values = np.concatenate([values, self._pending_stat(metric, stat)[:, None]], axis=1)
+        return times, values
+
+
+class MetricsStore:
+    """
+    Lịch sử tài nguyên của mọi instance trong các ring buffer NumPy,
+    tự gộp dữ liệu cũ sang các độ phân giải thô hơn (min/avg/max)
+    """
+
+    def __init__(self, resolutions: Iterable[Tuple[float, int]] = DEFAULT_RESOLUTIONS):
+        self._resolutions = sorted(resolutions)
+        self._slots: Dict[str, int] = {}
+        # Tên theo slot; None là slot của instance đã bị xóa, chờ dùng lại
+        self._names: List[Optional[str]] = []
+        self._free: List[int] = []
+        # Số slot đã cấp phát trong ring, >= len(_names)
+        self._capacity = 0
+        self._rings = [_Ring(resolution, capacity, 0) for resolution, capacity in self._resolutions]
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name in self._names if name is not None]
+
+    @property
+    def min_resolution(self) -> float:
+        return self._resolutions[0][0]
+
+    def _slot(self, name: str) -> int:
+        slot = self._slots.get(name)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._names[slot] = name
+            else:
+                slot = len(self._names)
+                self._names.append(name)
+            self._slots[name] = slot
+        return slot
+
+    def release(self, name: str):
+        """
+        Bỏ lịch sử của instance đã bị xóa; slot được dùng lại cho instance mới,
+        khi quá nửa số slot bị bỏ trống thì ring được compact lại
+        """
+        with self._lock:
+            slot = self._slots.pop(name, None)
+            if slot is None:
+                return
+            self._names[slot] = None
+            for ring in self._rings:
+                ring.clear(slot)
+            self._free.append(slot)
+            if len(self._free) * 2 > len(self._names):
+                self._compact()
+
+    def _compact(self):
+        live = [slot for slot, name in enumerate(self._names) if name is not None]
+        self._capacity = len(live)
+        for ring in self._rings:
+            ring.keep(live, self._capacity)
+        self._names = [self._names[slot] for slot in live]
+        self._slots = {name: slot for slot, name in enumerate(self._names)}
+        self._free = []
+
+    def record(self, resources: Dict[str, Dict], timestamp: Optional[float] = None):
+        """
+        Ghi một lượt mẫu cho nhiều instance
+        Args:
+            resources: Dict[instance_name, {'cpu', 'memory', 'threads'}]
+            timestamp: Thời điểm lấy mẫu, mặc định là hiện tại
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            slots = [self._slot(name) for name in resources]
+            # Mở rộng ring một lần cho mọi instance mới; tăng gấp đôi dung lượng để không copy lại mỗi lần
+            if len(self._names) > self._capacity:
+                self._capacity = max(len(self._names), self._capacity * 2)
+                for ring in self._rings:
+                    ring.grow(self._capacity)
+            sample = np.full((len(METRICS), self._capacity), np.nan)
+            for slot, values in zip(slots, resources.values()):
+                for i, metric in enumerate(METRICS):
+                    sample[i, slot] = values.get(metric, np.nan)
+            for ring in self._rings:
+                ring.add(timestamp, sample)
+
+    def record_snapshot(self, snapshot):
+        """Listener cho CpuSampler: ghi tài nguyên mọi instance đang chạy trong snapshot"""
+        resources = {}
+        for name in snapshot.roots:
+            values = snapshot.resources(name)
+            if values:
+                resources[name] = values
+        self.record(resources, snapshot.timestamp)
+
+    def _ring_for(self, seconds: float) -> _Ring:
+        for ring in self._rings:
+            if ring.resolution * ring.capacity >= seconds:
+                return ring
+        return self._rings[-1]
+
+    def aggregate(self, metric: str, seconds: float, agg: str = 'avg',
+                  now: Optional[float] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Gộp một metric trên cửa sổ thời gian cho mọi instance cùng lúc
+        Args:
+            metric: 'cpu', 'memory' hoặc 'threads'
+            seconds: Độ dài cửa sổ
+            agg: 'avg', 'min', 'max' hoặc 'last'
+        Returns:
+            (danh sách tên instance, mảng giá trị tương ứng; NaN nếu không có dữ liệu)
+        """
+        if agg not in ('avg', 'min', 'max', 'last'):
+            raise ValueError(f"Unknown aggregation: {agg}")
+        now = now if now is not None else time.time()
+        stat = STATS.index('avg' if agg == 'last' else agg)
+        with self._lock:
+            ring = self._ring_for(seconds)
+            _, values = ring.window(now - seconds, METRICS.index(metric), stat)
+            live = [slot for slot, name in enumerate(self._names) if name is not None]
+            names = [self._names[slot] for slot in live]
+        values = values[live]
+        if values.shape[1] == 0:
+            return names, np.full(len(names), np.nan)
+
+        # Instance không có dữ liệu trong cửa sổ cho NaN, bỏ qua cảnh báo "empty slice"
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            if agg == 'avg':
+                result = np.nanmean(values, axis=1)
+            elif agg == 'max':
+                result = np.nanmax(values, axis=1)
+            elif agg == 'min':
+                result = np.nanmin(values, axis=1)
+            else:
+                present = ~np.isnan(values)
+                last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+                result = np.where(present.any(axis=1), values[np.arange(len(names)), last], np.nan)
+        return names, result
+
+    def top(self, metric: str, n: int = 10, seconds: float = 300, agg: str = 'avg',
+            now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        N instance có giá trị cao nhất, vd. top('cpu', 10, 300) = 10 instance CPU trung bình cao nhất trong 5 phút
+        """
+        names, values = self.aggregate(metric, seconds, agg, now)
+        filled = np.where(np.isnan(values), -np.inf, values)
+        n = min(n, len(names))
+        if n == 0:
+            return []
+        candidates = np.argpartition(-filled, n - 1)[:n]
+        ordered = candidates[np.argsort(-filled[candidates])]
+        return [(names[i], float(values[i])) for i in ordered if not np.isnan(values[i])]
+
+    def series(self, name: str, metric: str, seconds: float,
+               now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Chuỗi thời gian của một instance
+        Returns:
+            (times, values[stat, time]) với stat theo thứ tự min/avg/max
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            slot = self._slots.get(name)
+            if slot is None:
+                return np.empty(0), np.empty((len(STATS), 0))
+            ring = self._ring_for(seconds)
+            m = METRICS.index(metric)
+            series = [ring.window(now - seconds, m, stat) for stat in range(len(STATS))]
+            return series[0][0], np.stack([values[slot] for _, values in series])
+
@@ -0,0 +1,142 @@
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+import psutil
+
+# Tên process của LDPlayer (dnplayer.exe, LdVBoxHeadless.exe, ...)
+PLAYER_PROCESS_NAMES = ('ldplayer', 'dnplayer')
+
+_TOKEN_SPLIT = re.compile(r'[\s|=,"\']+')
+_INDEX_ARG = re.compile(r'index=(\d+)')
+
+
+@dataclass
+class ProcessInfo:
+    pid: int
+    ppid: int
+    name: str
+    rss: int = 0
+    threads: int = 0
+    cpu_time: float = 0.0
+    cpu_percent: float = 0.0
+
+
+@dataclass
+class ProcessSnapshot:
+    """Ảnh chụp bảng process tại một thời điểm, chỉ quét một lần cho mọi instance"""
+    timestamp: float
+    processes: Dict[int, ProcessInfo] = field(default_factory=dict)
+    roots: Dict[str, int] = field(default_factory=dict)
+    trees: Dict[str, List[int]] = field(default_factory=dict)
+    # pid -> instance sở hữu, gồm cả process con
+    owners: Dict[int, str] = field(default_factory=dict)
+
+    @classmethod
+    def capture(cls, names: Iterable[str], indexes: Optional[Dict[int, str]] = None,
+                process_iter: Optional[Callable] = None) -> 'ProcessSnapshot':
+        """
+        Quét bảng process đúng một lần và dựng index instance -> cây process
+        Args:
+            names: Tên các instance cần theo dõi
+            indexes: Map index ldconsole -> tên instance (cho cmdline dạng index=N)
+            process_iter: Thay thế psutil.process_iter (dùng cho benchmark)
+        Returns:
+            ProcessSnapshot
+        """
+        wanted = set(names)
+        indexes = indexes or {}
+        process_iter = process_iter or psutil.process_iter
+        snapshot = cls(timestamp=time.time())
+
+        handles = {}
+        children: Dict[int, List[int]] = {}
+        candidates: Dict[str, List[int]] = {}
+
+        for proc in process_iter(['pid', 'ppid', 'name']):
+            info = proc.info
+            pid, ppid = info['pid'], info['ppid'] or 0
+            pname = info['name'] or ''
+            handles[pid] = proc
+            children.setdefault(ppid, []).append(pid)
+            snapshot.processes[pid] = ProcessInfo(pid=pid, ppid=ppid, name=pname)
+
+            lowered = pname.lower()
+            if not any(player in lowered for player in PLAYER_PROCESS_NAMES):
+                continue
+            try:
+                cmdline = ' '.join(proc.cmdline())
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            owner = None
+            match = _INDEX_ARG.search(cmdline)
+            if match:
+                owner = indexes.get(int(match.group(1)))
+            if owner is None:
+                hits = wanted.intersection(_TOKEN_SPLIT.split(cmdline))
+                owner = hits.pop() if hits else None
+            if owner is not None:
+                candidates.setdefault(owner, []).append(pid)
+
+        # Process gốc là process có parent không thuộc cùng instance
+        for owner, pids in candidates.items():
+            pid_set = set(pids)
+            root = next((pid for pid in pids
+                         if snapshot.processes[pid].ppid not in pid_set), pids[0])
+            snapshot.roots[owner] = root
+
+        for owner, root in snapshot.roots.items():
+            tree, stack = [], [root]
+            while stack:
+                pid = stack.pop()
+                tree.append(pid)
+                stack.extend(children.get(pid, ()))
+            snapshot.trees[owner] = tree
+            for pid in tree:
+                snapshot.owners[pid] = owner
+                snapshot._fill(snapshot.processes[pid], handles[pid])
+
+        return snapshot
+
+    @staticmethod
+    def _fill(info: ProcessInfo, proc):
+        try:
+            with proc.oneshot():
+                info.rss = proc.memory_info().rss
+                info.threads = proc.num_threads()
+                times = proc.cpu_times()
+                info.cpu_time = times.user + times.system
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+
+    def root_pid(self, name: str) -> Optional[int]:
+        return self.roots.get(name)
+
+    def owner(self, pid: int) -> Optional[str]:
+        return self.owners.get(pid)
+
+    def tree(self, name: str) -> List[int]:
+        return self.trees.get(name, [])
+
+    def resources(self, name: str) -> Optional[Dict]:
+        """
+        Tổng hợp tài nguyên của instance từ index đã dựng
+        Returns:
+            Dict cpu/memory/threads/status, hoặc None nếu không tìm thấy process
+        """
+        tree = self.trees.get(name)
+        if not tree:
+            return None
+        cpu = mem = 0.0
+        threads = 0
+        for pid in tree:
+            info = self.processes[pid]
+            cpu += info.cpu_percent
+            mem += info.rss / 1024 / 1024  # Convert to MB
+            threads += info.threads
+        return {
+            'cpu': round(cpu, 1),
+            'memory': round(mem, 1),
+            'threads': threads,
+            'status': 'running'
+        }
@@ -0,0 +1,89 @@
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from .status_provider import StatusProvider
+from .exceptions import InstanceError
+from utils.logger import logger
+
+
+class ReadinessWaiter:
+    """
+    Chờ instance boot xong bằng cách poll trạng thái list2 với backoff tăng dần
+    Instance được coi là sẵn sàng khi Android đã boot, có player pid và cửa sổ top
+    """
+
+    def __init__(self, status: StatusProvider, timeout: float = 120.0,
+                 initial_delay: float = 0.5, max_delay: float = 5.0, factor: float = 2.0):
+        self.status = status
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+
+    def is_ready(self, name: str) -> bool:
+        try:
+            status = self.status.get(name)
+        except InstanceError as e:
+            logger.warning(f"Readiness check failed for {name}: {e}", extra={'instance': name})
+            return False
+        return bool(status and status.android_started
+                    and status.player_pid > 0 and status.top_window != 0)
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial_delay
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.max_delay)
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        Chờ (blocking) tới khi instance sẵn sàng hoặc hết thời gian
+        Returns:
+            True nếu sẵn sàng trước deadline
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        for delay in self.delays():
+            if self.is_ready(name):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Instance {name} not ready after {timeout or self.timeout}s",
+                               extra={'instance': name})
+                return False
+            time.sleep(min(delay, remaining))
+
+    async def wait_until_ready(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Phiên bản awaitable của wait(), lệnh list2 chạy trong thread pool của event loop"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        for delay in self.delays():
+            if await loop.run_in_executor(None, self.is_ready, name):
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.warning(f"Instance {name} not ready after {timeout or self.timeout}s",
+                               extra={'instance': name})
+                return False
+            await asyncio.sleep(min(delay, remaining))
+
+    async def wait_until_ready_many(self, names: Iterable[str], timeout: Optional[float] = None,
+                                    on_ready: Optional[Callable[[str], None]] = None) -> Dict[str, bool]:
+        """
+        Chờ nhiều instance cùng lúc; các lần poll dùng chung cache list2
+        Args:
+            names: Danh sách instance
+            timeout: Deadline cho từng instance
+            on_ready: Gọi ngay khi một instance sẵn sàng để luồng tiếp theo chạy tiếp
+        Returns:
+            Dict[instance_name, ready]
+        """
+        import asyncio
+
+        async def wait_one(name: str):
+            ready = await self.wait_until_ready(name, timeout)
+            if ready and on_ready:
+                on_ready(name)
+            return name, ready
+
+        results = await asyncio.gather(*(wait_one(name) for name in names))
+        return dict(results)
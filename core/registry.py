@@ -0,0 +1,150 @@
+import threading
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set
+from .device import Device
+from .exceptions import InstanceError
+from .status_provider import InstanceStatus
+from utils.logger import logger
+
+
+class DeviceRegistry(Mapping):
+    """
+    Danh sách instance theo tên, kèm index phụ theo index ldconsole, pid và status.
+    Đọc như một dict name -> Device; index phụ được cập nhật ngay khi Device bị sửa
+    nên các truy vấn "instance nào đang chạy", "pid X của ai" đều là O(1)
+    """
+
+    def __init__(self, devices: Iterable[Device] = ()):
+        self._lock = threading.RLock()
+        self._by_name: Dict[str, Device] = {}
+        self._by_index: Dict[int, str] = {}
+        self._by_pid: Dict[int, str] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        for device in devices:
+            self.add(device)
+
+    def __getitem__(self, name: str) -> Device:
+        return self._by_name[name]
+
+    def __iter__(self) -> Iterator[str]:
+        # Duyệt trên bản sao để thread khác thêm/xóa không làm hỏng vòng lặp
+        return iter(list(self._by_name))
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._by_name
+
+    def add(self, device: Device) -> Device:
+        with self._lock:
+            if device.name in self._by_name:
+                raise InstanceError(f"Instance {device.name} already exists")
+            owner = self._by_index.get(device.index)
+            if owner is not None:
+                raise InstanceError(f"Index {device.index} is already used by {owner}")
+            object.__setattr__(device, '_registry', self)
+            self._by_name[device.name] = device
+            self._by_index[device.index] = device.name
+            if device.pid:
+                self._by_pid[device.pid] = device.name
+            self._by_status.setdefault(device.status, set()).add(device.name)
+        return device
+
+    def remove(self, name: str) -> Optional[Device]:
+        with self._lock:
+            device = self._by_name.pop(name, None)
+            if device is None:
+                return None
+            self._discard(self._by_index, device.index, name)
+            self._discard(self._by_pid, device.pid, name)
+            self._by_status.get(device.status, set()).discard(name)
+            object.__setattr__(device, '_registry', None)
+        return device
+
+    def load(self, devices: Iterable[Device]):
+        """
+        Nạp lại toàn bộ từ state đã lưu. Index trùng (do cách đánh index cũ) được cấp lại
+        và sẽ được sửa đúng theo ldconsole ở lần reconcile kế tiếp
+        """
+        with self._lock:
+            for name in list(self._by_name):
+                self.remove(name)
+            for device in devices:
+                if device.index in self._by_index:
+                    logger.warning(f"Duplicate index {device.index} for {device.name}, reassigning")
+                    object.__setattr__(device, 'index', self.next_index())
+                self.add(device)
+
+    def next_index(self) -> int:
+        """Index tạm cho instance mới; index thật được lấy từ list2 khi reconcile"""
+        with self._lock:
+            return max(self._by_index, default=-1) + 1
+
+    def with_index(self, index: int) -> Optional[Device]:
+        name = self._by_index.get(index)
+        return self._by_name.get(name) if name is not None else None
+
+    def with_pid(self, pid: int) -> Optional[Device]:
+        name = self._by_pid.get(pid)
+        return self._by_name.get(name) if name is not None else None
+
+    def with_status(self, status: str) -> List[Device]:
+        with self._lock:
+            return [self._by_name[name] for name in self._by_status.get(status, ())]
+
+    def names_with_status(self, status: str) -> List[str]:
+        with self._lock:
+            return list(self._by_status.get(status, ()))
+
+    def index_map(self) -> Dict[int, str]:
+        """Map index ldconsole -> tên instance"""
+        with self._lock:
+            return dict(self._by_index)
+
+    def reconcile(self, statuses: Mapping[str, InstanceStatus]) -> List[str]:
+        """
+        Đồng bộ index, pid và trạng thái chạy/dừng theo kết quả list2
+        Returns:
+            Tên các instance có thay đổi (để lưu lại state)
+        """
+        changed = []
+        with self._lock:
+            for name, status in statuses.items():
+                device = self._by_name.get(name)
+                if device is None:
+                    continue
+                pid = status.player_pid if status.player_pid > 0 else None
+                running = 'running' if status.running else 'stopped'
+                # Trạng thái khác (created, error, ...) chỉ bị ghi đè khi ldconsole báo đang chạy
+                state = running if running == 'running' or device.status == 'running' else device.status
+                if (device.index, device.pid, device.status) == (status.index, pid, state):
+                    continue
+                device.index = status.index
+                device.pid = pid
+                device.status = state
+                changed.append(name)
+        return changed
+
+    def _reindex(self, device: Device, key: str, value):
+        with self._lock:
+            old = getattr(device, key)
+            object.__setattr__(device, key, value)
+            if old == value:
+                return
+            name = device.name
+            if key == 'index':
+                self._discard(self._by_index, old, name)
+                self._by_index[value] = name
+            elif key == 'pid':
+                self._discard(self._by_pid, old, name)
+                if value:
+                    self._by_pid[value] = name
+            else:
+                self._by_status.get(old, set()).discard(name)
+                self._by_status.setdefault(value, set()).add(name)
+
+    @staticmethod
+    def _discard(index: Dict, key, name: str):
+        # Chỉ xóa khi key còn trỏ tới chính instance này (có thể đã bị instance khác chiếm)
+        if key is not None and index.get(key) == name:
+            del index[key]
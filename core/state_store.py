@@ -0,0 +1,153 @@
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+from utils.logger import logger
+
+
+class StateStore:
+    """
+    Lưu state instance theo kiểu write-behind:
+    - put/delete chỉ đánh dấu thay đổi, thread nền flush theo flush_interval
+    - mỗi lần flush chỉ append các bản ghi đã đổi vào journal
+    - journal được gộp lại (compact) vào file snapshot bằng ghi file tạm + os.replace
+    """
+
+    def __init__(self, path: str = 'data/instances.json', flush_interval: float = 1.0,
+                 compact_every: int = 1000):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + '.journal'
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self._records: Dict[str, Dict] = {}
+        self._dirty: Dict[str, Optional[Dict]] = {}
+        self._journal_entries = 0
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Đọc snapshot rồi replay journal
+        Returns:
+            Dict[instance_name, record]
+        """
+        records = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                records = json.load(f)
+
+        entries = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+') as f:
+                content = f.read()
+                # Dòng cuối có thể bị ghi dở khi crash, cắt bỏ để lần append sau không dính vào
+                complete = content.rfind('\n') + 1
+                if complete < len(content):
+                    logger.warning(f"Dropping truncated journal entry in {self.journal_path}")
+                    f.truncate(complete)
+                for line in content[:complete].splitlines():
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping corrupt journal entry in {self.journal_path}")
+                        continue
+                    if entry['op'] == 'put':
+                        records[entry['name']] = entry['data']
+                    else:
+                        records.pop(entry['name'], None)
+                    entries += 1
+
+        with self._lock:
+            self._records = dict(records)
+            self._journal_entries = entries
+        return records
+
+    def put(self, name: str, record: Dict):
+        # Giữ bản sao: caller sửa dict sau khi put không làm đổi bản ghi đang chờ flush
+        record = copy.deepcopy(record)
+        with self._lock:
+            self._records[name] = record
+            self._dirty[name] = record
+        if not self.flush_interval:
+            self.flush()
+
+    def delete(self, name: str):
+        with self._lock:
+            self._records.pop(name, None)
+            self._dirty[name] = None
+        if not self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Append các thay đổi chưa ghi vào journal, compact khi journal quá dài"""
+        with self._io_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+            if not dirty:
+                return
+
+            lines = []
+            for name, record in dirty.items():
+                if record is None:
+                    lines.append(json.dumps({'op': 'delete', 'name': name}))
+                else:
+                    lines.append(json.dumps({'op': 'put', 'name': name, 'data': record}))
+            with open(self.journal_path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_entries += len(lines)
+
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        with self._io_lock:
+            self._compact()
+
+    def _compact(self):
+        directory = os.path.dirname(self.path) or '.'
+        # Giữ lock từ lúc chụp snapshot tới khi xóa journal: put/delete chen vào giữa
+        # không thể rơi vào khoảng đã bị xóa khỏi journal mà chưa có trong snapshot
+        with self._lock:
+            count = len(self._records)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.instances-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._records, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            # Snapshot đã chứa mọi thay đổi, journal có thể xóa
+            open(self.journal_path, 'w').close()
+            self._journal_entries = 0
+        logger.debug(f"Compacted state of {count} instances")
+
+    def start(self):
+        if self._thread is not None or not self.flush_interval:
+            return
+        self._thread = threading.Thread(target=self._run, name='StateStore', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Failed to flush state: {e}")
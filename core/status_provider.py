@@ -0,0 +1,102 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from utils.logger import logger
+
+
+@dataclass
+class InstanceStatus:
+    index: int
+    name: str
+    top_window: int
+    bind_window: int
+    android_started: bool
+    player_pid: int
+    vbox_pid: int
+
+    @property
+    def running(self) -> bool:
+        return self.player_pid > 0 or self.top_window != 0
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def parse_list2(output: str) -> Dict[str, InstanceStatus]:
+    """
+    Parse kết quả `ldconsole list2`
+    Mỗi dòng: index,title,top_hwnd,bind_hwnd,android_started,pid,vbox_pid[,width,height,dpi]
+    Returns:
+        Dict[instance_name, InstanceStatus]
+    """
+    statuses = {}
+    for line in output.splitlines():
+        fields = line.strip().split(',')
+        if len(fields) < 7 or not fields[0].strip().isdigit():
+            continue
+        status = InstanceStatus(
+            index=int(fields[0]),
+            name=fields[1],
+            top_window=_to_int(fields[2]),
+            bind_window=_to_int(fields[3]),
+            android_started=fields[4].strip() == '1',
+            player_pid=_to_int(fields[5]),
+            vbox_pid=_to_int(fields[6])
+        )
+        statuses[status.name] = status
+    return statuses
+
+
+class StatusProvider:
+    """Trạng thái của mọi instance từ một lần gọi `list2`, cache trong `ttl` giây"""
+
+    def __init__(self, execute: Callable[[List[str]], str], ld_path: str, ttl: float = 1.0):
+        self.execute = execute
+        self.ld_path = ld_path
+        self.ttl = ttl
+        self._statuses: Dict[str, InstanceStatus] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, InstanceStatus]], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, InstanceStatus]], None]):
+        """Gọi sau mỗi lần list2 thật sự được chạy lại (không gọi khi trả về từ cache)"""
+        self._listeners.append(listener)
+
+    def refresh(self) -> Dict[str, InstanceStatus]:
+        """Bỏ qua cache và gọi lại list2"""
+        self.invalidate()
+        return self.all()
+
+    def all(self) -> Dict[str, InstanceStatus]:
+        # Giữ lock khi refresh để các caller đồng thời dùng chung một lần gọi list2
+        with self._lock:
+            if time.monotonic() - self._fetched_at < self.ttl:
+                return self._statuses
+            output = self.execute([self.ld_path, "list2"])
+            self._statuses = parse_list2(output)
+            self._fetched_at = time.monotonic()
+            logger.debug(f"Refreshed status of {len(self._statuses)} instances")
+            statuses = self._statuses
+        for listener in self._listeners:
+            try:
+                listener(statuses)
+            except Exception as e:
+                logger.error(f"Status listener failed: {e}")
+        return statuses
+
+    def get(self, name: str) -> Optional[InstanceStatus]:
+        return self.all().get(name)
+
+    def is_running(self, name: str) -> bool:
+        status = self.get(name)
+        return bool(status and status.running)
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
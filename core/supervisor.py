@@ -0,0 +1,328 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Set
+import psutil
+from .exceptions import InstanceError
+from .process_snapshot import PLAYER_PROCESS_NAMES
+from .status_provider import InstanceStatus
+from .telemetry import Telemetry
+from utils.logger import logger
+
+if TYPE_CHECKING:
+    from .ld_manager import LDPlayerManager
+
+
+def player_process(pid: Optional[int]) -> Optional[psutil.Process]:
+    """
+    Process player còn sống ứng với pid đã lưu, None nếu đã thoát, là zombie
+    hoặc pid đã bị process khác dùng lại (sau khi máy khởi động lại)
+    """
+    if not pid or pid <= 0:
+        return None
+    try:
+        process = psutil.Process(pid)
+        if process.status() == psutil.STATUS_ZOMBIE:
+            return None
+        name = process.name().lower()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    return process if any(player in name for player in PLAYER_PROCESS_NAMES) else None
+
+
+class ProcessSupervisor:
+    """
+    Theo dõi process player của các instance đang chạy bằng cách chờ chặn trên pid
+    (psutil.wait_procs ở một thread riêng) thay vì hỏi isrunning từng instance.
+    Instance thoát mà không qua stop_instance được coi là crash và start lại với backoff
+    tăng dần; crash quá max_restarts lần trong window giây thì dừng hẳn (status "crashed")
+    """
+
+    def __init__(self, manager: 'LDPlayerManager', restart: bool = True, max_restarts: int = 5,
+                 window: float = 600, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 expect_timeout: float = 60.0, wait_slice: float = 1.0, telemetry: Optional[Telemetry] = None):
+        self.manager = manager
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.expect_timeout = expect_timeout
+        self.wait_slice = wait_slice
+        self.telemetry = telemetry or Telemetry()
+        self._lock = threading.Lock()
+        # Instance -> process player đang được chờ
+        self._processes: Dict[str, psutil.Process] = {}
+        # Instance vừa launch, chưa biết pid -> thời điểm launch
+        self._expected: Dict[str, float] = {}
+        self._crashes: Dict[str, Deque[float]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        # Thời điểm phát hiện crash, để đo thời gian khôi phục
+        self._crashed_at: Dict[str, float] = {}
+        # Instance đang được stop chủ động: không theo dõi lại, lần thoát không phải crash
+        self._stopping: Set[str] = set()
+        # Tăng mỗi lần forget: lần restart đã lên lịch/đã giao cho executor trước đó bị bỏ
+        self._generations: Dict[str, int] = {}
+        self._changed = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.telemetry.describe('supervisor_exits_total', 'Player processes that exited without stop_instance')
+        self.telemetry.describe('supervisor_restarts_total', 'Automatic restarts after a crash by result')
+        self.telemetry.describe('supervisor_recovery_seconds', 'Time from crash detection to the instance running again')
+        self.telemetry.describe('supervisor_tracked', 'Player processes being waited on')
+        self.telemetry.gauge('supervisor_tracked', lambda: len(self._processes))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def reconcile(self) -> List[str]:
+        """
+        Đồng bộ state đã lưu với process thật trong một lượt: một lần list2 cho cả fleet
+        (registry được cập nhật qua listener của StatusProvider), rồi kiểm tra pid bằng psutil
+        Returns:
+            Tên các instance được sửa từ running sang stopped
+        """
+        started = time.perf_counter()
+        try:
+            self.manager.status.refresh()
+        except InstanceError as e:
+            logger.warning(f"list2 unavailable during reconcile, checking pids only: {e}")
+        corrected = []
+        for name in self.manager.running_instances():
+            device = self.manager.devices.get(name)
+            process = player_process(device.pid) if device else None
+            if process is None:
+                if device is not None:
+                    device.status = "stopped"
+                    device.pid = None
+                    self.manager.save_state(name)
+                corrected.append(name)
+            else:
+                self._track(name, process)
+        logger.info(f"Reconciled {len(self.manager.devices)} instances in "
+                    f"{(time.perf_counter() - started) * 1000:.0f} ms: {len(self._processes)} running, "
+                    f"{len(corrected)} stale")
+        return corrected
+
+    def expect(self, name: str):
+        """Instance vừa được launch: pid sẽ có ở lần list2 kế tiếp"""
+        if not self.running:
+            return
+        with self._lock:
+            self._expected[name] = time.monotonic()
+        self._changed.set()
+
+    def forget(self, name: str):
+        """Ngừng theo dõi (gọi trước khi stop/remove chủ động) và hủy lần restart đang chờ"""
+        with self._lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+            self._processes.pop(name, None)
+            self._expected.pop(name, None)
+            self._crashed_at.pop(name, None)
+            timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+
+    @contextmanager
+    def stopping(self, name: str):
+        """
+        Bao quanh một lần stop chủ động: list2 chạy giữa chừng không theo dõi lại player
+        và player thoát trong lúc này không bị coi là crash
+        """
+        with self._lock:
+            self._stopping.add(name)
+        self.forget(name)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stopping.discard(name)
+
+    def on_status(self, statuses: Dict[str, InstanceStatus]):
+        """Listener của StatusProvider: nhận pid của instance đang chạy mà chưa được theo dõi"""
+        if not self.running:
+            return
+        for name, status in statuses.items():
+            if not status.running or status.player_pid <= 0:
+                continue
+            with self._lock:
+                if name in self._stopping:
+                    continue
+                current = self._processes.get(name)
+                if current is not None and current.pid == status.player_pid:
+                    continue
+                expected = self._expected.pop(name, None) is not None
+            if current is None and not expected and self.manager.devices.get(name) is None:
+                continue
+            process = player_process(status.player_pid)
+            if process is not None:
+                self._track(name, process)
+
+    def start(self):
+        """Reconcile một lượt rồi bắt đầu chờ các process ở thread nền"""
+        if self.running:
+            return
+        self.reconcile()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ProcessSupervisor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._changed.set()
+        with self._lock:
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=self.wait_slice + 1)
+            self._thread = None
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                'tracked': {name: process.pid for name, process in self._processes.items()},
+                'expected': sorted(self._expected),
+                'restarting': sorted(self._timers),
+                'crashes': {name: len(times) for name, times in self._crashes.items() if times}
+            }
+
+    def _track(self, name: str, process: psutil.Process):
+        with self._lock:
+            self._processes[name] = process
+            self._expected.pop(name, None)
+            crashed_at = self._crashed_at.pop(name, None)
+        if crashed_at is not None:
+            self.telemetry.observe('supervisor_recovery_seconds', time.monotonic() - crashed_at)
+        self._changed.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._changed.clear()
+            with self._lock:
+                processes = list(self._processes.values())
+                expecting = self._expire_expected()
+            if expecting:
+                # Chỉ hỏi list2 khi có instance vừa launch mà chưa biết pid
+                try:
+                    self.manager.status.all()
+                except InstanceError:
+                    pass
+            if not processes:
+                # Không có gì để chờ: ngủ tới khi có instance mới được theo dõi
+                self._changed.wait(self.wait_slice if expecting else None)
+                continue
+            try:
+                gone, alive = psutil.wait_procs(processes, timeout=self.wait_slice)
+            except Exception as e:
+                logger.error(f"Waiting on player processes failed: {e}")
+                self._stop_event.wait(self.wait_slice)
+                continue
+            # Player không phải process con nên khi thoát có thể còn là zombie tới khi được reap
+            gone = list(gone) + [process for process in alive if _is_zombie(process)]
+            for process in gone:
+                self._on_exit(process)
+
+    def _expire_expected(self) -> bool:
+        now = time.monotonic()
+        for name in [name for name, since in self._expected.items() if now - since > self.expect_timeout]:
+            logger.warning(f"No player pid for {name} {self.expect_timeout}s after launch, not supervising it",
+                           extra={'instance': name})
+            del self._expected[name]
+        return bool(self._expected)
+
+    def _on_exit(self, process: psutil.Process):
+        with self._lock:
+            name = next((name for name, tracked in self._processes.items() if tracked is process), None)
+            if name is None:
+                # Đã forget (stop chủ động) trong lúc đang chờ
+                return
+            del self._processes[name]
+            if name in self._stopping:
+                return
+        device = self.manager.devices.get(name)
+        if device is None:
+            return
+
+        self.telemetry.inc('supervisor_exits_total')
+        logger.warning(f"Player process {process.pid} of {name} exited unexpectedly", extra={'instance': name})
+        device.status = "stopped"
+        device.pid = None
+        self.manager.save_state(name)
+        # Bỏ trạng thái cũ đã cache để start_instance không tưởng instance vẫn chạy
+        self.manager.status.invalidate()
+        self.manager.commands.invalidate(name)
+        self.manager.admission.release(name)
+        self.manager._close_shell(name)
+        if self.restart:
+            self._schedule_restart(name)
+
+    def _schedule_restart(self, name: str):
+        now = time.monotonic()
+        with self._lock:
+            crashes = self._crashes.setdefault(name, deque())
+            crashes.append(now)
+            while crashes and now - crashes[0] > self.window:
+                crashes.popleft()
+            count = len(crashes)
+            if count > self.max_restarts:
+                self._crashed_at.pop(name, None)
+                # Start thủ công sau đó được tính lại từ đầu
+                del self._crashes[name]
+                give_up = True
+            else:
+                give_up = False
+                self._crashed_at.setdefault(name, now)
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (count - 1))
+                timer = threading.Timer(delay, self._restart, args=(name, self._generations.get(name, 0)))
+                timer.daemon = True
+                self._timers[name] = timer
+
+        if give_up:
+            self.telemetry.inc('supervisor_restarts_total', {'result': 'given_up'})
+            logger.error(f"{name} crashed {count} times in {self.window:.0f}s, not restarting it again",
+                         extra={'instance': name})
+            device = self.manager.devices.get(name)
+            if device is not None:
+                device.status = "crashed"
+                self.manager.save_state(name)
+            return
+        logger.info(f"Restarting {name} in {delay:.1f}s (crash {count}/{self.max_restarts})",
+                    extra={'instance': name})
+        timer.start()
+
+    def _restart(self, name: str, generation: int):
+        with self._lock:
+            if self._timers.pop(name, None) is None:
+                return
+        # start_instance có thể phải chờ admission, không chạy trên thread của timer
+        self.manager.executor.submit(self._restart_now, name, generation)
+
+    def _restart_now(self, name: str, generation: int):
+        with self._lock:
+            # stop/remove chủ động sau khi timer đã chạy: instance không được bật lại
+            superseded = self._generations.get(name, 0) != generation or name in self._stopping
+        if superseded or self._stop_event.is_set() or name not in self.manager.devices:
+            return
+        try:
+            self.manager.start_instance(name)
+            self.telemetry.inc('supervisor_restarts_total', {'result': 'ok'})
+        except Exception as e:
+            # CommandTimeout, OSError, ... cũng phải qua backoff và giới hạn restart, không được mất lặng lẽ
+            self.telemetry.inc('supervisor_restarts_total', {'result': 'failed'})
+            logger.error(f"Restart of {name} failed: {e}", extra={'instance': name})
+            # Lần start lỗi cũng tính vào giới hạn crash
+            self._schedule_restart(name)
+
+
+def _is_zombie(process: psutil.Process) -> bool:
+    try:
+        return process.status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+    except psutil.AccessDenied:
+        return False
@@ -0,0 +1,196 @@
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.logger import logger
+
+# Bucket (giây) đủ rộng cho cả list2 vài chục ms lẫn launch/install vài chục giây
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """Histogram bucket cố định kiểu Prometheus (đếm không cộng dồn, cộng dồn khi xuất)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Ước lượng quantile bằng nội suy tuyến tính trong bucket, giống histogram_quantile"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return result
+
+
+class Telemetry:
+    """
+    Bộ đếm, gauge và histogram trong bộ nhớ cho lệnh ldconsole và vòng monitor.
+    Ghi chỉ tốn một lần lấy lock, đọc (panel/endpoint) lấy bản chụp
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def gauge(self, name: str, read: Callable[[], float]):
+        """Gauge được đọc lúc xuất số liệu, ví dụ số lệnh đang chờ trong executor"""
+        self._gauges[name] = read
+
+    def histogram(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[Histogram]:
+        with self._lock:
+            return self._histograms.get(name, {}).get(_labels(labels))
+
+    def snapshot(self) -> Dict:
+        """
+        Bản chụp cho GUI/CLI
+        Returns:
+            Dict gồm histograms {name: [(labels, count, sum, p50, p95)]},
+            counters {name: [(labels, value)]} và gauges {name: value}
+        """
+        with self._lock:
+            histograms = {
+                name: [(dict(key), h.count, h.sum, h.quantile(0.5), h.quantile(0.95))
+                       for key, h in series.items()]
+                for name, series in self._histograms.items()
+            }
+            counters = {name: [(dict(key), value) for key, value in series.items()]
+                        for name, series in self._counters.items()}
+        gauges = {name: self._read_gauge(read) for name, read in self._gauges.items()}
+        return {'histograms': histograms, 'counters': counters, 'gauges': gauges}
+
+    def render_prometheus(self) -> str:
+        """Xuất toàn bộ số liệu theo định dạng text của Prometheus"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, 'counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, 'histogram')
+                for key, histogram in sorted(series.items()):
+                    for bound, total in histogram.cumulative():
+                        le = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {total}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        for name, read in sorted(self._gauges.items()):
+            self._header(lines, name, 'gauge')
+            lines.append(f"{name} {self._read_gauge(read)}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    @staticmethod
+    def _read_gauge(read: Callable[[], float]) -> float:
+        try:
+            return read()
+        except Exception:
+            return float('nan')
+
+
+class MetricsServer:
+    """HTTP server nhỏ chạy ở thread nền, trả về /metrics cho Prometheus"""
+
+    def __init__(self, telemetry: Telemetry, host: str = '127.0.0.1', port: int = 9464):
+        self.telemetry = telemetry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._server is not None:
+            return
+        # http.server kéo theo email/html..., chỉ import khi bật endpoint
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        telemetry = self.telemetry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='MetricsServer', daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics endpoint: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
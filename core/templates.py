@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from .executor import CommandResult
+from .exceptions import InstanceError
+from .state_store import StateStore
+from utils.logger import logger
+
+
+class TemplateManager:
+    """
+    Golden template: cấu hình và cài app cho một instance, sau đó tạo hàng loạt instance
+    bằng cách copy template thay vì create + boot + install từng cái
+    """
+
+    def __init__(self, manager, path: str = 'data/templates.json', copy_concurrency: int = 2):
+        self.manager = manager
+        self.store = StateStore(path, flush_interval=0)
+        # Copy là thao tác nặng về disk, giới hạn riêng so với số worker của executor
+        self._copy_slots = threading.BoundedSemaphore(copy_concurrency)
+        self._templates: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def templates(self) -> Dict[str, Dict]:
+        with self._lock:
+            if self._templates is None:
+                os.makedirs(os.path.dirname(self.store.path) or '.', exist_ok=True)
+                self._templates = self.store.load()
+            return self._templates
+
+    def prepare_template(self, name: str, apk_paths: Optional[List[str]] = None,
+                         properties: Optional[Dict] = None) -> Dict:
+        """
+        Tạo instance template: create, boot, cài app rồi dừng lại để làm bản gốc
+        Args:
+            name: Tên template
+            apk_paths: Các APK cần cài sẵn
+            properties: Thuộc tính của template
+        """
+        if name not in self.manager.devices:
+            self.manager.create_instance(name, properties)
+        if apk_paths:
+            self.manager.start_instance(name)
+            if not self.manager.readiness.wait(name):
+                raise InstanceError(f"Template {name} did not become ready")
+            for apk_path in apk_paths:
+                result = self.manager.installer.deploy(apk_path, [name])[name]
+                if not result.ok:
+                    raise InstanceError(f"Failed to install {apk_path} on template {name}: {result.error}")
+        return self.register_template(name)
+
+    def register_template(self, name: str) -> Dict:
+        """Đánh dấu một instance đã cấu hình sẵn là template (instance sẽ bị dừng nếu đang chạy)"""
+        device = self.manager.devices.get(name)
+        if not device:
+            raise InstanceError(f"Instance {name} does not exist")
+        if self.manager.status.is_running(name):
+            self.manager.stop_instance(name)
+
+        record = {
+            'properties': dict(device.properties),
+            'apps': self.manager.installer.installed(name),
+            'created_at': time.time()
+        }
+        self.templates[name] = record
+        self.store.put(name, record)
+        logger.info(f"Registered template: {name}")
+        return record
+
+    def provision(self, template: str, names: List[str],
+                  overrides: Optional[Dict] = None) -> Dict[str, CommandResult]:
+        """
+        Tạo nhiều instance từ template, nhiều bản copy chạy cùng lúc nhưng bị giới hạn bởi copy_concurrency
+        Args:
+            template: Tên template
+            names: Tên các instance mới
+            overrides: Thuộc tính áp dụng cho mọi instance mới
+        Returns:
+            Dict[instance_name, CommandResult]
+        """
+        record = self.templates.get(template)
+        if record is None:
+            raise InstanceError(f"Template {template} does not exist")
+        if self.manager.status.is_running(template):
+            self.manager.stop_instance(template)
+
+        # Slot copy được giữ từ lúc submit nên worker của executor không phải ngồi chờ disk,
+        # status poll và job GUI vẫn có worker để chạy
+        results = self.manager.executor.map(self._copy, names, template, slots=self._copy_slots)
+        copied = [name for name, result in results.items() if result.ok]
+
+        # Ghi đè thuộc tính hàng loạt sau khi copy xong, không còn bị giới hạn bởi disk
+        if overrides and copied:
+            modified = self.manager.executor.map(self.manager.modify_instance, copied, overrides)
+            for name, result in modified.items():
+                if not result.ok:
+                    results[name] = result
+
+        logger.info(f"Provisioned {len(copied)}/{len(names)} instances from template {template}")
+        return results
+
+    def clone(self, template: str, name: str, overrides: Optional[Dict] = None):
+        """Tạo một instance từ template (dùng cho từng instance trong workflow)"""
+        if template not in self.templates:
+            raise InstanceError(f"Template {template} does not exist")
+        if self.manager.status.is_running(template):
+            self.manager.stop_instance(template)
+        device = self._copy_one(name, template)
+        if overrides:
+            self.manager.modify_instance(name, overrides)
+        return device
+
+    def _copy_one(self, name: str, template: str):
+        with self._copy_slots:
+            return self._copy(name, template)
+
+    def _copy(self, name: str, template: str):
+        device = self.manager.clone_instance(name, template)
+        # Instance copy mang sẵn app của template, ghi nhận để lần deploy sau bỏ qua
+        self.manager.installer.copy_records(template, name)
+        return device
@@ -0,0 +1,331 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from .exceptions import InstanceError
+from utils.logger import logger
+
+# Action của một bước: action(manager, instance_name, params) -> giá trị bất kỳ, lỗi thì ném exception
+Action = Callable[[Any, str, Dict], Any]
+
+PENDING = 'pending'
+RUNNING = 'running'
+OK = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+def _create(manager, name: str, params: Dict):
+    # Chạy lại workflow sau khi lỗi giữa chừng không tạo trùng instance
+    if name in manager.devices:
+        return 'exists'
+    manager.create_instance(name, params.get('properties'))
+    return 'created'
+
+
+def _clone(manager, name: str, params: Dict):
+    if name in manager.devices:
+        return 'exists'
+    manager.templates.clone(params['template'], name, params.get('properties'))
+    return 'cloned'
+
+
+def _wait_ready(manager, name: str, params: Dict):
+    if not manager.readiness.wait(name, params.get('boot_timeout')):
+        raise InstanceError(f"Instance {name} did not become ready")
+    return 'ready'
+
+
+BUILTIN_ACTIONS: Dict[str, Action] = {
+    'create': _create,
+    'clone': _clone,
+    'start': lambda manager, name, params: manager.start_instance(name),
+    'wait_ready': _wait_ready,
+    'install': lambda manager, name, params: manager.installer.install(
+        name, params['apk_path'], params.get('force', False)),
+    'run_app': lambda manager, name, params: manager.run_app(name, params['package']),
+    'stop': lambda manager, name, params: manager.stop_instance(name),
+}
+
+
+@dataclass
+class Stage:
+    """
+    Một bước trong workflow
+    Args:
+        name: Tên bước, duy nhất trong workflow
+        action: Tên action đã đăng ký (create, start, wait_ready, ...) hoặc callable
+        after: Các bước phải xong trước; None = bước liền trước trong danh sách
+        concurrency: Số instance tối đa chạy bước này cùng lúc
+        retries: Số lần thử lại khi lỗi
+        retry_delay: Chờ trước lần thử lại đầu tiên (giây), nhân backoff sau mỗi lần
+        optional: Lỗi ở bước này không chặn các bước sau của instance
+    """
+    name: str
+    action: Union[str, Action]
+    after: Optional[List[str]] = None
+    concurrency: int = 4
+    retries: int = 0
+    retry_delay: float = 1.0
+    backoff: float = 2.0
+    optional: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Stage':
+        data = dict(data)
+        data.setdefault('action', data['name'])
+        return cls(**data)
+
+
+@dataclass
+class Workflow:
+    """DAG các bước chạy cho từng instance; params là giá trị mặc định cho action"""
+    name: str
+    stages: List[Stage]
+    params: Dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names in workflow {self.name}")
+        previous = None
+        for stage in self.stages:
+            if stage.after is None:
+                stage.after = [previous] if previous else []
+            for dependency in stage.after:
+                if dependency not in names or names.index(dependency) >= names.index(stage.name):
+                    # Chỉ phụ thuộc bước khai báo trước nên DAG không thể có vòng
+                    raise ValueError(f"Stage {stage.name} depends on unknown or later stage {dependency}")
+            previous = stage.name
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> 'Workflow':
+        return cls(
+            name=name,
+            stages=[Stage.from_dict(stage) for stage in data['steps']],
+            params=dict(data.get('params', {}))
+        )
+
+    def stage(self, name: str) -> Stage:
+        return next(stage for stage in self.stages if stage.name == name)
+
+
+@dataclass
+class StepResult:
+    status: str = PENDING
+    attempts: int = 0
+    # time.monotonic() lúc bắt đầu/kết thúc bước (gồm cả các lần retry)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    value: Any = None
+    error: Optional[str] = None
+    # Bước optional lỗi không làm instance bị tính là thất bại
+    optional: bool = False
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+@dataclass
+class InstanceRun:
+    name: str
+    steps: Dict[str, StepResult]
+
+    @property
+    def ok(self) -> bool:
+        return all(step.status == OK or (step.status == FAILED and step.optional)
+                   for step in self.steps.values())
+
+    @property
+    def failed_step(self) -> Optional[str]:
+        return next((name for name, step in self.steps.items()
+                     if step.status == FAILED and not step.optional), None)
+
+    @property
+    def duration(self) -> float:
+        started = [step.started for step in self.steps.values() if step.started is not None]
+        finished = [step.finished for step in self.steps.values() if step.finished is not None]
+        return max(finished) - min(started) if started and finished else 0.0
+
+
+@dataclass
+class WorkflowReport:
+    workflow: str
+    runs: Dict[str, InstanceRun]
+    elapsed: float
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [name for name, run in self.runs.items() if run.ok]
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        return {name: run.failed_step for name, run in self.runs.items() if not run.ok}
+
+    def step_timings(self) -> Dict[str, Dict[str, float]]:
+        """Thời gian từng bước (giây) qua mọi instance: count, avg, max"""
+        timings: Dict[str, Dict[str, float]] = {}
+        for run in self.runs.values():
+            for name, step in run.steps.items():
+                if step.status not in (OK, FAILED):
+                    continue
+                entry = timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+                entry['count'] += 1
+                entry['total'] += step.duration
+                entry['max'] = max(entry['max'], step.duration)
+        return {name: {'count': t['count'], 'avg': t['total'] / t['count'], 'max': t['max']}
+                for name, t in timings.items()}
+
+    @property
+    def slowest_instance(self) -> float:
+        return max((run.duration for run in self.runs.values()), default=0.0)
+
+
+class WorkflowEngine:
+    """
+    Chạy workflow theo kiểu pipeline: mỗi instance đi qua DAG của riêng nó, bước nào xong
+    thì bước sau được xếp hàng ngay, không chờ cả fleet xong bước đó. Mỗi bước có pool riêng
+    nên giới hạn song song, retry và lỗi của bước này không ảnh hưởng bước khác hay instance khác
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._actions: Dict[str, Action] = dict(BUILTIN_ACTIONS)
+        manager.telemetry.describe('workflow_step_seconds', 'Workflow step latency per instance')
+        manager.telemetry.describe('workflow_steps_total', 'Workflow steps by outcome')
+
+    def register_action(self, name: str, action: Action):
+        self._actions[name] = action
+
+    def workflow(self, name: str) -> Workflow:
+        """Workflow khai báo trong config (mục workflows)"""
+        from config.settings import settings
+        definition = settings.workflows.get(name)
+        if definition is None:
+            raise ValueError(f"Unknown workflow: {name}")
+        return Workflow.from_dict(name, definition)
+
+    def run(self, workflow: Union[str, Workflow], names: Iterable[str], params: Optional[Dict] = None,
+            on_step: Optional[Callable[[str, str, StepResult], None]] = None) -> WorkflowReport:
+        """
+        Chạy workflow cho nhiều instance, blocking tới khi mọi instance xong hoặc lỗi
+        Args:
+            workflow: Workflow hoặc tên workflow trong config
+            names: Danh sách instance
+            params: Ghi đè params của workflow (apk_path, package, properties, ...)
+            on_step: Gọi (instance, bước, kết quả) mỗi khi một bước kết thúc, trên thread của bước
+        Returns:
+            WorkflowReport với kết quả và thời gian từng bước của từng instance
+        """
+        if isinstance(workflow, str):
+            workflow = self.workflow(workflow)
+        params = {**workflow.params, **(params or {})}
+        actions = {stage.name: self._resolve(stage) for stage in workflow.stages}
+        names = list(names)
+        runs = {name: InstanceRun(name, {stage.name: StepResult(optional=stage.optional)
+                                         for stage in workflow.stages})
+                for name in names}
+        if not names:
+            return WorkflowReport(workflow.name, runs, 0.0)
+
+        pools = {stage.name: ThreadPoolExecutor(max_workers=max(1, stage.concurrency),
+                                                thread_name_prefix=f'wf-{stage.name}')
+                 for stage in workflow.stages}
+        dependents = {stage.name: [s for s in workflow.stages if stage.name in s.after]
+                      for stage in workflow.stages}
+        lock = threading.Lock()
+        remaining = len(names) * len(workflow.stages)
+        done = threading.Event()
+
+        def finish(name: str, stage: Stage, step: StepResult):
+            """Đánh dấu một bước đã kết thúc và xếp hàng các bước sau đã đủ điều kiện"""
+            nonlocal remaining
+            ready = []
+            with lock:
+                remaining -= 1
+                blocked = step.status in (FAILED, SKIPPED) and not (stage.optional and step.status == FAILED)
+                for child in dependents[stage.name]:
+                    child_step = runs[name].steps[child.name]
+                    if child_step.status != PENDING:
+                        continue
+                    if blocked:
+                        child_step.status = SKIPPED
+                        child_step.error = f"{stage.name} {step.status}"
+                        ready.append((child, child_step, False))
+                    elif all(runs[name].steps[d].status in (OK, FAILED, SKIPPED) for d in child.after):
+                        child_step.status = RUNNING
+                        ready.append((child, child_step, True))
+                if remaining == 0:
+                    done.set()
+            if on_step and step.status != SKIPPED:
+                self._notify(on_step, name, stage.name, step)
+            for child, child_step, execute in ready:
+                if execute:
+                    pools[child.name].submit(execute_step, name, child, child_step)
+                else:
+                    finish(name, child, child_step)
+
+        def execute_step(name: str, stage: Stage, step: StepResult):
+            step.started = time.monotonic()
+            delay = stage.retry_delay
+            while True:
+                step.attempts += 1
+                try:
+                    step.value = actions[stage.name](self.manager, name, params)
+                    step.status = OK
+                    step.error = None
+                    break
+                except Exception as e:
+                    step.error = str(e)
+                    if step.attempts > stage.retries:
+                        step.status = FAILED
+                        logger.error(f"Workflow {workflow.name}: {stage.name} failed on {name} "
+                                     f"after {step.attempts} attempts: {e}", extra={'instance': name})
+                        break
+                    logger.warning(f"Workflow {workflow.name}: {stage.name} failed on {name} "
+                                   f"(attempt {step.attempts}), retrying in {delay:g}s: {e}",
+                                   extra={'instance': name})
+                    time.sleep(delay)
+                    delay *= stage.backoff
+            step.finished = time.monotonic()
+            labels = {'workflow': workflow.name, 'step': stage.name}
+            self.manager.telemetry.observe('workflow_step_seconds', step.duration, labels)
+            self.manager.telemetry.inc('workflow_steps_total', {**labels, 'outcome': step.status})
+            finish(name, stage, step)
+
+        started = time.monotonic()
+        roots = [stage for stage in workflow.stages if not stage.after]
+        try:
+            for name in names:
+                for stage in roots:
+                    step = runs[name].steps[stage.name]
+                    step.status = RUNNING
+                    pools[stage.name].submit(execute_step, name, stage, step)
+            done.wait()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        report = WorkflowReport(workflow.name, runs, time.monotonic() - started)
+        logger.info(f"Workflow {workflow.name}: {len(report.succeeded)}/{len(names)} instances ok "
+                    f"in {report.elapsed:.1f}s (slowest instance {report.slowest_instance:.1f}s)")
+        return report
+
+    def _resolve(self, stage: Stage) -> Action:
+        if callable(stage.action):
+            return stage.action
+        action = self._actions.get(stage.action)
+        if action is None:
+            raise ValueError(f"Stage {stage.name} uses unknown action: {stage.action}")
+        return action
+
+    @staticmethod
+    def _notify(callback, name: str, stage: str, step: StepResult):
+        try:
+            callback(name, stage, step)
+        except Exception as e:
+            logger.error(f"Workflow step callback failed for {name}: {e}", extra={'instance': name})
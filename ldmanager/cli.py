@@ -0,0 +1,283 @@
+"""
+Entry point không có GUI: chỉ import core, Qt/pyqtgraph/numpy không bao giờ được load
+
+    python -m ldmanager list
+    python -m ldmanager start-many instance_0 instance_1
+    python -m ldmanager install --apk app.apk
+    python -m ldmanager workflow bring_up farm_0 farm_1 --set apk_path=app.apk
+    python -m ldmanager daemon
+    python -m ldmanager agent --port 9470
+    python -m ldmanager fleet --agent http://host1:9470 --agent http://host2:9470 create farm_0 farm_1
+"""
+import argparse
+import signal
+import threading
+from typing import Dict, List, Optional
+
+
+def _manager(args):
+    from core.ld_manager import LDPlayerManager
+    return LDPlayerManager(ld_path=args.ld_path)
+
+
+def _names(manager, names: List[str]) -> List[str]:
+    return names or list(manager.devices)
+
+
+def _report(results: Dict) -> int:
+    failed = 0
+    for name, result in results.items():
+        if result.ok:
+            print(f"{name}\tok\t{result.value if result.value is not None else ''}")
+        else:
+            failed += 1
+            print(f"{name}\tfailed\t{result.error}")
+    return 1 if failed else 0
+
+
+def cmd_list(args) -> int:
+    manager = _manager(args)
+    for device in manager.devices.values():
+        print(f"{device.index}\t{device.name}\t{device.status}")
+    return 0
+
+
+def cmd_status(args) -> int:
+    manager = _manager(args)
+    for status in manager.status.refresh().values():
+        state = 'running' if status.running else 'stopped'
+        print(f"{status.index}\t{status.name}\t{state}\t{status.player_pid}")
+    return 0
+
+
+def cmd_resources(args) -> int:
+    manager = _manager(args)
+    for name, values in manager.get_all_instances_resources().items():
+        print(f"{name}\t{values['status']}\t{values['cpu']}%\t{values['memory']}MB\t{values['threads']}")
+    return 0
+
+
+def cmd_create(args) -> int:
+    manager = _manager(args)
+    manager.create_instance(args.name)
+    return 0
+
+
+def cmd_start_many(args) -> int:
+    manager = _manager(args)
+    return _report(manager.start_many(_names(manager, args.names)))
+
+
+def cmd_stop_many(args) -> int:
+    manager = _manager(args)
+    return _report(manager.stop_many(_names(manager, args.names)))
+
+
+def cmd_install(args) -> int:
+    manager = _manager(args)
+    return _report(manager.installer.deploy(args.apk, args.names or None, force=args.force))
+
+
+def cmd_run_app(args) -> int:
+    manager = _manager(args)
+    return _report(manager.run_app_many(_names(manager, args.names), args.package))
+
+
+def _params(pairs: List[str]) -> Dict:
+    import json
+    params = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def cmd_workflow(args) -> int:
+    manager = _manager(args)
+    report = manager.workflows.run(args.workflow, args.names, _params(args.set))
+    for name, run in report.runs.items():
+        steps = ' '.join(f"{step}={result.status}:{result.duration:.2f}s" for step, result in run.steps.items())
+        print(f"{name}\t{'ok' if run.ok else 'failed'}\t{run.duration:.2f}s\t{steps}")
+    for step, timing in report.step_timings().items():
+        print(f"# {step}\tcount={timing['count']}\tavg={timing['avg']:.2f}s\tmax={timing['max']:.2f}s")
+    print(f"# elapsed={report.elapsed:.2f}s slowest_instance={report.slowest_instance:.2f}s")
+    return 1 if report.failed else 0
+
+
+def cmd_daemon(args) -> int:
+    """Chạy nền lâu dài: lấy mẫu tài nguyên, mở /metrics và flush state cho tới khi nhận SIGINT/SIGTERM"""
+    from utils.logger import logger
+    manager = _manager(args)
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    manager.start_monitoring()
+    manager.start_metrics_server()
+    logger.info(f"Daemon started with {len(manager.devices)} instances")
+    stop.wait()
+    manager.stop_metrics_server()
+    manager.stop_monitoring()
+    manager.store.close()
+    logger.info("Daemon stopped")
+    return 0
+
+
+def cmd_agent(args) -> int:
+    """Chạy agent cho controller điều khiển từ xa, tới khi nhận SIGINT/SIGTERM"""
+    from config.settings import settings
+    from core.agent import AgentServer
+    from utils.logger import logger
+    if args.max_instances is not None:
+        # Sức chứa cố định thay cho admission theo tài nguyên (vd. nhiều agent chung một máy)
+        settings.config['instances']['max_count'] = args.max_instances
+        settings.config.setdefault('admission', {})['enabled'] = False
+    manager = _manager(args)
+    agent = AgentServer(manager, host=args.host or settings.agent_host,
+                        port=args.port if args.port is not None else settings.agent_port,
+                        token=args.token or settings.fleet_token,
+                        max_upload_mb=settings.agent_max_upload_mb)
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    try:
+        agent.start()
+    except OSError as e:
+        logger.error(f"Agent failed to listen on {agent.host}:{agent.port}: {e}")
+        return 1
+    stop.wait()
+    agent.stop()
+    manager.store.close()
+    logger.info("Agent stopped")
+    return 0
+
+
+def _fleet(args):
+    from config.settings import settings
+    from core.fleet import FleetController
+    urls = args.agent or settings.fleet_agents
+    if not urls:
+        raise SystemExit('ldmanager fleet: no agents given (--agent or fleet.agents in config.json)')
+    return FleetController(urls, token=args.token or settings.fleet_token)
+
+
+def cmd_fleet_status(args) -> int:
+    fleet = _fleet(args)
+    fleet.refresh()
+    offline = 0
+    for host in fleet.summary():
+        if not host['online']:
+            offline += 1
+            print(f"{host['url']}\toffline\t{host['error']}")
+            continue
+        print(f"{host['url']}\t{host['hostname']}\t{host['running']}/{host['instances']}/{host['capacity']}"
+              f"\tload={host['load']}")
+    for name, url in sorted(fleet.locations.items()):
+        print(f"  {name}\t{url}")
+    return 1 if offline else 0
+
+
+def cmd_fleet_create(args) -> int:
+    return _report(_fleet(args).create_instances(args.names))
+
+
+def cmd_fleet_start_many(args) -> int:
+    return _report(_fleet(args).start(args.names or None))
+
+
+def cmd_fleet_stop_many(args) -> int:
+    return _report(_fleet(args).stop(args.names or None))
+
+
+def cmd_fleet_install(args) -> int:
+    return _report(_fleet(args).install(args.apk, args.names or None, force=args.force))
+
+
+def cmd_fleet_run_app(args) -> int:
+    return _report(_fleet(args).run_app(args.package, args.names or None))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='ldmanager', description='Headless LDPlayer fleet manager')
+    parser.add_argument('--ld-path', help='Path to ldconsole (defaults to config.json)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='List known instances').set_defaults(func=cmd_list)
+    commands.add_parser('status', help='Show ldconsole list2 status').set_defaults(func=cmd_status)
+    commands.add_parser('resources', help='Show CPU/memory per instance').set_defaults(func=cmd_resources)
+
+    create = commands.add_parser('create', help='Create an instance')
+    create.add_argument('name')
+    create.set_defaults(func=cmd_create)
+
+    for name, func, help_text in (('start-many', cmd_start_many, 'Start instances (all if none given)'),
+                                  ('stop-many', cmd_stop_many, 'Stop instances (all if none given)')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('names', nargs='*')
+        command.set_defaults(func=func)
+
+    install = commands.add_parser('install', help='Deploy an APK')
+    install.add_argument('--apk', required=True)
+    install.add_argument('--force', action='store_true')
+    install.add_argument('names', nargs='*')
+    install.set_defaults(func=cmd_install)
+
+    run_app = commands.add_parser('run-app', help='Launch an app')
+    run_app.add_argument('--package', required=True)
+    run_app.add_argument('names', nargs='*')
+    run_app.set_defaults(func=cmd_run_app)
+
+    workflow = commands.add_parser('workflow', help='Run a workflow from config.json per instance')
+    workflow.add_argument('workflow')
+    workflow.add_argument('names', nargs='+')
+    workflow.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                          help='Override a workflow param (value parsed as JSON when possible)')
+    workflow.set_defaults(func=cmd_workflow)
+
+    commands.add_parser('daemon', help='Run monitoring in the foreground').set_defaults(func=cmd_daemon)
+
+    agent = commands.add_parser('agent', help='Serve this host to a fleet controller')
+    agent.add_argument('--host', help='Bind address (defaults to fleet.agent_host)')
+    agent.add_argument('--port', type=int, help='Port, 0 = any free port (defaults to fleet.agent_port)')
+    agent.add_argument('--token', help='Shared secret required in X-Agent-Token')
+    agent.add_argument('--max-instances', type=int,
+                       help='Fixed capacity instead of resource-based admission (e.g. agents sharing a host)')
+    agent.set_defaults(func=cmd_agent)
+
+    fleet = commands.add_parser('fleet', help='Drive agents on several hosts')
+    fleet.add_argument('--agent', action='append', help='Agent URL, repeatable (defaults to fleet.agents)')
+    fleet.add_argument('--token', help='Shared secret sent to agents')
+    fleet_commands = fleet.add_subparsers(dest='fleet_command', required=True)
+    fleet_commands.add_parser('status', help='Show load and instances per host').set_defaults(
+        func=cmd_fleet_status)
+
+    fleet_create = fleet_commands.add_parser('create', help='Create instances on the least loaded hosts')
+    fleet_create.add_argument('names', nargs='+')
+    fleet_create.set_defaults(func=cmd_fleet_create)
+
+    for name, func, help_text in (('start-many', cmd_fleet_start_many, 'Start instances (all if none given)'),
+                                  ('stop-many', cmd_fleet_stop_many, 'Stop instances (all if none given)')):
+        command = fleet_commands.add_parser(name, help=help_text)
+        command.add_argument('names', nargs='*')
+        command.set_defaults(func=func)
+
+    fleet_install = fleet_commands.add_parser('install', help='Upload and deploy an APK on every host')
+    fleet_install.add_argument('--apk', required=True)
+    fleet_install.add_argument('--force', action='store_true')
+    fleet_install.add_argument('names', nargs='*')
+    fleet_install.set_defaults(func=cmd_fleet_install)
+
+    fleet_run_app = fleet_commands.add_parser('run-app', help='Launch an app across hosts')
+    fleet_run_app.add_argument('--package', required=True)
+    fleet_run_app.add_argument('names', nargs='*')
+    fleet_run_app.set_defaults(func=cmd_fleet_run_app)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -1,10 +1,16 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
 from utils.logger import logger
 
 def main():
+    # Có tham số dòng lệnh thì chạy CLI, không load Qt
+    if len(sys.argv) > 1:
+        from ldmanager.cli import main as cli_main
+        return cli_main(sys.argv[1:])
+
     try:
+        from PySide6.QtWidgets import QApplication
+        from ui.main_window import MainWindow
+
         app = QApplication(sys.argv)
         
         # Load styles
@@ -21,4 +27,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(main())
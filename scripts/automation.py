@@ -1,33 +1,70 @@
 from core.ld_manager import LDPlayerManager
+from core.executor import CommandResult
+from core.workflow import Stage, Workflow, WorkflowReport
 from utils.logger import logger
-import time
+from typing import Dict, List, Optional
 
 class Automation:
     def __init__(self, manager: LDPlayerManager):
         self.manager = manager
 
+    def run_workflow(self, workflow: str, names: List[str], **params) -> WorkflowReport:
+        """Chạy workflow khai báo trong config, vd. run_workflow("bring_up", names, apk_path=...)"""
+        report = self.manager.workflows.run(workflow, names, params)
+        self._log_report(report)
+        return report
+
+    def bring_up(self, count: int, apk_path: str, package_name: str, prefix: str = "instance") -> WorkflowReport:
+        """create -> start -> wait_ready -> install -> run cho từng instance, không chờ nhau giữa các bước"""
+        names = [f"{prefix}_{i}" for i in range(count)]
+        return self.run_workflow("bring_up", names, apk_path=apk_path, package=package_name)
+
     def batch_create_instances(self, count: int):
-        for i in range(count):
-            name = f"instance_{i}"
-            try:
-                device = self.manager.create_instance(name)
-                self.manager.start_instance(name)
-                time.sleep(5)  # Wait for instance to start
-            except Exception as e:
-                logger.error(f"Failed to create/start instance {name}: {e}")
+        names = [f"instance_{i}" for i in range(count)]
+        # Instance nào tạo xong là start và chờ boot luôn, không đợi cả loạt
+        workflow = Workflow("create_instances", [
+            Stage("create", "create"),
+            Stage("start", "start", concurrency=self.manager.executor.max_workers),
+            Stage("wait_ready", "wait_ready", concurrency=max(1, count))
+        ])
+        report = self.manager.workflows.run(workflow, names)
+        self._log_report(report)
+        created = [name for name, run in report.runs.items() if run.steps["create"].status == "ok"]
+        return {name: report.runs[name].ok for name in created}
+
+    def batch_create_from_template(self, template: str, count: int, overrides: Optional[Dict] = None):
+        """Tạo instance bằng cách copy template đã cài sẵn app, rồi start và chờ sẵn sàng"""
+        names = [f"{template}_{i}" for i in range(count)]
+        workflow = Workflow("create_from_template", [
+            # Số bản copy cùng lúc vẫn bị giới hạn bởi copy_concurrency của TemplateManager
+            Stage("clone", "clone", concurrency=self.manager.executor.max_workers),
+            Stage("start", "start", concurrency=self.manager.executor.max_workers),
+            Stage("wait_ready", "wait_ready", concurrency=max(1, count))
+        ])
+        report = self.manager.workflows.run(workflow, names, {"template": template, "properties": overrides})
+        self._log_report(report)
+        cloned = [name for name, run in report.runs.items() if run.steps["clone"].status == "ok"]
+        return {name: report.runs[name].ok for name in cloned}
 
     def batch_install_app(self, apk_path: str):
-        for name in self.manager.devices:
-            try:
-                self.manager.install_app(name, apk_path)
-                time.sleep(2)
-            except Exception as e:
-                logger.error(f"Failed to install app on {name}: {e}")
+        # Bỏ qua instance đã có đúng bản APK, phần còn lại cài song song
+        results = self.manager.installer.deploy(apk_path)
+        self._log_failures("install app on", results)
 
     def batch_run_app(self, package_name: str):
-        for name in self.manager.devices:
-            try:
-                self.manager.run_app(name, package_name)
-                time.sleep(2)
-            except Exception as e:
-                logger.error(f"Failed to run app on {name}: {e}")
\ No newline at end of file
+        results = self.manager.run_app_many(list(self.manager.devices), package_name)
+        self._log_failures("run app on", results)
+
+    def _log_failures(self, action: str, results: Dict[str, CommandResult]):
+        for name, result in results.items():
+            if not result.ok:
+                logger.error(f"Failed to {action} {name}: {result.error}")
+
+    def _log_report(self, report: WorkflowReport):
+        for name, step in report.failed.items():
+            if step:
+                logger.error(f"Workflow {report.workflow} failed on {name} at {step}: "
+                             f"{report.runs[name].steps[step].error}")
+        for step, timing in report.step_timings().items():
+            logger.info(f"Workflow {report.workflow}: {step} x{timing['count']} "
+                        f"avg {timing['avg']:.2f}s max {timing['max']:.2f}s")
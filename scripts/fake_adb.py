@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+adb giả lập để chạy ShellPool trên Linux
+
+    fake_adb.py devices
+    fake_adb.py -s emulator-5554 shell            # session tương tác: /bin/sh với am/pm/input/... giả
+    fake_adb.py -s emulator-5554 shell getprop    # chạy một lệnh rồi thoát
+
+Serial emulator-<5554 + 2 * index> chỉ kết nối được khi instance có index đó đang chạy
+trong state của fake_ldconsole (FAKE_LDCONSOLE_STATE).
+
+Biến môi trường:
+    FAKE_ADB_CONNECT_LATENCY  Số giây cho mỗi lần mở kết nối (spawn + handshake của adb thật)
+    FAKE_ADB_PACKAGES         Danh sách package đã cài, cách nhau bởi dấu phẩy
+
+Dùng: ADB_PATH=scripts/fake_adb.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+STATE_PATH = os.environ.get('FAKE_LDCONSOLE_STATE', 'data/fake_ldconsole.json')
+CONNECT_LATENCY = float(os.environ.get('FAKE_ADB_CONNECT_LATENCY', 0))
+BASE_PORT = 5554
+
+# Lệnh Android giả, đặt vào đầu PATH của shell
+FAKE_COMMANDS = {
+    'am': '''case "$1" in
+  start) shift; echo "Starting: Intent { $* }" ;;
+  force-stop) ;;
+  *) echo "Unknown command: $1" >&2; exit 1 ;;
+esac''',
+    'monkey': 'echo "Events injected: 1"',
+    'input': '[ $# -ge 2 ] || { echo "usage: input <source> <command> [args]" >&2; exit 1; }',
+    'pm': '''[ "$1 $2" = "list packages" ] || { echo "Unknown command: $*" >&2; exit 1; }
+echo "com.android.settings,${FAKE_ADB_PACKAGES}" | tr ',' '\\n' | grep -v '^$' | grep -- "${3:-.}" | sed 's/^/package:/'
+exit 0''',
+    'getprop': '''case "$1" in
+  sys.boot_completed) echo 1 ;;
+  ro.serialno) echo "$FAKE_ADB_SERIAL" ;;
+  ro.product.model) echo "LDPlayer" ;;
+  "") echo "[ro.serialno]: [$FAKE_ADB_SERIAL]" ;;
+esac''',
+}
+
+
+def bin_dir() -> str:
+    path = os.path.join(tempfile.gettempdir(), f'fake_adb_bin_{os.getuid()}')
+    os.makedirs(path, exist_ok=True)
+    for name, body in FAKE_COMMANDS.items():
+        script = f"#!/bin/sh\n{body}\n"
+        target = os.path.join(path, name)
+        if not os.path.exists(target) or open(target).read() != script:
+            tmp_path = f"{target}.{os.getpid()}"
+            with open(tmp_path, 'w') as f:
+                f.write(script)
+            os.chmod(tmp_path, 0o755)
+            os.replace(tmp_path, target)
+    return path
+
+
+def running_serials():
+    if not os.path.exists(STATE_PATH):
+        return []
+    with open(STATE_PATH) as f:
+        state = json.load(f)
+    return [f"emulator-{BASE_PORT + 2 * inst['index']}" for inst in state.values() if inst.get('running')]
+
+
+def main(argv):
+    serial = None
+    if len(argv) >= 2 and argv[0] == '-s':
+        serial, argv = argv[1], argv[2:]
+    if not argv:
+        print("usage: fake_adb [-s SERIAL] devices|shell [command]", file=sys.stderr)
+        return 1
+
+    if argv[0] == 'devices':
+        print("List of devices attached")
+        for running in running_serials():
+            print(f"{running}\tdevice")
+        return 0
+    if argv[0] != 'shell':
+        print(f"unknown command {argv[0]}", file=sys.stderr)
+        return 1
+
+    if CONNECT_LATENCY > 0:
+        time.sleep(CONNECT_LATENCY)
+    serials = running_serials()
+    if serial is None and len(serials) == 1:
+        serial = serials[0]
+    if serial not in serials:
+        print(f"error: device '{serial}' not found", file=sys.stderr)
+        return 1
+
+    env = dict(os.environ, PATH=f"{bin_dir()}{os.pathsep}{os.environ.get('PATH', '')}", FAKE_ADB_SERIAL=serial)
+    sys.stdout.flush()
+    if len(argv) > 1:
+        os.execvpe('sh', ['sh', '-c', ' '.join(argv[1:])], env)
+    os.execvpe('sh', ['sh'], env)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
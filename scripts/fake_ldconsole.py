@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+ldconsole giả lập để chạy LDPlayerManager trên Linux
+
+State lưu ở file JSON trỏ bởi biến môi trường FAKE_LDCONSOLE_STATE
+(mặc định data/fake_ldconsole.json). Mỗi lần gọi được ghi thêm một dòng
+vào file FAKE_LDCONSOLE_CALLS (nếu có) để đếm số subprocess đã spawn.
+
+Các biến môi trường khác:
+    FAKE_LDCONSOLE_LATENCY    Độ trễ mỗi lệnh (giây), hoặc theo verb: "launch=2,install=0.5,default=0.01"
+    FAKE_LDCONSOLE_FAIL_RATE  Xác suất (0..1) một lệnh thay đổi state bị lỗi
+    FAKE_LDCONSOLE_BOOT       Số giây từ lúc launch tới khi Android báo đã boot
+    FAKE_LDCONSOLE_JITTER     Độ lệch ngẫu nhiên (vd. 1.0 = chậm tới gấp đôi) cho độ trễ và thời gian boot,
+                              để có instance chậm hơn hẳn các instance khác
+    FAKE_LDCONSOLE_PROCESSES  Số process con cho mỗi instance; > 0 thì launch tạo cây process thật
+                              (dnplayer + LdVBoxHeadless) để ProcessSnapshot/psutil đo được
+    FAKE_LDCONSOLE_MEMORY_MB  RAM mỗi instance thật sự chiếm (nằm ở process con đầu tiên)
+    FAKE_LDCONSOLE_BOOT_CPU   1 = boot cần FAKE_LDCONSOLE_BOOT giây CPU (process con đầu tiên chạy bận
+                              một core) thay vì giây đồng hồ, nên boot nhiều instance cùng lúc sẽ chậm lại
+    FAKE_LDCONSOLE_BOOT_DEADLINE  Boot CPU chưa xong sau chừng này giây thì Android treo, không bao giờ
+                              báo boot xong (như instance boot hỏng khi máy quá tải); 0 = không giới hạn
+
+Dùng: LDPlayerManager(ld_path="scripts/fake_ldconsole.py")
+"""
+import ctypes
+import fcntl
+import json
+import os
+import random
+import signal
+import sys
+import time
+
+STATE_PATH = os.environ.get('FAKE_LDCONSOLE_STATE', 'data/fake_ldconsole.json')
+CALLS_PATH = os.environ.get('FAKE_LDCONSOLE_CALLS')
+FAIL_RATE = float(os.environ.get('FAKE_LDCONSOLE_FAIL_RATE', 0))
+BOOT_SECONDS = float(os.environ.get('FAKE_LDCONSOLE_BOOT', 0))
+JITTER = float(os.environ.get('FAKE_LDCONSOLE_JITTER', 0))
+CHILD_PROCESSES = int(os.environ.get('FAKE_LDCONSOLE_PROCESSES', 0))
+MEMORY_MB = int(os.environ.get('FAKE_LDCONSOLE_MEMORY_MB', 0))
+BOOT_CPU = os.environ.get('FAKE_LDCONSOLE_BOOT_CPU') == '1'
+BOOT_DEADLINE = float(os.environ.get('FAKE_LDCONSOLE_BOOT_DEADLINE', 0))
+
+# Lệnh chỉ đọc thì không bao giờ lỗi ngẫu nhiên
+READ_ONLY_VERBS = ('list2', 'isrunning')
+_PR_SET_NAME = 15
+
+
+def latency(verb):
+    spec = os.environ.get('FAKE_LDCONSOLE_LATENCY', '')
+    if '=' not in spec:
+        return float(spec or 0)
+    delays = dict(item.split('=', 1) for item in spec.split(',') if item)
+    return float(delays.get(verb, delays.get('default', 0)))
+
+
+def jittered(seconds):
+    return seconds * (1 + random.uniform(0, JITTER)) if JITTER > 0 else seconds
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, 'r') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    with open(STATE_PATH, 'w') as f:
+        json.dump(state, f)
+
+
+def parse_args(args):
+    options = {}
+    for i in range(0, len(args) - 1, 2):
+        if args[i].startswith('--'):
+            options[args[i][2:]] = args[i + 1]
+    return options
+
+
+def main(argv):
+    if not argv:
+        print("usage: fake_ldconsole <command> [--name NAME] ...", file=sys.stderr)
+        return 1
+    if CALLS_PATH:
+        with open(CALLS_PATH, 'a') as f:
+            f.write(' '.join(argv) + '\n')
+
+    # Độ trễ mô phỏng thời gian ldconsole làm việc, nằm ngoài khóa nên các lệnh vẫn chạy song song
+    delay = jittered(latency(argv[0]))
+    if delay > 0:
+        time.sleep(delay)
+    if argv[0] not in READ_ONLY_VERBS and random.random() < FAIL_RATE:
+        print(f"simulated failure of {argv[0]}", file=sys.stderr)
+        return 1
+
+    # Nhiều lệnh có thể chạy song song, khóa file state trong suốt một lệnh
+    with open(STATE_PATH + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return run(argv[0], parse_args(argv[1:]))
+
+
+def free_index(state):
+    """Giống ldconsole: index nhỏ nhất chưa dùng, index của instance đã xóa được dùng lại"""
+    used = {inst['index'] for inst in state.values()}
+    return next(i for i in range(len(used) + 1) if i not in used)
+
+
+def run(verb, options):
+    state = load_state()
+    name = options.get('name')
+    forget_dead_players(state)
+
+    if verb == 'list2':
+        for inst_name, inst in sorted(state.items(), key=lambda item: item[1]['index']):
+            running = inst['running']
+            pid = inst['pid'] if running else -1
+            vbox_pid = inst.get('vbox_pid', pid + 1) if running else -1
+            booted = running and is_booted(inst)
+            print(f"{inst['index']},{inst_name},{1000 + inst['index'] if running else 0},0,"
+                  f"{1 if booted else 0},{pid},{vbox_pid},960,540,240")
+        return 0
+
+    if verb == 'create':
+        if name in state:
+            print(f"instance {name} exists", file=sys.stderr)
+            return 1
+        state[name] = {'index': free_index(state), 'running': False, 'pid': -1}
+        save_state(state)
+        return 0
+
+    if verb == 'copy':
+        source = options.get('from')
+        if name in state or source not in state:
+            print(f"cannot copy {source} to {name}", file=sys.stderr)
+            return 1
+        state[name] = {'index': free_index(state), 'running': False, 'pid': -1,
+                       'apps': list(state[source].get('apps', []))}
+        save_state(state)
+        return 0
+
+    if name not in state:
+        print(f"player {name} not found", file=sys.stderr)
+        return 1
+
+    inst = state[name]
+    if verb == 'isrunning':
+        print('running' if inst['running'] else 'stop')
+    elif verb == 'launch':
+        if 'packagename' in options:
+            inst['foreground'] = options['packagename']
+        elif not inst['running']:
+            inst['running'] = True
+            inst['started_at'] = time.time()
+            inst['boot_seconds'] = jittered(BOOT_SECONDS)
+            if CHILD_PROCESSES > 0:
+                inst['pid'], inst['vbox_pid'] = spawn_player(CHILD_PROCESSES, inst['boot_seconds'])
+            else:
+                inst['pid'] = 20000 + inst['index'] * 10
+    elif verb == 'quit':
+        if inst['running'] and 'vbox_pid' in inst:
+            kill_player(inst['pid'])
+        inst['running'] = False
+        inst['pid'] = -1
+        inst.pop('vbox_pid', None)
+        inst.pop('foreground', None)
+    elif verb == 'modify':
+        inst.setdefault('properties', {}).update(
+            {key: value for key, value in options.items() if key != 'name'})
+    elif verb == 'remove':
+        if inst['running'] and 'vbox_pid' in inst:
+            kill_player(inst['pid'])
+        del state[name]
+    elif verb == 'install':
+        inst.setdefault('apps', []).append(options.get('apk'))
+    else:
+        print(f"unknown command {verb}", file=sys.stderr)
+        return 1
+    save_state(state)
+    return 0
+
+
+def forget_dead_players(state):
+    """Player bị kill từ bên ngoài (crash) thì list2/launch thấy là đã dừng, như ldconsole thật"""
+    for inst in state.values():
+        if inst['running'] and 'vbox_pid' in inst and not process_alive(inst['pid']):
+            # Dọn các process con còn sót trong cùng process group
+            kill_player(inst['pid'])
+            inst['running'] = False
+            inst['pid'] = -1
+            inst.pop('vbox_pid', None)
+            inst.pop('foreground', None)
+
+
+def process_alive(pid):
+    """Process còn chạy (zombie chưa được reap cũng tính là đã chết)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+def is_booted(inst):
+    boot_seconds = inst.get('boot_seconds', BOOT_SECONDS)
+    if BOOT_CPU and inst.get('vbox_pid', -1) > 0:
+        return cpu_seconds(inst['vbox_pid']) >= boot_seconds * 0.99
+    return time.time() - inst.get('started_at', 0) >= boot_seconds
+
+
+def cpu_seconds(pid):
+    """utime + stime của process theo /proc (chỉ Linux)"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return 0.0
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def set_process_name(name):
+    """Đổi comm của process để psutil.Process.name() trả về name (chỉ Linux)"""
+    try:
+        libc = ctypes.CDLL(None)
+        libc.prctl(_PR_SET_NAME, ctypes.c_char_p(name.encode()), 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+
+def spawn_player(children, boot_seconds=0.0):
+    """
+    Fork một process dnplayer (session riêng) cùng các process con LdVBoxHeadless.
+    Cmdline vẫn là cmdline của lệnh launch nên có tên instance, giống dnplayer thật
+    Returns:
+        (pid của dnplayer, pid của process con đầu tiên)
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid:
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            vbox_pid = int(pipe.read() or -1)
+        return pid, vbox_pid
+
+    try:
+        os.setsid()
+        # Không giữ stdout/stderr của ldconsole (executor chờ EOF) hay file lock
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.closerange(3, write_fd)
+        os.closerange(write_fd + 1, 1024)
+        set_process_name('dnplayer')
+
+        pids = []
+        for i in range(children):
+            child = os.fork()
+            if child == 0:
+                os.close(write_fd)
+                set_process_name('LdVBoxHeadless')
+                if i == 0:
+                    _simulate_vm(boot_seconds)
+                _sleep_forever()
+            pids.append(child)
+        os.write(write_fd, str(pids[0] if pids else -1).encode())
+        os.close(write_fd)
+        _sleep_forever(pids)
+    finally:
+        os._exit(0)
+
+
+def _simulate_vm(boot_seconds):
+    # Ghi vào từng byte để RAM được cấp thật (RSS), rồi giữ nguyên tới khi instance dừng
+    global _ballast
+    if MEMORY_MB > 0:
+        _ballast = b'\x01' * (MEMORY_MB * 1024 * 1024)
+    if BOOT_CPU:
+        deadline = time.time() + BOOT_DEADLINE if BOOT_DEADLINE > 0 else None
+        while time.process_time() < boot_seconds:
+            if deadline is not None and time.time() > deadline:
+                return
+
+
+def _sleep_forever(children=()):
+    def stop(*_):
+        # Thu dọn process con trước khi thoát để không để lại zombie
+        for child in children:
+            try:
+                os.waitpid(child, 0)
+            except ChildProcessError:
+                pass
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    while True:
+        signal.pause()
+
+
+def kill_player(pid):
+    try:
+        os.killpg(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Dựng một "fleet" nhiều agent trên localhost, mỗi agent là một process `ldmanager agent`
+riêng với ldconsole giả và thư mục làm việc riêng, rồi chạy thử controller trên đó
+
+Dùng:
+    python scripts/local_fleet.py --agents 3 --instances 12
+    python scripts/local_fleet.py --agents 3 --keep      # giữ agent chạy để thử `ldmanager fleet ...`
+"""
+import argparse
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+sys.path.insert(0, ROOT)
+
+from core.exceptions import InstanceError
+from core.fleet import AgentClient, FleetController
+
+
+def spawn_agent(directory: str, port: int, token: str, latency: float) -> subprocess.Popen:
+    env = dict(os.environ,
+               PYTHONPATH=ROOT,
+               LDCONSOLE_PATH=FAKE_LDCONSOLE,
+               FAKE_LDCONSOLE_STATE=os.path.join(directory, 'ldconsole.json'),
+               FAKE_LDCONSOLE_LATENCY=str(latency))
+    os.makedirs(os.path.join(directory, 'logs'), exist_ok=True)
+    return subprocess.Popen(
+        [sys.executable, '-m', 'ldmanager', 'agent', '--port', str(port), '--token', token,
+         # Các agent chung một máy nên mỗi agent nhận sức chứa cố định thay vì cả RAM của máy
+         '--max-instances', '5'],
+        cwd=directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url: str, token: str, timeout: float = 20.0):
+    client = AgentClient(url, token)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.info(timeout=1)
+        except InstanceError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def build_apk(path: str, package: str = 'com.example.app', version_code: int = 1):
+    """APK tối thiểu: chỉ có AndroidManifest.xml dạng binary với package và versionCode"""
+    strings = ['package', package, 'versionCode']
+    encoded = b''.join(struct.pack('<H', len(text)) + text.encode('utf-16-le') + b'\0\0' for text in strings)
+    offsets, position = [], 0
+    for text in strings:
+        offsets.append(position)
+        position += 4 + len(text) * 2
+    encoded += b'\0' * (-len(encoded) % 4)
+    header_size = 28
+    strings_start = header_size + 4 * len(strings)
+    pool = struct.pack('<HHI5I', 0x0001, header_size, strings_start + len(encoded),
+                       len(strings), 0, 0, strings_start, 0)
+    pool += struct.pack(f'<{len(strings)}I', *offsets) + encoded
+    attributes = (struct.pack('<IIIHBBI', 0xFFFFFFFF, 0, 1, 8, 0, 0x03, 1)
+                  + struct.pack('<IIIHBBI', 0xFFFFFFFF, 2, 0xFFFFFFFF, 8, 0, 0x10, version_code))
+    element = struct.pack('<IIIIHHHHHH', 0, 0xFFFFFFFF, 0xFFFFFFFF, 0, 20, 20, 2, 0, 0, 0) + attributes
+    element = struct.pack('<HHI', 0x0102, 16, 8 + len(element)) + element
+    manifest = struct.pack('<HHI', 0x0003, 8, 8 + len(pool) + len(element)) + pool + element
+    with zipfile.ZipFile(path, 'w') as apk:
+        apk.writestr('AndroidManifest.xml', manifest)
+        apk.writestr('classes.dex', os.urandom(4096))
+
+
+def report(title: str, results) -> int:
+    failed = [name for name, result in results.items() if not result.ok]
+    print(f"{title}: {len(results) - len(failed)}/{len(results)} ok"
+          + (f", failed: {', '.join(failed)}" if failed else ''))
+    return len(failed)
+
+
+def exercise(fleet: FleetController, count: int, directory: str) -> int:
+    names = [f"farm_{i}" for i in range(count)]
+    failures = report('create', fleet.create_instances(names))
+    for host in fleet.refresh().values():
+        print(f"  {host.url}: {host.info.get('instances')} instances, load {host.load:.2f}")
+
+    ticks = {}
+    fleet.watch(lambda url, payload: ticks.__setitem__(url, ticks.get(url, 0) + 1))
+    failures += report('start', fleet.start(names))
+
+    apk_path = os.path.join(directory, 'app.apk')
+    build_apk(apk_path)
+    failures += report('install', fleet.install(apk_path, names))
+    failures += report('run_app', fleet.run_app('com.example.app', names))
+    # Instance không nằm trên agent nào phải trả về lỗi thay vì bị bỏ qua
+    if fleet.start(['missing_instance'])['missing_instance'].ok:
+        print('unknown instance: unexpectedly ok')
+        failures += 1
+    time.sleep(2)
+    print(f"stream ticks per agent: {ticks}")
+    failures += report('stop', fleet.stop())
+    failures += report('remove', fleet.remove(names))
+    fleet.stop_watching()
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', type=int, default=3)
+    parser.add_argument('--instances', type=int, default=9)
+    parser.add_argument('--base-port', type=int, default=19470)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--token', default='local-fleet')
+    parser.add_argument('--keep', action='store_true', help='Keep agents running until Ctrl+C')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        urls = []
+        processes = []
+        try:
+            for i in range(args.agents):
+                agent_dir = os.path.join(directory, f'agent_{i}')
+                os.makedirs(agent_dir)
+                port = args.base_port + i
+                processes.append(spawn_agent(agent_dir, port, args.token, args.latency))
+                urls.append(f'http://127.0.0.1:{port}')
+            for url in urls:
+                wait_ready(url, args.token)
+            print(f"agents: {' '.join(urls)}")
+
+            if args.keep:
+                agent_flags = ' '.join(f'--agent {url}' for url in urls)
+                print(f"try: python -m ldmanager fleet {agent_flags} --token {args.token} status")
+                try:
+                    while True:
+                        time.sleep(1)
+                except KeyboardInterrupt:
+                    return 0
+
+            fleet = FleetController(urls, token=args.token)
+            try:
+                return 1 if exercise(fleet, args.instances, directory) else 0
+            finally:
+                fleet.close()
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Test chạy trên Linux với ldconsole/adb giả trong scripts/ (cần pytest)
+
+Chạy:
+    python -m pytest -q tests
+"""
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config.settings import settings
+
+FAKE_LDCONSOLE = os.path.join(ROOT, 'scripts', 'fake_ldconsole.py')
+FAKE_ADB = os.path.join(ROOT, 'scripts', 'fake_adb.py')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_logging(tmp_path_factory):
+    """Log của test không ghi vào logs/ldplayer.log của repo"""
+    log_file = tmp_path_factory.mktemp('logs') / 'ldplayer.log'
+    settings.config['logging'] = dict(settings.config['logging'], file=str(log_file), level='WARNING')
+
+
+@pytest.fixture
+def fake_ldconsole(tmp_path, monkeypatch):
+    """ldconsole giả với state, log lệnh và cây process thật trong thư mục tạm"""
+    monkeypatch.setenv('FAKE_LDCONSOLE_STATE', str(tmp_path / 'ldconsole.json'))
+    monkeypatch.setenv('FAKE_LDCONSOLE_CALLS', str(tmp_path / 'calls.log'))
+    monkeypatch.setenv('FAKE_LDCONSOLE_PROCESSES', '1')
+    monkeypatch.setenv('ADB_PATH', FAKE_ADB)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(settings.config, 'state', {'path': str(tmp_path / 'instances.json')})
+    monkeypatch.setitem(settings.config, 'admission', {'enabled': False})
+    monkeypatch.setitem(settings.config, 'install', {'retries': 0, 'retry_delay': 0})
+    return tmp_path
+
+
+def calls(directory, verb=None):
+    """Các lệnh ldconsole giả đã nhận, lọc theo verb nếu có"""
+    path = os.path.join(directory, 'calls.log')
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = [line.split() for line in f]
+    return [line for line in lines if verb is None or line[0] == verb]
+
+
+@pytest.fixture
+def manager(fake_ldconsole):
+    from core.ld_manager import LDPlayerManager
+    manager = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+    yield manager
+    manager.supervisor.stop()
+    manager.sampler.stop()
+    if manager._adb is not None:
+        manager._adb.close()
+    for name in manager.running_instances():
+        try:
+            manager.stop_instance(name)
+        except Exception:
+            pass
+    manager.store.close()
+    manager.installer.store.close()
+    manager.executor.shutdown()
@@ -0,0 +1,82 @@
+import pytest
+from core.adb_pool import ShellPool, ShellSession
+from core.exceptions import ShellError, ShellUnavailable
+
+SHELL = ['sh']
+
+
+@pytest.fixture
+def session():
+    session = ShellSession('a', SHELL)
+    yield session
+    session.close()
+
+
+def test_output_and_exit_code_are_framed(session):
+    result = session.execute('echo first; echo second', 5)
+    assert (result.output, result.exit_code) == ('first\nsecond', 0)
+    # Output không kết thúc bằng newline vẫn không dính vào dòng đánh dấu
+    assert session.execute('printf partial; exit_code=3; (exit $exit_code)', 5).output == 'partial'
+    assert session.execute('false', 5).exit_code == 1
+
+
+def test_marker_from_other_session_is_output(session):
+    line = '__LDM_deadbeef_2__ 0'
+    assert session.execute(f"echo '{line}'", 5).output == line
+
+
+def test_pipelined_commands_keep_their_output(session):
+    futures = [session.submit(f'echo {i}; (exit {i % 3})') for i in range(50)]
+    assert [future.result(5) for future in futures] == [(i % 3, str(i)) for i in range(50)]
+
+
+def test_command_does_not_read_following_commands(session):
+    first = session.submit('cat')
+    second = session.submit('echo after')
+    assert first.result(5) == (0, '')
+    assert second.result(5) == (0, 'after')
+
+
+@pytest.fixture
+def pool():
+    connects = []
+
+    def argv_for(name):
+        connects.append(name)
+        return SHELL
+
+    pool = ShellPool(argv_for, idle_timeout=60, command_timeout=5)
+    pool.connects = connects
+    yield pool
+    pool.close()
+
+
+def test_command_is_resent_when_session_closed_before_sending(pool):
+    session = pool.session('a')
+
+    def closed(command):
+        # Session đứt ngay trước khi ghi lệnh (reader chưa kịp đánh dấu đóng)
+        session.close()
+        raise ShellUnavailable('closed')
+
+    session.submit = closed
+    assert pool.execute('a', 'echo ok').output == 'ok'
+    assert len(pool.connects) == 2
+
+
+def test_command_is_not_resent_after_session_dies_mid_command(pool, tmp_path):
+    runs = tmp_path / 'runs'
+    with pytest.raises(ShellError):
+        # Lệnh đã chạy một phần (ghi file) rồi session chết
+        pool.execute('a', f'echo run >> {runs}; kill -9 $$')
+    assert runs.read_text() == 'run\n'
+    assert len(pool.connects) == 1
+
+
+def test_app_arguments_are_quoted(manager, fake_ldconsole):
+    manager.create_instance('a')
+    manager.start_instance('a')
+    pwned = fake_ldconsole / 'pwned'
+    manager.launch_app('a', f'com.example.app; touch {pwned}')
+    manager.start_activity('a', f'com.example.app/.Main; touch {pwned}')
+    assert not pwned.exists()
@@ -0,0 +1,42 @@
+import http.client
+import json
+import pytest
+from core.agent import AgentServer
+
+
+@pytest.fixture
+def agent(manager):
+    agent = AgentServer(manager, port=0, token='secret', max_upload_mb=0.001)
+    agent.start()
+    yield agent
+    agent.stop()
+
+
+def request(agent, method, path, body=b'', token='secret'):
+    connection = http.client.HTTPConnection(agent.host, agent.port, timeout=10)
+    headers = {'X-Agent-Token': token} if token is not None else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    status, data = response.status, json.loads(response.read())
+    connection.close()
+    return status, data
+
+
+def test_token_is_required(agent):
+    assert request(agent, 'GET', '/v1/info', token=None)[0] == 401
+    assert request(agent, 'GET', '/v1/info', token='secreT')[0] == 401
+    status, info = request(agent, 'GET', '/v1/info')
+    assert status == 200
+    assert 0 <= info['cpu_percent'] <= 100
+
+
+def test_upload_over_limit_is_rejected(agent, tmp_path):
+    agent.apk_dir = str(tmp_path / 'apks')
+    status, data = request(agent, 'POST', '/v1/apks', b'x' * 2048)
+    assert status == 413
+    assert 'exceeds limit' in data['error']
+
+    status, data = request(agent, 'POST', '/v1/apks', b'x' * 512)
+    assert status == 200
+    with open(data['path'], 'rb') as f:
+        assert f.read() == b'x' * 512
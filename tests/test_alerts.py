@@ -0,0 +1,39 @@
+from core.alerts import AlertEngine, AlertRule
+from core.metrics_store import MetricsStore
+
+
+def engine_with():
+    store = MetricsStore(((1, 60),))
+    rule = AlertRule(name='hot', metric='cpu', threshold=50, cooldown=1000)
+    engine = AlertEngine(store, [rule], memory_total_mb=1024)
+    return store, engine
+
+
+def test_remove_instance_while_rule_is_active():
+    store, engine = engine_with()
+    store.record({'a': {'cpu': 90}, 'b': {'cpu': 90}, 'c': {'cpu': 10}}, 1000.0)
+    raised = engine.evaluate(1000.5)
+    assert sorted(alert.instance for alert in raised) == ['a', 'b']
+
+    store.release('a')
+    store.record({'b': {'cpu': 90}, 'c': {'cpu': 10}}, 1001.0)
+    # b vẫn đang active nên không kích hoạt lại, c không nhận trạng thái của a
+    assert engine.evaluate(1001.5) == []
+    assert engine.active == [('hot', 'b')]
+
+    # Instance mới dùng lại slot của a bắt đầu với trạng thái sạch
+    store.record({'b': {'cpu': 90}, 'c': {'cpu': 10}, 'd': {'cpu': 90}}, 1002.0)
+    assert [alert.instance for alert in engine.evaluate(1002.5)] == ['d']
+    assert sorted(engine.active) == [('hot', 'b'), ('hot', 'd')]
+
+
+def test_compaction_keeps_state_by_name():
+    store, engine = engine_with()
+    names = [f'instance_{i}' for i in range(6)]
+    store.record({name: {'cpu': 90 if name == 'instance_5' else 10} for name in names}, 1000.0)
+    assert [alert.instance for alert in engine.evaluate(1000.5)] == ['instance_5']
+    for name in names[:4]:
+        store.release(name)
+    store.record({'instance_4': {'cpu': 10}, 'instance_5': {'cpu': 90}}, 1001.0)
+    assert engine.evaluate(1001.5) == []
+    assert engine.active == [('hot', 'instance_5')]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import pytest
+from tests.conftest import FAKE_LDCONSOLE, ROOT
+
+HEAVY_MODULES = ('PySide6', 'pyqtgraph', 'numpy')
+
+# Chạy __main__ của ldmanager như `python -m ldmanager`, chỉ đổi file log/state sang thư mục tạm
+RUN_CLI = """
+import runpy, sys
+from config.settings import settings
+settings.config['logging']['file'] = sys.argv.pop(1)
+settings.config['state'] = {'path': sys.argv.pop(1)}
+runpy.run_module('ldmanager', run_name='__main__', alter_sys=True)
+"""
+
+
+def imported_modules(argv, cwd, env):
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=cwd, env=env,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return {line.split('|')[-1].strip() for line in proc.stderr.splitlines()
+            if line.startswith('import time:')}
+
+
+@pytest.mark.parametrize('args', [['--help'], ['list']])
+def test_cli_does_not_import_gui_or_numpy(args, fake_ldconsole):
+    env = dict(os.environ, PYTHONPATH=ROOT, LDCONSOLE_PATH=FAKE_LDCONSOLE)
+    argv = ['-c', RUN_CLI, str(fake_ldconsole / 'cli.log'), str(fake_ldconsole / 'instances.json'), *args]
+    modules = imported_modules(argv, fake_ldconsole, env)
+    # list phải load cả core (executor, state store) mà vẫn không chạm tới GUI
+    assert 'ldmanager.cli' in modules
+    if args == ['list']:
+        assert 'core.ld_manager' in modules
+    heavy = sorted(name for name in modules if name.split('.')[0] in HEAVY_MODULES)
+    assert heavy == []
@@ -0,0 +1,152 @@
+import threading
+import time
+import pytest
+from core.command_cache import CommandCache
+from core.exceptions import CommandCancelled, CommandTimeout
+
+
+class SlowRun:
+    """run giả: đếm số lần spawn, lệnh đọc chờ tới khi được thả ra"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.state = 'stopped'
+
+    def __call__(self, command, timeout=None):
+        self.calls.append(command)
+        if command[1] == 'launch':
+            self.state = 'running'
+            return ''
+        observed = self.state
+        self.release.wait(5)
+        return observed
+
+
+def in_thread(target, *args, **kwargs):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', target(*args, **kwargs)))
+    thread.start()
+    return thread, result
+
+
+def wait_for_calls(run, count):
+    deadline = time.monotonic() + 5
+    while len(run.calls) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+LIST2 = ['ldconsole', 'list2']
+
+
+def test_read_is_cached_within_ttl():
+    run = SlowRun()
+    run.release.set()
+    cache = CommandCache(run, ttl=60)
+    assert cache.execute(LIST2) == cache.execute(LIST2) == 'stopped'
+    assert len(run.calls) == 1
+    assert cache.stats['hit'] == 1
+
+
+def test_concurrent_reads_are_coalesced():
+    run = SlowRun()
+    cache = CommandCache(run, ttl=60)
+    threads = [in_thread(cache.execute, LIST2, fresh=True) for _ in range(5)]
+    wait_for_calls(run, 1)
+    time.sleep(0.1)
+    run.release.set()
+    for thread, result in threads:
+        thread.join()
+        assert result['value'] == 'stopped'
+    assert len(run.calls) == 1
+    assert cache.stats['coalesced'] == 4
+
+
+def test_mutation_invalidates_cache():
+    run = SlowRun()
+    run.release.set()
+    cache = CommandCache(run, ttl=60)
+    cache.execute(['ldconsole', 'isrunning', '--name', 'a'])
+    cache.execute(['ldconsole', 'launch', '--name', 'a'])
+    assert cache.execute(['ldconsole', 'isrunning', '--name', 'a']) == 'running'
+    assert len(run.calls) == 3
+
+
+def test_fresh_read_does_not_join_read_started_before_invalidation():
+    run = SlowRun()
+    cache = CommandCache(run, ttl=60)
+    stale, stale_result = in_thread(cache.execute, LIST2)
+    wait_for_calls(run, 1)
+    # Lệnh đọc đang chạy đã thấy trạng thái trước launch
+    cache.execute(['ldconsole', 'launch', '--name', 'a'])
+    fresh, fresh_result = in_thread(cache.execute, LIST2, fresh=True)
+    wait_for_calls(run, 3)
+    run.release.set()
+    stale.join()
+    fresh.join()
+    assert stale_result['value'] == 'stopped'
+    assert fresh_result['value'] == 'running'
+    # Kết quả cũ không được ghi vào cache
+    assert cache.execute(LIST2) == 'running'
+    assert len(run.calls) == 3
+
+
+def test_concurrent_launches_are_not_coalesced():
+    started = []
+    release = threading.Event()
+
+    def run(command, timeout=None):
+        started.append(command)
+        release.wait(5)
+        return ''
+
+    cache = CommandCache(run, ttl=60)
+    launch = ['ldconsole', 'launch', '--name', 'a']
+    threads = [in_thread(cache.execute, launch) for _ in range(2)]
+    deadline = time.monotonic() + 5
+    while len(started) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread, _ in threads:
+        thread.join()
+    assert len(started) == 2
+    assert cache.stats['coalesced'] == 0
+
+
+def test_follower_keeps_its_own_timeout():
+    run = SlowRun()
+    cache = CommandCache(run, ttl=60)
+    leader, _ = in_thread(cache.execute, LIST2)
+    wait_for_calls(run, 1)
+    started = time.monotonic()
+    with pytest.raises(CommandTimeout):
+        cache.execute(LIST2, timeout=0.2)
+    assert time.monotonic() - started < 2
+    run.release.set()
+    leader.join()
+
+
+def test_follower_reruns_when_leader_is_cancelled():
+    release = threading.Event()
+    spawned = []
+
+    def run(command, timeout=None):
+        spawned.append(command)
+        if len(spawned) == 1:
+            # Lệnh của job khác bị kill bởi cancel scope của job đó
+            release.wait(5)
+            raise CommandCancelled('cancelled by another job')
+        return 'fresh'
+
+    cache = CommandCache(run, ttl=60)
+    leader, _ = in_thread(lambda: pytest.raises(CommandCancelled, cache.execute, LIST2))
+    deadline = time.monotonic() + 5
+    while not spawned and time.monotonic() < deadline:
+        time.sleep(0.01)
+    follower, result = in_thread(cache.execute, LIST2)
+    time.sleep(0.1)
+    release.set()
+    leader.join()
+    follower.join()
+    assert result['value'] == 'fresh'
+    assert len(spawned) == 2
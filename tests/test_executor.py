@@ -0,0 +1,116 @@
+import sys
+import threading
+import time
+import pytest
+from core.exceptions import CommandCancelled
+from core.executor import CommandExecutor
+
+SLEEP = [sys.executable, '-c', 'import time; time.sleep(30)']
+
+
+def wait_running(executor, count):
+    deadline = time.monotonic() + 5
+    while executor.running_commands < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_cancel_scope_kills_only_its_commands():
+    executor = CommandExecutor(max_workers=4)
+    outcome = {}
+
+    def run(token):
+        try:
+            with executor.scope(token):
+                # Lệnh chạy ở worker của executor vẫn thuộc scope của thao tác đã submit
+                executor.submit(executor.run, SLEEP).result()
+            outcome[token] = 'finished'
+        except CommandCancelled:
+            outcome[token] = 'cancelled'
+
+    threads = [threading.Thread(target=run, args=(token,)) for token in ('job1', 'job2')]
+    for thread in threads:
+        thread.start()
+    wait_running(executor, 2)
+
+    executor.cancel('job1')
+    threads[0].join(5)
+    assert outcome == {'job1': 'cancelled'}
+    assert executor.running_commands == 1
+
+    executor.cancel()
+    threads[1].join(5)
+    assert outcome['job2'] == 'cancelled'
+    executor.shutdown()
+
+
+def test_job_cancel_kills_running_command():
+    pytest.importorskip('PySide6')
+    from PySide6.QtCore import QCoreApplication
+    from ui.jobs.job_manager import Job, JobManager
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    executor = CommandExecutor(max_workers=2)
+    jobs = JobManager(2, executor=executor)
+    job = jobs.submit('sleep', executor.run, SLEEP)
+    wait_running(executor, 1)
+
+    started = time.monotonic()
+    assert jobs.shutdown(5000)
+    assert time.monotonic() - started < 5
+    assert job.status == Job.CANCELLED
+    assert executor.running_commands == 0
+    executor.shutdown()
+    app.processEvents()
+
+
+def test_job_cancelled_before_its_first_command():
+    pytest.importorskip('PySide6')
+    from ui.jobs.job_manager import Job
+    executor = CommandExecutor(max_workers=2)
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def work():
+        # Job đã RUNNING nhưng chưa spawn lệnh nào khi bị hủy
+        started.set()
+        proceed.wait(5)
+        return executor.run(SLEEP)
+
+    job = Job('sleep', work, executor=executor)
+    thread = threading.Thread(target=job.run)
+    thread.start()
+    assert started.wait(5)
+    job.request_cancel()
+    proceed.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert job.status == Job.CANCELLED
+    executor.shutdown()
+
+
+def test_map_slots_do_not_hold_workers():
+    executor = CommandExecutor(max_workers=2)
+    slots = threading.BoundedSemaphore(1)
+    running = []
+    peak = []
+
+    def copy(name):
+        running.append(name)
+        peak.append(len(running))
+        time.sleep(0.2)
+        running.remove(name)
+        return name
+
+    results = {}
+    mapper = threading.Thread(target=lambda: results.update(
+        executor.map(copy, [f'instance_{i}' for i in range(5)], slots=slots)))
+    mapper.start()
+    time.sleep(0.05)
+    # Vẫn còn worker rảnh cho việc khác trong lúc các bản copy xếp hàng
+    started = time.monotonic()
+    assert executor.submit(lambda: 'poll').result(5) == 'poll'
+    assert time.monotonic() - started < 0.15
+    mapper.join()
+    assert max(peak) == 1
+    assert all(result.ok for result in results.values()) and len(results) == 5
+    executor.shutdown()
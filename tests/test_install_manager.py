@@ -0,0 +1,108 @@
+import pytest
+from core.exceptions import AppError, CommandCancelled, InstanceError
+from core.install_manager import read_apk_info
+from scripts.local_fleet import build_apk
+from tests.conftest import calls
+
+
+@pytest.fixture
+def apk(tmp_path):
+    def build(name='app.apk', version_code=1, package='com.example.app'):
+        path = str(tmp_path / name)
+        build_apk(path, package=package, version_code=version_code)
+        return path
+    return build
+
+
+def installs(directory):
+    return len(calls(directory, 'install'))
+
+
+def test_manifest_is_parsed(apk):
+    info = read_apk_info(apk(version_code=42, package='com.example.game'))
+    assert info.package == 'com.example.game'
+    assert info.version_code == 42
+    assert len(info.sha256) == 64
+
+
+def test_same_apk_is_skipped(manager, fake_ldconsole, apk):
+    manager.create_instance('a')
+    path = apk()
+    assert manager.installer.deploy(path, ['a'])['a'].value == 'installed'
+    assert manager.installer.deploy(path, ['a'])['a'].value == 'up-to-date'
+    assert installs(fake_ldconsole) == 1
+
+
+def test_rebuild_with_same_version_code_is_installed(manager, fake_ldconsole, apk):
+    manager.create_instance('a')
+    manager.installer.deploy(apk('first.apk'), ['a'])
+    # Cùng versionCode nhưng nội dung khác (classes.dex ngẫu nhiên)
+    result = manager.installer.deploy(apk('second.apk'), ['a'])['a']
+    assert result.ok and result.value == 'installed'
+    assert installs(fake_ldconsole) == 2
+
+
+def test_downgrade_is_refused_unless_forced(manager, fake_ldconsole, apk):
+    manager.create_instance('a')
+    manager.installer.deploy(apk('new.apk', version_code=5), ['a'])
+    old = apk('old.apk', version_code=3)
+
+    result = manager.installer.deploy(old, ['a'])['a']
+    assert not result.ok
+    assert 'downgrade' in result.error
+    with pytest.raises(AppError):
+        manager.installer.install('a', old)
+    assert installs(fake_ldconsole) == 1
+
+    assert manager.installer.deploy(old, ['a'], force=True)['a'].ok
+    assert manager.installer.installed('a')['com.example.app']['version_code'] == 3
+
+
+def test_remove_instance_forgets_installed_apps(manager, fake_ldconsole, apk):
+    manager.create_instance('a')
+    path = apk()
+    manager.installer.deploy(path, ['a'])
+    manager.remove_instance('a')
+    assert manager.installer.installed('a') == {}
+
+    manager.create_instance('a')
+    assert manager.installer.deploy(path, ['a'])['a'].value == 'installed'
+
+
+def test_cancelled_install_is_not_retried(manager, apk, monkeypatch):
+    manager.create_instance('a')
+    manager.installer.retries = 2
+    manager.installer.retry_delay = 0
+    attempts = []
+
+    def cancelled(name, path):
+        attempts.append(name)
+        raise CommandCancelled('cancelled')
+
+    monkeypatch.setattr(manager, 'install_app', cancelled)
+    with pytest.raises(CommandCancelled):
+        manager.installer.install('a', apk())
+    assert attempts == ['a']
+    assert manager.installer.installed('a') == {}
+
+
+def test_failed_install_is_retried(manager, apk, monkeypatch):
+    manager.create_instance('a')
+    manager.installer.retries = 2
+    manager.installer.retry_delay = 0
+    install_app = manager.install_app
+    attempts = []
+
+    def flaky(name, path):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise InstanceError('device offline')
+        install_app(name, path)
+
+    monkeypatch.setattr(manager, 'install_app', flaky)
+    assert manager.installer.install('a', apk()) == 'installed'
+    assert attempts == ['a', 'a']
+
+
+def test_records_live_next_to_instance_state(manager, fake_ldconsole):
+    assert manager.installer.store.path == str(fake_ldconsole / 'installed_apps.json')
@@ -0,0 +1,45 @@
+import logging
+import utils.logger as log
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_first_record_is_written_once(monkeypatch):
+    root = Collect()
+    written = Collect()
+    monkeypatch.setattr(log, '_configured', False)
+    monkeypatch.setattr(log, '_listener', None)
+    monkeypatch.setattr(log.logger, 'handlers', [log._DeferredSetup()])
+    monkeypatch.setattr(log, '_build_handlers', lambda config: [written])
+    monkeypatch.setattr(logging.getLogger(), 'handlers', [root])
+    try:
+        log.logger.warning('first')
+    finally:
+        log.shutdown_logger()
+        log.logger.setLevel(logging.DEBUG)
+
+    assert [record.getMessage() for record in written.records] == ['first']
+    assert [record.getMessage() for record in root.records] == ['first']
+
+
+def make_record(level, instance=None):
+    record = logging.LogRecord('LDPlayerManager', level, __file__, 1, 'message', None, None)
+    if instance is not None:
+        record.instance = instance
+    return record
+
+
+def test_rate_limit_spares_warnings_and_other_instances():
+    limiter = log.RateLimitFilter(rate=0.001, burst=2)
+    assert [limiter.filter(make_record(logging.INFO, 'a')) for _ in range(3)] == [True, True, False]
+    # Lỗi trong lúc batch đang ồn ào vẫn được ghi
+    assert all(limiter.filter(make_record(logging.ERROR, 'a')) for _ in range(10))
+    assert limiter.filter(make_record(logging.WARNING))
+    assert limiter.filter(make_record(logging.INFO, 'b'))
@@ -0,0 +1,60 @@
+import numpy as np
+from core.metrics_store import MetricsStore
+
+RESOLUTIONS = ((1, 60),)
+
+
+def fill(store, names, start=1000.0, seconds=5, cpu=None):
+    for t in range(seconds):
+        store.record({name: {'cpu': cpu if cpu is not None else i, 'memory': 100}
+                      for i, name in enumerate(names)}, start + t)
+
+
+def test_growth_doubles_capacity():
+    store = MetricsStore(RESOLUTIONS)
+    shapes = set()
+    for i in range(100):
+        store.record({f'instance_{i}': {'cpu': i}}, 1000.0)
+        shapes.add(store._rings[0].values.shape[2])
+    # Dung lượng tăng gấp đôi: 1, 2, 4, ..., 128 thay vì copy lại ở mỗi instance mới
+    assert shapes == {1, 2, 4, 8, 16, 32, 64, 128}
+    names, values = store.aggregate('cpu', 10, 'max', now=1001.0)
+    assert len(names) == 100
+    assert values[names.index('instance_42')] == 42
+
+
+def test_released_slot_is_reused_without_old_history():
+    store = MetricsStore(RESOLUTIONS)
+    fill(store, ['a', 'b', 'c'])
+    store.release('b')
+    assert store.names == ['a', 'c']
+    names, _ = store.aggregate('cpu', 60, now=1005.0)
+    assert names == ['a', 'c']
+
+    store.record({'d': {'cpu': 50}}, 1005.0)
+    assert store._slots['d'] == 1
+    times, values = store.series('d', 'cpu', 60, now=1006.0)
+    assert np.nanmax(values) == 50
+    assert np.count_nonzero(~np.isnan(values[1])) == 1
+
+
+def test_release_compacts_when_most_slots_are_free():
+    store = MetricsStore(RESOLUTIONS)
+    names = [f'instance_{i}' for i in range(8)]
+    fill(store, names)
+    for name in names[:5]:
+        store.release(name)
+
+    assert store.names == names[5:]
+    assert store._rings[0].values.shape[2] == 3
+    result = dict(zip(*store.aggregate('cpu', 60, 'max', now=1005.0)))
+    assert result == {'instance_5': 5, 'instance_6': 6, 'instance_7': 7}
+    fill(store, ['instance_7', 'new'], start=1005.0, seconds=1, cpu=9)
+    assert store.series('instance_7', 'cpu', 60, now=1006.0)[1][2][-1] == 9
+
+
+def test_remove_instance_releases_metrics(manager):
+    manager.create_instance('a')
+    manager.metrics.record({'a': {'cpu': 1}})
+    manager.remove_instance('a')
+    assert manager.metrics.names == []
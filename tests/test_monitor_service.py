@@ -0,0 +1,40 @@
+import psutil
+import pytest
+
+pytest.importorskip('PySide6')
+
+
+class Snapshot:
+    roots = {}
+
+    @staticmethod
+    def resources(name):
+        return None
+
+
+@pytest.fixture
+def service(manager, monkeypatch):
+    from PySide6.QtCore import QCoreApplication
+    from ui.services.monitor_service import MonitorService
+    app = QCoreApplication.instance() or QCoreApplication([])
+    disk_reads = []
+    disk_usage = psutil.disk_usage
+    monkeypatch.setattr(psutil, 'disk_usage', lambda path: disk_reads.append(path) or disk_usage(path))
+    service = MonitorService(manager, disk_interval=60)
+    service.disk_reads = disk_reads
+    yield service
+    app.processEvents()
+
+
+def test_host_stats_only_when_subscribed(service):
+    service._on_sample(Snapshot())
+    assert service.disk_reads == []
+
+    received = []
+    service.host_updated.connect(received.append)
+    for _ in range(5):
+        service._on_sample(Snapshot())
+    assert len(received) == 5
+    assert 'disk_percent' in received[-1]
+    # Đĩa chỉ được đọc lại sau disk_interval
+    assert len(service.disk_reads) == 1
@@ -0,0 +1,83 @@
+import json
+import threading
+from core.state_store import StateStore
+
+
+def store_at(tmp_path, **kwargs):
+    kwargs.setdefault('flush_interval', 0)
+    return StateStore(str(tmp_path / 'instances.json'), **kwargs)
+
+
+def journal(store):
+    with open(store.journal_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_changes_are_journaled_and_replayed(tmp_path):
+    store = store_at(tmp_path)
+    store.load()
+    store.put('a', {'status': 'running'})
+    store.put('b', {'status': 'stopped'})
+    store.delete('b')
+    assert [entry['op'] for entry in journal(store)] == ['put', 'put', 'delete']
+
+    assert store_at(tmp_path).load() == {'a': {'status': 'running'}}
+
+
+def test_truncated_journal_line_is_dropped(tmp_path):
+    store = store_at(tmp_path)
+    store.load()
+    store.put('a', {'status': 'running'})
+    with open(store.journal_path, 'a') as f:
+        f.write('{"op": "put", "name": "b", "da')
+
+    reloaded = store_at(tmp_path)
+    assert reloaded.load() == {'a': {'status': 'running'}}
+    reloaded.put('c', {'status': 'stopped'})
+    assert store_at(tmp_path).load() == {'a': {'status': 'running'}, 'c': {'status': 'stopped'}}
+
+
+def test_compaction_moves_journal_into_snapshot(tmp_path):
+    store = store_at(tmp_path, compact_every=3)
+    store.load()
+    for i in range(3):
+        store.put(f'instance_{i}', {'index': i})
+    assert journal(store) == []
+    with open(store.path) as f:
+        assert len(json.load(f)) == 3
+
+    store.put('instance_0', {'index': 10})
+    assert store_at(tmp_path).load()['instance_0'] == {'index': 10}
+
+
+def test_put_keeps_a_copy(tmp_path):
+    store = store_at(tmp_path, flush_interval=60)
+    store.load()
+    record = {'status': 'running', 'properties': {'cpu': 2}}
+    store.put('a', record)
+    record['status'] = 'stopped'
+    record['properties']['cpu'] = 4
+    store.flush()
+    assert store_at(tmp_path).load() == {'a': {'status': 'running', 'properties': {'cpu': 2}}}
+
+
+def test_no_record_lost_across_concurrent_compactions(tmp_path):
+    store = store_at(tmp_path, flush_interval=60, compact_every=5)
+    store.load()
+    stop = threading.Event()
+
+    def flusher():
+        while not stop.is_set():
+            store.flush()
+            store.compact()
+
+    thread = threading.Thread(target=flusher)
+    thread.start()
+    for i in range(500):
+        store.put(f'instance_{i % 50}', {'round': i})
+    stop.set()
+    thread.join()
+    store.close()
+
+    loaded = store_at(tmp_path).load()
+    assert loaded == {f'instance_{i}': {'round': 450 + i} for i in range(50)}
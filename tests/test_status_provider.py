@@ -0,0 +1,63 @@
+from core.status_provider import StatusProvider, parse_list2
+from tests.conftest import calls
+
+LIST2 = """0,LDPlayer,0,0,0,-1,-1,960,540,240
+1,farm_1,263844,918240,1,6512,6640,960,540,240
+garbage line
+3,booting,0,0,0,7012,7100
+"""
+
+
+def test_parse_list2():
+    statuses = parse_list2(LIST2)
+    assert set(statuses) == {'LDPlayer', 'farm_1', 'booting'}
+
+    stopped = statuses['LDPlayer']
+    assert (stopped.index, stopped.running, stopped.player_pid) == (0, False, -1)
+
+    running = statuses['farm_1']
+    assert running.running and running.android_started
+    assert (running.top_window, running.bind_window, running.player_pid, running.vbox_pid) == \
+        (263844, 918240, 6512, 6640)
+
+    # Process player đã có nhưng chưa có cửa sổ, Android chưa boot xong
+    booting = statuses['booting']
+    assert booting.running and not booting.android_started
+
+
+def test_parse_list2_ignores_empty_and_windows_newlines():
+    assert parse_list2('') == {}
+    statuses = parse_list2('0,a,0,0,0,-1,-1\r\n1,b,1,0,1,10,11\r\n')
+    assert [status.name for status in statuses.values()] == ['a', 'b']
+    assert statuses['b'].vbox_pid == 11
+
+
+def test_one_list2_call_per_ttl():
+    outputs = []
+
+    def execute(command):
+        outputs.append(command)
+        return LIST2
+
+    provider = StatusProvider(execute, 'ldconsole', ttl=60)
+    seen = []
+    provider.add_listener(seen.append)
+    assert provider.is_running('farm_1')
+    assert not provider.is_running('LDPlayer')
+    assert provider.get('missing') is None
+    assert len(outputs) == 1 and len(seen) == 1
+
+    provider.invalidate()
+    provider.all()
+    assert len(outputs) == 2 and len(seen) == 2
+
+
+def test_manager_status_uses_list2(manager, fake_ldconsole):
+    for name in ('a', 'b', 'c'):
+        manager.create_instance(name)
+    manager.start_instance('b')
+    before = len(calls(fake_ldconsole))
+    resources = manager.get_all_instances_resources()
+    assert set(resources) == {'a', 'b', 'c'}
+    assert calls(fake_ldconsole, 'isrunning') == []
+    assert len(calls(fake_ldconsole)) - before <= 1
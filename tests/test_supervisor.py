@@ -0,0 +1,119 @@
+import os
+import signal
+import time
+from tests.conftest import calls
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def supervised(manager, monkeypatch, name='a'):
+    monkeypatch.setattr(manager.supervisor, 'backoff_base', 0.2)
+    manager.create_instance(name)
+    manager.supervisor.start()
+    manager.start_instance(name)
+    assert wait_for(lambda: name in manager.supervisor.summary()['tracked'])
+    return manager.supervisor.summary()['tracked'][name]
+
+
+def test_crash_is_restarted(manager, monkeypatch, fake_ldconsole):
+    pid = supervised(manager, monkeypatch)
+    os.kill(pid, signal.SIGKILL)
+
+    assert wait_for(lambda: manager.supervisor.summary()['tracked'].get('a') not in (None, pid))
+    assert manager.devices.get('a').status == 'running'
+    assert len(calls(fake_ldconsole, 'launch')) == 2
+
+
+def test_stop_is_not_treated_as_crash(manager, monkeypatch, fake_ldconsole):
+    supervised(manager, monkeypatch)
+    # list2 chạy lại đúng lúc đang stop (GUI, sampler, ...) không được làm supervisor theo dõi lại player
+    cached_status = manager._cached_status
+    monkeypatch.setattr(manager, '_cached_status', lambda name: (manager.status.refresh(), cached_status(name))[1])
+
+    manager.stop_instance('a')
+    time.sleep(1.5)
+
+    assert manager.devices.get('a').status == 'stopped'
+    assert 'a' not in manager.supervisor.summary()['tracked']
+    assert manager.supervisor.summary()['restarting'] == []
+    assert len(calls(fake_ldconsole, 'launch')) == 1
+
+
+def test_stop_after_restart_was_handed_to_executor(manager, monkeypatch, fake_ldconsole):
+    pid = supervised(manager, monkeypatch)
+    handed = []
+    submit = manager.executor.submit
+
+    def hold_restart(func, *args):
+        if getattr(func, '__name__', '') == '_restart_now':
+            handed.append((func, args))
+            return None
+        return submit(func, *args)
+
+    monkeypatch.setattr(manager.executor, 'submit', hold_restart)
+    os.kill(pid, signal.SIGKILL)
+    assert wait_for(lambda: handed)
+
+    # Timer đã chạy xong, lần restart đang nằm trong hàng đợi executor
+    manager.stop_instance('a')
+    func, args = handed[0]
+    func(*args)
+
+    assert manager.devices.get('a').status == 'stopped'
+    assert len(calls(fake_ldconsole, 'launch')) == 1
+
+
+def test_crash_loop_gives_up(manager, monkeypatch):
+    monkeypatch.setattr(manager.supervisor, 'max_restarts', 1)
+    pid = supervised(manager, monkeypatch)
+    os.kill(pid, signal.SIGKILL)
+    assert wait_for(lambda: manager.supervisor.summary()['tracked'].get('a') not in (None, pid))
+
+    os.kill(manager.supervisor.summary()['tracked']['a'], signal.SIGKILL)
+    assert wait_for(lambda: manager.devices.get('a').status == 'crashed')
+
+
+def test_failed_restart_is_retried(manager, monkeypatch):
+    pid = supervised(manager, monkeypatch)
+    start_instance = manager.start_instance
+    failures = []
+
+    def flaky_start(name):
+        if not failures:
+            failures.append(name)
+            raise OSError('ldconsole vanished')
+        return start_instance(name)
+
+    monkeypatch.setattr(manager, 'start_instance', flaky_start)
+    os.kill(pid, signal.SIGKILL)
+
+    assert wait_for(lambda: manager.supervisor.summary()['tracked'].get('a') not in (None, pid))
+    assert failures == ['a']
+
+
+def test_load_state_drops_dead_running_instances(manager):
+    from core.ld_manager import LDPlayerManager
+    from tests.conftest import FAKE_LDCONSOLE
+    manager.create_instance('a')
+    manager.start_instance('a')
+    manager.status.refresh()
+    pid = manager.devices.get('a').pid
+    manager.store.close()
+    os.kill(pid, signal.SIGKILL)
+    time.sleep(0.2)
+
+    reloaded = LDPlayerManager(ld_path=FAKE_LDCONSOLE)
+    try:
+        assert reloaded.devices.get('a').status == 'stopped'
+        assert reloaded.devices.get('a').pid is None
+    finally:
+        reloaded.store.close()
+        reloaded.installer.store.close()
+        reloaded.executor.shutdown()
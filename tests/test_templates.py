@@ -0,0 +1,11 @@
+def test_templates_live_next_to_instance_state(manager, fake_ldconsole):
+    assert manager.templates.store.path == str(fake_ldconsole / 'templates.json')
+
+
+def test_provision_copies_template(manager, fake_ldconsole):
+    manager.create_instance('golden')
+    manager.templates.register_template('golden')
+    names = [f'farm_{i}' for i in range(4)]
+    results = manager.templates.provision('golden', names, overrides={'cpu': 1})
+    assert all(result.ok for result in results.values())
+    assert set(names) <= set(manager.devices)
@@ -0,0 +1,41 @@
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+from PySide6.QtCore import Qt, QEvent, QRect, Signal
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """Vẽ nút ▶/⏹ trực tiếp trong ô thay vì tạo QWidget cho từng dòng"""
+    start_clicked = Signal(int)
+    stop_clicked = Signal(int)
+
+    BUTTONS = ('▶', '⏹')
+    SPACING = 4
+
+    def _button_rects(self, rect: QRect):
+        width = (rect.width() - self.SPACING * (len(self.BUTTONS) + 1)) // len(self.BUTTONS)
+        height = rect.height() - 2 * self.SPACING
+        return [
+            QRect(rect.left() + self.SPACING + i * (width + self.SPACING),
+                  rect.top() + self.SPACING, width, height)
+            for i in range(len(self.BUTTONS))
+        ]
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        for text, rect in zip(self.BUTTONS, self._button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        pos = event.position().toPoint()
+        start_rect, stop_rect = self._button_rects(option.rect)
+        if start_rect.contains(pos):
+            self.start_clicked.emit(index.row())
+            return True
+        if stop_rect.contains(pos):
+            self.stop_clicked.emit(index.row())
+            return True
+        return False
@@ -0,0 +1,159 @@
+import itertools
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from contextlib import nullcontext
+from typing import Callable, Dict, Optional
+from core.executor import CommandExecutor
+from utils.logger import logger
+
+class JobSignals(QObject):
+    queued = Signal(object)
+    started = Signal(object)
+    progress = Signal(object)
+    finished = Signal(object)
+    failed = Signal(object)
+    cancelled = Signal(object)
+
+class Job(QRunnable):
+    """Một thao tác chạy trên QThreadPool; mọi thay đổi trạng thái được báo qua signals"""
+    QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title: str, func: Callable, *args, instance: Optional[str] = None,
+                 executor: Optional[CommandExecutor] = None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.id = next(self._ids)
+        self.title = title
+        self.instance = instance
+        self.func = func
+        self.args = args
+        # Lệnh ldconsole của job được gắn với job trong executor để hủy được khi đang chạy
+        self.executor = executor
+        self.status = self.QUEUED
+        self.progress = 0
+        self.message = ''
+        self.result = None
+        self.error: Optional[str] = None
+        self.signals = JobSignals()
+        self._cancel_requested = False
+        # Kiểm tra cờ hủy và chuyển sang RUNNING là một bước
+        self._lock = threading.Lock()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (self.QUEUED, self.RUNNING)
+
+    def report(self, percent: int, message: str = ''):
+        """Gọi từ func để báo tiến độ"""
+        self.progress = percent
+        self.message = message
+        self.signals.progress.emit(self)
+
+    def request_cancel(self):
+        with self._lock:
+            self._cancel_requested = True
+            running = self.status == self.RUNNING
+        # Lệnh đã chạy thì kill; lệnh bắt đầu sau đó bị executor kill ngay nhờ is_cancelled
+        if running and self.executor is not None:
+            self.executor.cancel(self)
+
+    def run(self):
+        with self._lock:
+            cancelled = self._cancel_requested
+            if not cancelled:
+                self.status = self.RUNNING
+        if cancelled:
+            self._finish(self.CANCELLED, self.signals.cancelled)
+            return
+        self.signals.started.emit(self)
+        try:
+            with self.executor.scope(self) if self.executor is not None else nullcontext():
+                self.result = self.func(*self.args)
+        except Exception as e:
+            if self._cancel_requested:
+                # Lỗi do process bị kill khi hủy, không phải job thất bại
+                self._finish(self.CANCELLED, self.signals.cancelled)
+                return
+            self.error = str(e)
+            logger.error(f"Job '{self.title}' failed: {e}")
+            self._finish(self.FAILED, self.signals.failed)
+            return
+        if self._cancel_requested:
+            self._finish(self.CANCELLED, self.signals.cancelled)
+        else:
+            self.progress = 100
+            self._finish(self.DONE, self.signals.finished)
+
+    def _finish(self, status: str, signal):
+        self.status = status
+        signal.emit(self)
+
+class JobManager(QObject):
+    """
+    Hàng đợi thao tác nền cho GUI: luồng Qt chính chỉ xếp job và nhận kết quả qua signal
+    """
+    job_added = Signal(object)
+    job_changed = Signal(object)
+    job_done = Signal(object)
+
+    def __init__(self, max_workers: int = 8, parent=None, executor: Optional[CommandExecutor] = None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.executor = executor
+        self.jobs: Dict[int, Job] = {}
+
+    def submit(self, title: str, func: Callable, *args, instance: Optional[str] = None) -> Job:
+        job = Job(title, func, *args, instance=instance, executor=self.executor)
+        for signal in (job.signals.started, job.signals.progress):
+            signal.connect(self.job_changed)
+        for signal in (job.signals.finished, job.signals.failed, job.signals.cancelled):
+            signal.connect(self._on_done)
+        self.jobs[job.id] = job
+        self.job_added.emit(job)
+        job.signals.queued.emit(job)
+        self.pool.start(job)
+        return job
+
+    def cancel(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job is None or not job.is_active:
+            return
+        # Job đang chạy: kill lệnh ldconsole của nó, job còn trong hàng đợi thì lấy ra luôn
+        job.request_cancel()
+        if self.pool.tryTake(job):
+            job._finish(Job.CANCELLED, job.signals.cancelled)
+
+    def cancel_all(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def shutdown(self, timeout_ms: int = 10000) -> bool:
+        """
+        Hủy mọi job rồi chờ pool chạy hết trước khi đóng ứng dụng
+        Returns:
+            False nếu vẫn còn job chưa dừng sau timeout_ms
+        """
+        self.cancel_all()
+        done = self.pool.waitForDone(timeout_ms)
+        if not done:
+            logger.warning(f"{self.active_count} jobs still running after {timeout_ms} ms")
+        return done
+
+    def clear_finished(self):
+        for job_id in [job_id for job_id, job in self.jobs.items() if not job.is_active]:
+            del self.jobs[job_id]
+
+    @property
+    def active_count(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.is_active)
+
+    def _on_done(self, job: Job):
+        self.job_changed.emit(job)
+        self.job_done.emit(job)
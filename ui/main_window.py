@@ -1,16 +1,35 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QPushButton, QTableWidget, QTableWidgetItem, QMessageBox)
+                            QPushButton, QTableView, QAbstractItemView, QMessageBox,
+                            QFileDialog, QSplitter, QTabWidget)
 from PySide6.QtCore import Qt
 from core.ld_manager import LDPlayerManager
+from config.settings import settings
 from .dialogs.create_instance import CreateInstanceDialog
+from .models.instance_table_model import InstanceTableModel
+from .delegates.action_delegate import ActionButtonDelegate
+from .jobs.job_manager import Job, JobManager
+from .widgets.job_panel import JobPanel
+from .widgets.stats_panel import StatsPanel
+from .widgets.resource_monitor import ResourceMonitor
+from .services.monitor_service import MonitorService
 from utils.logger import logger
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.ld_manager = LDPlayerManager()
+        # Mọi lệnh ldconsole chạy nền, luồng GUI chỉ nhận kết quả
+        self.jobs = JobManager(settings.executor_max_workers, self, executor=self.ld_manager.executor)
+        self.jobs.job_done.connect(self.on_job_done)
         self.init_ui()
 
+        # Số liệu CPU/RAM thực tế được lấy ở thread nền
+        self.monitor = MonitorService(self.ld_manager, parent=self)
+        self.monitor.updated.connect(self.model.apply_resources)
+        self.bottom_tabs.addTab(ResourceMonitor(self.monitor), 'Host')
+        self.monitor.start()
+        self.ld_manager.start_metrics_server()
+
     def init_ui(self):
         self.setWindowTitle('LDPlayer Manager')
         self.setMinimumSize(800, 600)
@@ -40,77 +59,82 @@ class MainWindow(QMainWindow):
 
         layout.addLayout(button_layout)
 
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(['Name', 'Status', 'CPU', 'Memory', 'Actions'])
-        layout.addWidget(self.table)
+        # Table: model/view, nút thao tác được vẽ bằng delegate
+        self.model = InstanceTableModel(self.ld_manager, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.action_delegate = ActionButtonDelegate(self.table)
+        self.action_delegate.start_clicked.connect(
+            lambda row: self.start_instance(self.model.name_at(row)))
+        self.action_delegate.stop_clicked.connect(
+            lambda row: self.stop_instance(self.model.name_at(row)))
+        self.table.setItemDelegateForColumn(InstanceTableModel.ACTIONS, self.action_delegate)
+
+        self.job_panel = JobPanel(self.jobs)
+        self.stats_panel = StatsPanel(self.ld_manager.telemetry)
+        self.bottom_tabs = QTabWidget()
+        self.bottom_tabs.addTab(self.job_panel, 'Jobs')
+        self.bottom_tabs.addTab(self.stats_panel, 'Stats')
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.bottom_tabs)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
 
-        self.refresh_table()
+    def closeEvent(self, event):
+        # Job đang chạy giữ tham chiếu tới manager/model: hủy và chờ chúng dừng hẳn trước khi đóng
+        self.jobs.shutdown()
+        self.monitor.stop()
+        self.ld_manager.stop_metrics_server()
+        super().closeEvent(event)
 
     def refresh_table(self):
-        self.table.setRowCount(0)
-        for device in self.ld_manager.devices.values():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            self.table.setItem(row, 0, QTableWidgetItem(device.name))
-            self.table.setItem(row, 1, QTableWidgetItem(device.status))
-            self.table.setItem(row, 2, QTableWidgetItem(str(device.properties.get('cpu', '-'))))
-            self.table.setItem(row, 3, QTableWidgetItem(str(device.properties.get('memory', '-'))))
-
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            
-            start_btn = QPushButton('▶')
-            start_btn.clicked.connect(lambda checked, name=device.name: self.start_instance(name))
-            
-            stop_btn = QPushButton('⏹')
-            stop_btn.clicked.connect(lambda checked, name=device.name: self.stop_instance(name))
-            
-            actions_layout.addWidget(start_btn)
-            actions_layout.addWidget(stop_btn)
-            
-            self.table.setCellWidget(row, 4, actions_widget)
+        self.model.reload()
+
+    def selected_names(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.model.name_at(row) for row in rows]
+
+    def start_instance(self, name):
+        self.jobs.submit(f'Start {name}', self.ld_manager.start_instance, name, instance=name)
+
+    def stop_instance(self, name):
+        self.jobs.submit(f'Stop {name}', self.ld_manager.stop_instance, name, instance=name)
+
+    def on_job_done(self, job: Job):
+        if job.instance:
+            self.model.update_device(job.instance)
+        self.statusBar().showMessage(f'{job.title}: {job.error or job.status}', 5000)
 
     def show_create_dialog(self):
         dialog = CreateInstanceDialog(self)
         if dialog.exec():
             name, properties = dialog.get_data()
-            try:
-                self.ld_manager.create_instance(name, properties)
-                self.refresh_table()
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', str(e))
+            if not name:
+                QMessageBox.warning(self, 'Warning', 'Please enter a name for the instance')
+                return
+            self.jobs.submit(f'Create {name}', self.ld_manager.create_instance, name, properties,
+                             instance=name)
 
     def start_selected(self):
-        selected = self.table.selectedItems()
-        if not selected:
-            return
-        
-        row = selected[0].row()
-        name = self.table.item(row, 0).text()
-        try:
-            self.ld_manager.start_instance(name)
-            self.refresh_table()
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', str(e))
+        for name in self.selected_names():
+            self.start_instance(name)
 
     def stop_selected(self):
-        selected = self.table.selectedItems()
-        if not selected:
-            return
-        
-        row = selected[0].row()
-        name = self.table.item(row, 0).text()
-        try:
-            self.ld_manager.stop_instance(name)
-            self.refresh_table()
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', str(e))
+        for name in self.selected_names():
+            self.stop_instance(name)
 
     def install_app(self):
-        from PyQt6.QtWidgets import QFileDialog
+        names = self.selected_names()
+        if not names:
+            return
+
         file_name, _ = QFileDialog.getOpenFileName(
             self,
             "Select APK",
@@ -119,14 +143,7 @@ class MainWindow(QMainWindow):
         )
         
         if file_name:
-            selected = self.table.selectedItems()
-            if not selected:
-                return
-                
-            row = selected[0].row()
-            name = self.table.item(row, 0).text()
-            try:
-                self.ld_manager.install_app(name, file_name)
-                QMessageBox.information(self, 'Success', 'App installed successfully')
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', str(e))
\ No newline at end of file
+            # install() ném lỗi khi cài thất bại (deploy chỉ trả kết quả theo instance) nên job báo failed
+            for name in names:
+                self.jobs.submit(f'Install on {name}', self.ld_manager.installer.install, name, file_name,
+                                 instance=name)
\ No newline at end of file
@@ -0,0 +1,110 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from typing import Dict, List, Optional, Tuple
+from core.ld_manager import LDPlayerManager
+
+class InstanceTableModel(QAbstractTableModel):
+    COLUMNS = ['Name', 'Status', 'CPU', 'Memory', 'Threads', 'Actions']
+    NAME, STATUS, CPU, MEMORY, THREADS, ACTIONS = range(6)
+
+    def __init__(self, manager: LDPlayerManager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Giá trị đang hiển thị theo từng dòng, dùng để chỉ báo những ô thực sự đổi
+        self._cells: List[Tuple] = []
+        # Số liệu thực tế do MonitorService đẩy về
+        self._live: Dict[str, Dict] = {}
+        self.reload()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole and index.column() != self.ACTIONS:
+            return self._cells[index.row()][index.column()]
+        if role == Qt.TextAlignmentRole and index.column() in (self.CPU, self.MEMORY, self.THREADS):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def name_at(self, row: int) -> Optional[str]:
+        if 0 <= row < len(self._names):
+            return self._names[row]
+        return None
+
+    def reload(self):
+        """Dựng lại toàn bộ model, chỉ dùng khi danh sách instance thay đổi lớn"""
+        self.beginResetModel()
+        self._names = list(self.manager.devices)
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._cells = [self._cells_for(name) for name in self._names]
+        self.endResetModel()
+
+    def update_device(self, name: str):
+        """
+        Cập nhật một instance: thêm/xóa dòng nếu cần, nếu không chỉ phát dataChanged cho các ô đã đổi
+        Args:
+            name: Tên instance vừa thay đổi
+        """
+        row = self._rows.get(name)
+        if name not in self.manager.devices:
+            self._live.pop(name, None)
+            if row is not None:
+                self._remove_row(row)
+            return
+        if row is None:
+            self._append_row(name)
+            return
+
+        cells = self._cells_for(name)
+        changed = [col for col, (old, new) in enumerate(zip(self._cells[row], cells)) if old != new]
+        if not changed:
+            return
+        self._cells[row] = cells
+        self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)), [Qt.DisplayRole])
+
+    def apply_resources(self, changes: Dict[str, Dict]):
+        """Nhận số liệu đã đổi từ MonitorService, chỉ các ô đổi giá trị hiển thị mới được vẽ lại"""
+        for name, values in changes.items():
+            self._live[name] = values
+            self.update_device(name)
+
+    def _cells_for(self, name: str) -> Tuple:
+        device = self.manager.devices[name]
+        live = self._live.get(name)
+        if live is None:
+            return (device.name, device.status, '-', '-', '-', None)
+        running = live['status'] in ('running', 'booting')
+        return (
+            device.name,
+            live['status'],
+            f"{live['cpu']:.0f}%" if running else '-',
+            f"{live['memory']:.0f} MB" if running else '-',
+            str(live['threads']) if running else '-',
+            None
+        )
+
+    def _append_row(self, name: str):
+        row = len(self._names)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._names.append(name)
+        self._rows[name] = row
+        self._cells.append(self._cells_for(name))
+        self.endInsertRows()
+
+    def _remove_row(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._names[row]
+        del self._cells[row]
+        self._rows = {name: i for i, name in enumerate(self._names)}
+        self.endRemoveRows()
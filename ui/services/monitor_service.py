@@ -0,0 +1,95 @@
+import time
+from PySide6.QtCore import QMetaMethod, QObject, Signal
+from typing import Dict, Optional
+import psutil
+from core.ld_manager import LDPlayerManager
+from core.exceptions import InstanceError
+from utils.logger import logger
+
+class MonitorService(QObject):
+    """
+    Cầu nối giữa CpuSampler (thread nền) và GUI: mọi lời gọi psutil/ldconsole chạy ở thread sampler,
+    GUI chỉ nhận các giá trị đã đổi qua signal
+    """
+    # Dict[instance_name, {'cpu', 'memory', 'threads', 'status'}], chỉ gồm instance có thay đổi
+    updated = Signal(dict)
+    # Thông số toàn máy: cpu, mem_percent, mem_used, mem_total, disk_percent, disk_used, disk_total
+    host_updated = Signal(dict)
+
+    def __init__(self, manager: LDPlayerManager, cpu_threshold: float = 1.0,
+                 memory_threshold: float = 5.0, disk_path: str = '/', disk_interval: float = 30.0, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.cpu_threshold = cpu_threshold
+        self.memory_threshold = memory_threshold
+        self.disk_path = disk_path
+        # Dung lượng đĩa đổi chậm: đọc lại sau disk_interval giây thay vì mỗi tick
+        self.disk_interval = disk_interval
+        self._disk: Optional[Dict] = None
+        self._disk_read_at = float('-inf')
+        self._published: Dict[str, Dict] = {}
+        manager.sampler.add_listener(self._on_sample)
+
+    def start(self):
+        self.manager.start_monitoring()
+
+    def stop(self):
+        self.manager.stop_monitoring()
+
+    def _on_sample(self, snapshot):
+        try:
+            statuses = self.manager.status.all()
+        except InstanceError:
+            statuses = {}
+
+        changes = {}
+        for name, device in list(self.manager.devices.items()):
+            values = snapshot.resources(name) or {'cpu': 0, 'memory': 0, 'threads': 0}
+            status = statuses.get(name)
+            if name in snapshot.roots:
+                values['status'] = 'running' if not status or status.android_started else 'booting'
+            elif status is not None:
+                values['status'] = 'running' if status.running else 'stopped'
+            else:
+                values['status'] = device.status
+            if self._changed(self._published.get(name), values):
+                self._published[name] = values
+                changes[name] = values
+
+        for name in set(self._published) - set(self.manager.devices):
+            del self._published[name]
+
+        if changes:
+            self.updated.emit(changes)
+        # Không có view nào hiển thị thông số máy thì không đọc
+        if self.isSignalConnected(QMetaMethod.fromSignal(self.host_updated)):
+            self.host_updated.emit(self._host_stats())
+
+    def _changed(self, old, new) -> bool:
+        if old is None:
+            return True
+        return (old['status'] != new['status']
+                or old['threads'] != new['threads']
+                or abs(old['cpu'] - new['cpu']) >= self.cpu_threshold
+                or abs(old['memory'] - new['memory']) >= self.memory_threshold)
+
+    def _host_stats(self) -> Dict:
+        mem = psutil.virtual_memory()
+        stats = {
+            # Dùng chung cửa sổ đo CPU của admission thay vì psutil.cpu_percent()
+            'cpu': round(self.manager.admission.host().cpu_percent, 1),
+            'mem_percent': mem.percent,
+            'mem_used': mem.used,
+            'mem_total': mem.total
+        }
+        now = time.monotonic()
+        if now - self._disk_read_at >= self.disk_interval:
+            self._disk_read_at = now
+            try:
+                disk = psutil.disk_usage(self.disk_path)
+                self._disk = {'disk_percent': disk.percent, 'disk_used': disk.used, 'disk_total': disk.total}
+            except OSError as e:
+                logger.warning(f"Failed to read disk usage: {e}")
+        if self._disk is not None:
+            stats.update(self._disk)
+        return stats
@@ -0,0 +1,84 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QTableWidget, QTableWidgetItem, QAbstractItemView, QProgressBar)
+from PySide6.QtCore import Qt
+from typing import Dict
+from ui.jobs.job_manager import Job, JobManager
+
+class JobPanel(QWidget):
+    """Danh sách thao tác đang chạy/đã xong, hủy được job đã chọn hoặc tất cả"""
+
+    def __init__(self, jobs: JobManager, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs
+        self._rows: Dict[int, int] = {}
+        self.init_ui()
+
+        jobs.job_added.connect(self.add_job)
+        jobs.job_changed.connect(self.update_job)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header = QHBoxLayout()
+        self.summary_label = QLabel('No jobs')
+        self.cancel_btn = QPushButton('Cancel Selected')
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        self.cancel_all_btn = QPushButton('Cancel All')
+        self.cancel_all_btn.clicked.connect(self.jobs.cancel_all)
+        self.clear_btn = QPushButton('Clear Finished')
+        self.clear_btn.clicked.connect(self.clear_finished)
+        header.addWidget(self.summary_label)
+        header.addStretch()
+        for btn in [self.cancel_btn, self.cancel_all_btn, self.clear_btn]:
+            header.addWidget(btn)
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(['Job', 'Status', 'Progress', 'Message'])
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+    def add_job(self, job: Job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        title = QTableWidgetItem(job.title)
+        title.setData(Qt.UserRole, job.id)
+        self.table.setItem(row, 0, title)
+        self.table.setItem(row, 1, QTableWidgetItem(job.status))
+        bar = QProgressBar()
+        bar.setRange(0, 100)
+        self.table.setCellWidget(row, 2, bar)
+        self.table.setItem(row, 3, QTableWidgetItem(''))
+        self._rows[job.id] = row
+        self.update_summary()
+
+    def update_job(self, job: Job):
+        row = self._rows.get(job.id)
+        if row is None:
+            return
+        self.table.item(row, 1).setText(job.status)
+        self.table.cellWidget(row, 2).setValue(job.progress)
+        self.table.item(row, 3).setText(job.error or job.message)
+        self.update_summary()
+
+    def update_summary(self):
+        active = self.jobs.active_count
+        self.summary_label.setText(f'{active} running / queued' if active else 'No jobs in flight')
+
+    def cancel_selected(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for row in rows:
+            self.jobs.cancel(self.table.item(row, 0).data(Qt.UserRole))
+
+    def clear_finished(self):
+        self.jobs.clear_finished()
+        for row in reversed(range(self.table.rowCount())):
+            if self.table.item(row, 0).data(Qt.UserRole) not in self.jobs.jobs:
+                self.table.removeRow(row)
+        self._rows = {self.table.item(row, 0).data(Qt.UserRole): row
+                      for row in range(self.table.rowCount())}
+        self.update_summary()
@@ -1,44 +1,80 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout
 from PySide6.QtCore import Qt, QTimer
 import pyqtgraph as pg
-from collections import deque
 import numpy as np
+import time
 
 class ResourceGraph(QWidget):
-    def __init__(self, title, max_points=100, parent=None):
+    def __init__(self, title, max_points=100, fps=10, parent=None):
         super().__init__(parent)
         self.max_points = max_points
-        self.data = deque(maxlen=max_points)
-        self.time_data = deque(maxlen=max_points)
+        # Ring buffer ghi đôi: mỗi mẫu ghi ở i và i + max_points,
+        # nên max_points điểm mới nhất luôn là một view liên tục, không cần copy
+        self._times = np.zeros(2 * max_points)
+        self._values = np.zeros(2 * max_points)
+        self._written = 0
+        self._dirty = False
+
+        # Gộp nhiều lần update thành một lần vẽ lại mỗi frame
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(int(1000 / fps))
+        self._redraw_timer.timeout.connect(self.redraw)
+
         self.init_ui(title)
 
     def init_ui(self, title):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # Tạo plot widget
-        self.plot_widget = pg.PlotWidget()
+        # Tạo plot widget, trục thời gian hiển thị timestamp thật
+        self.plot_widget = pg.PlotWidget(axisItems={'bottom': pg.DateAxisItem(orientation='bottom')})
         self.plot_widget.setBackground('w')
         self.plot_widget.setTitle(title)
         self.plot_widget.showGrid(x=True, y=True)
-        
+
         # Thiết lập style cho plot
         self.plot_widget.getAxis('left').setTextPen('k')
         self.plot_widget.getAxis('bottom').setTextPen('k')
         self.plot_widget.setLabel('left', 'Usage', units='%')
-        self.plot_widget.setLabel('bottom', 'Time', units='s')
-        
+        self.plot_widget.setLabel('bottom', 'Time')
+
+        # Chỉ vẽ phần đang nhìn thấy và downsample khi cửa sổ dài
+        self.plot_widget.setClipToView(True)
+        self.plot_widget.setDownsampling(auto=True, mode='peak')
+
         # Tạo line plot
-        self.curve = self.plot_widget.plot(pen=pg.mkPen(color='b', width=2))
-        
+        self.curve = self.plot_widget.plot(pen=pg.mkPen(color='b', width=2), skipFiniteCheck=True)
+
         layout.addWidget(self.plot_widget)
 
-    def update_data(self, value):
-        self.data.append(value)
-        self.time_data.append(len(self.time_data))
-        
-        # Cập nhật plot
-        self.curve.setData(
-            x=list(self.time_data), 
-            y=list(self.data)
-        )
\ No newline at end of file
+    def update_data(self, value, timestamp=None):
+        pos = self._written % self.max_points
+        timestamp = timestamp if timestamp is not None else time.time()
+        self._times[pos] = self._times[pos + self.max_points] = timestamp
+        self._values[pos] = self._values[pos + self.max_points] = value
+        self._written += 1
+
+        self._dirty = True
+        if not self._redraw_timer.isActive():
+            self._redraw_timer.start()
+
+    def window(self):
+        """View (không copy) của các điểm mới nhất theo thứ tự thời gian"""
+        count = min(self._written, self.max_points)
+        if count == 0:
+            return self._times[:0], self._values[:0]
+        end = (self._written - 1) % self.max_points + self.max_points + 1
+        return self._times[end - count:end], self._values[end - count:end]
+
+    def redraw(self):
+        # Widget bị ẩn thì để dành tới showEvent
+        if not self._dirty or not self.isVisible():
+            return
+        self._dirty = False
+        times, values = self.window()
+        self.curve.setData(x=times, y=values)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.redraw()
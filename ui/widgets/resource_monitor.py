@@ -1,16 +1,13 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QProgressBar, QLabel
-from PySide6.QtCore import QTimer
-import psutil
 
 class ResourceMonitor(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, service=None, parent=None):
         super().__init__(parent)
         self.init_ui()
         
-        # Update timer
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_stats)
-        self.timer.start(1000)  # Update mỗi giây
+        # Số liệu được MonitorService đọc ở thread nền và đẩy về, GUI không gọi psutil
+        if service is not None:
+            service.host_updated.connect(self.update_stats)
         
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -38,27 +35,26 @@ class ResourceMonitor(QWidget):
         layout.addWidget(self.disk_label)
         layout.addWidget(self.disk_bar)
         
-    def update_stats(self):
+    def update_stats(self, stats):
         # CPU
-        cpu_percent = psutil.cpu_percent()
+        cpu_percent = stats['cpu']
         self.cpu_label.setText(f'CPU Usage: {cpu_percent}%')
         self.cpu_bar.setValue(int(cpu_percent))
         
         # Memory
-        mem = psutil.virtual_memory()
-        mem_percent = mem.percent
-        self.mem_label.setText(f'Memory Usage: {mem_percent}% ({self.format_bytes(mem.used)}/{self.format_bytes(mem.total)})')
+        mem_percent = stats['mem_percent']
+        self.mem_label.setText(f"Memory Usage: {mem_percent}% ({self.format_bytes(stats['mem_used'])}/{self.format_bytes(stats['mem_total'])})")
         self.mem_bar.setValue(int(mem_percent))
         
         # Disk
-        disk = psutil.disk_usage('/')
-        disk_percent = disk.percent
-        self.disk_label.setText(f'Disk Usage: {disk_percent}% ({self.format_bytes(disk.used)}/{self.format_bytes(disk.total)})')
-        self.disk_bar.setValue(int(disk_percent))
+        if 'disk_percent' in stats:
+            disk_percent = stats['disk_percent']
+            self.disk_label.setText(f"Disk Usage: {disk_percent}% ({self.format_bytes(stats['disk_used'])}/{self.format_bytes(stats['disk_total'])})")
+            self.disk_bar.setValue(int(disk_percent))
         
     def format_bytes(self, bytes):
         """Convert bytes to human readable format"""
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
             if bytes < 1024:
                 return f"{bytes:.1f}{unit}"
-            bytes /= 1024
\ No newline at end of file
+            bytes /= 1024
@@ -0,0 +1,87 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                               QTableWidget, QTableWidgetItem, QAbstractItemView)
+from PySide6.QtCore import Qt, QTimer
+from core.telemetry import Telemetry
+
+class StatsPanel(QWidget):
+    """Độ trễ/lỗi của lệnh ldconsole theo verb, hàng đợi executor và thời gian mỗi lượt monitor"""
+
+    COLUMNS = ['Verb', 'Calls', 'Failed', 'Timeouts', 'p50 (ms)', 'p95 (ms)', 'Mean (ms)']
+
+    def __init__(self, telemetry: Telemetry, interval_ms: int = 2000, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry
+        self.init_ui()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header = QHBoxLayout()
+        self.queue_label = QLabel('Queue: 0')
+        self.running_label = QLabel('Running: 0')
+        self.tick_label = QLabel('Monitor tick: -')
+        self.cache_label = QLabel('Cache: -')
+        for label in [self.queue_label, self.running_label, self.tick_label, self.cache_label]:
+            header.addWidget(label)
+        header.addStretch()
+        layout.addLayout(header)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+    def refresh(self):
+        # Tab bị ẩn thì không cần dựng lại bảng
+        if not self.isVisible():
+            return
+        snapshot = self.telemetry.snapshot()
+
+        outcomes = {}
+        for labels, value in snapshot['counters'].get('ldconsole_commands_total', []):
+            outcomes.setdefault(labels['verb'], {})[labels['outcome']] = int(value)
+
+        rows = sorted(snapshot['histograms'].get('ldconsole_command_seconds', []),
+                      key=lambda row: row[0]['verb'])
+        self.table.setRowCount(len(rows))
+        for row, (labels, count, total, p50, p95) in enumerate(rows):
+            verb = labels['verb']
+            counts = outcomes.get(verb, {})
+            values = [verb, count, counts.get('failed', 0) + counts.get('error', 0), counts.get('timeout', 0),
+                      f'{p50 * 1000:.0f}', f'{p95 * 1000:.0f}', f'{total / count * 1000:.0f}' if count else '-']
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if column:
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    self.table.setItem(row, column, item)
+                item.setText(str(value))
+
+        gauges = snapshot['gauges']
+        self.queue_label.setText(f"Queue: {gauges.get('executor_queue_depth', 0):.0f}")
+        self.running_label.setText(f"Running: {gauges.get('executor_running_commands', 0):.0f}")
+        ticks = snapshot['histograms'].get('monitor_tick_seconds')
+        if ticks:
+            _, count, _, p50, p95 = ticks[0]
+            self.tick_label.setText(f'Monitor tick: p50 {p50 * 1000:.0f} ms / p95 {p95 * 1000:.0f} ms')
+
+        cache = {}
+        for labels, value in snapshot['counters'].get('ldconsole_cache_total', []):
+            cache[labels['result']] = cache.get(labels['result'], 0) + int(value)
+        if cache:
+            self.cache_label.setText(f"Cache: {cache.get('hit', 0)} hit / {cache.get('coalesced', 0)} coalesced / "
+                                     f"{cache.get('miss', 0)} miss")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
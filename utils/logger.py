@@ -1,29 +1,193 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from config.settings import settings
 
-def setup_logger():
-    # Tạo thư mục logs nếu chưa tồn tại
-    log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-    os.makedirs(log_dir, exist_ok=True)
+# Các field có cấu trúc, truyền qua extra={...}
+STRUCTURED_FIELDS = ('instance', 'command', 'duration', 'exit_code')
+
+_setup_lock = threading.Lock()
+_configured = False
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Mỗi record là một dòng JSON, kèm các field có cấu trúc nếu có"""
+
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Định dạng text cũ, các field có cấu trúc được nối vào cuối dòng dạng key=value"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = [f"{field}={getattr(record, field)}" for field in STRUCTURED_FIELDS
+                  if getattr(record, field, None) is not None]
+        return f"{line} [{' '.join(fields)}]" if fields else line
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket theo (logger, instance): một instance lỗi liên tục trong vòng monitor
+    không làm ngập log. Số record bị bỏ được báo lại ở record kế tiếp được ghi.
+    Record từ min_level trở lên (mặc định WARNING) không bị giới hạn: lúc chạy batch
+    đó chính là các dòng cần đọc
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 50, min_level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.min_level = min_level
+        # key -> [tokens, last_refill, suppressed]
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= self.min_level:
+            return True
+        key = (record.name, getattr(record, 'instance', None))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Xoay file khi vượt max_bytes hoặc khi đã qua interval giây kể từ lần xoay trước"""
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, interval=0, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.interval = interval
+        self.rollover_at = self._next_rollover()
 
-    logger = logging.getLogger('LDPlayerManager')
-    logger.setLevel(settings.config['logging']['level'])
+    def _next_rollover(self):
+        return time.time() + self.interval if self.interval > 0 else float('inf')
 
-    formatter = logging.Formatter(
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+
+
+def _build_handlers(config):
+    formatter = JsonFormatter() if config.get('format') == 'json' else TextFormatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
-    # Sửa đường dẫn file log
-    log_file = os.path.join(log_dir, 'ldplayer.log')
-    file_handler = logging.FileHandler(log_file)
+    # Đường dẫn tương đối tính từ thư mục gốc của project
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    log_file = os.path.join(root, config.get('file', 'logs/ldplayer.log'))
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    file_handler = SizeAndTimeRotatingFileHandler(
+        log_file,
+        max_bytes=config.get('max_bytes', 10 * 1024 * 1024),
+        backup_count=config.get('backup_count', 5),
+        interval=config.get('rotate_interval', 86400)
+    )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    console_handler.setLevel(config.get('console_level', 'NOTSET'))
+    return [file_handler, console_handler]
+
+
+def setup_logger():
+    """
+    Ghi log qua QueueHandler: thread gọi chỉ đẩy record vào queue,
+    QueueListener ở thread riêng mới format và ghi ra file/console
+    """
+    global _configured, _listener
+    with _setup_lock:
+        if _configured:
+            return logger
+
+        config = settings.config.get('logging', {})
+        logger.setLevel(config.get('level', 'INFO'))
+
+        queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        rate_limit = config.get('rate_limit', {})
+        queue_handler.addFilter(RateLimitFilter(
+            rate=rate_limit.get('per_second', 10.0),
+            burst=rate_limit.get('burst', 50)
+        ))
+
+        _listener = logging.handlers.QueueListener(
+            queue_handler.queue, *_build_handlers(config), respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logger)
+
+        # Gán list mới thay vì sửa list handlers đang được duyệt
+        logger.handlers = [queue_handler]
+        _configured = True
+        return logger
+
+
+def shutdown_logger():
+    """Ghi nốt các record còn trong queue và đóng file log"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+class _DeferredSetup(logging.Handler):
+    """Cấu hình handler thật ở lần ghi log đầu tiên, để import module không đọc config hay mở file log"""
 
-    return logger
+    def emit(self, record):
+        setup_logger()
+        if record.levelno < logger.getEffectiveLevel():
+            return
+        # Chỉ chuyển record cho handler vừa cài; logger.handle sẽ propagate lên root lần nữa
+        # trong khi lần gọi đang chạy vẫn tiếp tục propagate, record bị ghi hai lần
+        for handler in logger.handlers:
+            if handler is not self and record.levelno >= handler.level:
+                handler.handle(record)
 
-logger = setup_logger()
\ No newline at end of file
+logger = logging.getLogger('LDPlayerManager')
+logger.setLevel(logging.DEBUG)
+logger.addHandler(_DeferredSetup())